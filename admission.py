@@ -0,0 +1,144 @@
+"""
+Cost-based admission control for analysis requests.
+
+The cost of a request is estimated in seconds of worker time from the dataset
+size, the endpoint and its parameters. Requests within the interactive budget
+run inline; larger ones are downgraded when the endpoint allows it (fewer
+plotted points, shorter lag range), queued as background jobs, or rejected.
+"""
+
+import math
+import os
+
+ACCEPT = 'accept'
+DOWNGRADE = 'downgrade'
+QUEUE = 'queue'
+REJECT = 'reject'
+
+# Approximate worker seconds per data row, measured on a single core
+ENDPOINT_COSTS = {
+    '/plot_series': 2e-6,
+    '/plot_lag_series': 2e-6,           # per row and per lag
+    '/analyze_series': 8e-6,
+    '/holt_winters_forecast': 4e-5,
+    '/comparative_analysis': 1.2e-4,    # three fits plus per-row Python loops
+    '/analyze_model_type': 4e-6,
+    '/analyze_all': 0                   # sum of the requested artifacts, see estimate_cost
+}
+
+# /analyze_all artifact -> endpoint whose cost it adds (None for negligible ones)
+ANALYZE_ALL_ENDPOINTS = {
+    'table': None,
+    'segments': '/analyze_model_type',
+    'acf': None,
+    'decomposition': '/analyze_series',
+    'forecast': '/holt_winters_forecast',
+    'comparative': '/comparative_analysis'
+}
+
+# Fixed overhead of loading and parsing a file, per row
+LOAD_COST_PER_ROW = 3e-6
+
+# Smallest variants a request can be downgraded to
+MIN_PLOT_POINTS = 2000
+MIN_LAGS = 4
+
+
+def estimate_rows(filepath, sample_bytes=65536):
+    """Estimate the number of data rows from the file size and a sample of lines"""
+    size = os.path.getsize(filepath)
+    if filepath.endswith(('.xlsx', '.xls')):
+        # Compressed workbook; assume roughly 20 bytes per row on disk
+        return max(1, size // 20)
+    if filepath.endswith(('.gz', '.bz2', '.xz', '.zst', '.zip')):
+        # Compressed text; exports typically shrink about 10x from ~40 bytes per row
+        return max(1, size // 4)
+
+    with open(filepath, 'rb') as fh:
+        sample = fh.read(sample_bytes)
+    lines = sample.count(b'\n')
+    if lines == 0 or len(sample) >= size:
+        return max(1, lines)
+    return max(1, int(size / (len(sample) / lines)))
+
+
+def _count(params, name, default):
+    """params[name] as an integer of at least 1; the default when it is missing or not a number (the route reports it)"""
+    try:
+        return max(1, int(params.get(name) or default))
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def estimate_cost(endpoint, rows, params):
+    """Estimated worker seconds for an endpoint on a dataset with the given rows"""
+    per_row = ENDPOINT_COSTS.get(endpoint, 0)
+    series = _count(params, 'series_count', 1)
+    cost = rows * LOAD_COST_PER_ROW
+
+    if endpoint == '/analyze_all':
+        # The file is loaded once; each artifact adds its own work
+        artifacts = params.get('artifacts')
+        if not isinstance(artifacts, list) or not artifacts:
+            artifacts = list(ANALYZE_ALL_ENDPOINTS)
+        for artifact in artifacts:
+            artifact_endpoint = ANALYZE_ALL_ENDPOINTS.get(artifact) if isinstance(artifact, str) else None
+            if artifact_endpoint:
+                cost += estimate_cost(artifact_endpoint, rows, params) - rows * LOAD_COST_PER_ROW
+    elif endpoint == '/plot_lag_series':
+        lags = _count(params, 'max_lags', 12)
+        cost += rows * per_row * lags * series
+    elif endpoint == '/holt_winters_forecast':
+        periods = _count(params, 'periods', 12)
+        cost += (rows + periods) * per_row * series
+    else:
+        cost += rows * per_row * series
+    return cost
+
+
+def decide(endpoint, rows, params, budget, max_cost, allow_queue=True):
+    """
+    Return (decision, cost, limits). limits holds the downgrade applied
+    (max_points and/or max_lags) when the decision is DOWNGRADE.
+    """
+    cost = estimate_cost(endpoint, rows, params)
+    if cost <= budget:
+        return ACCEPT, cost, {}
+
+    limits = downgrade_limits(endpoint, rows, params, budget)
+    if limits is not None:
+        downgraded = dict(params, **limits)
+        effective_rows = min(rows, limits.get('max_points', rows))
+        return DOWNGRADE, estimate_cost(endpoint, effective_rows, downgraded), limits
+
+    if cost <= max_cost and allow_queue:
+        return QUEUE, cost, {}
+    return REJECT, cost, {}
+
+
+def downgrade_limits(endpoint, rows, params, budget):
+    """Find a cheaper variant of the request that fits the budget, if the endpoint allows one"""
+    if endpoint == '/plot_series':
+        # Loading still costs the full file; only plotting is reduced
+        remaining = budget - rows * LOAD_COST_PER_ROW
+        if remaining <= 0:
+            return None
+        return {'max_points': max(MIN_PLOT_POINTS, int(remaining / ENDPOINT_COSTS[endpoint]))}
+
+    if endpoint == '/plot_lag_series':
+        load_cost = rows * LOAD_COST_PER_ROW
+        per_lag = rows * ENDPOINT_COSTS[endpoint]
+        lags = int((budget - load_cost) / per_lag) if per_lag else 0
+        if lags >= MIN_LAGS:
+            return {'max_lags': lags}
+        return None
+
+    return None
+
+
+def downsample(ts, max_points):
+    """Keep every k-th point so that at most max_points remain"""
+    if max_points is None or len(ts) <= max_points:
+        return ts
+    step = math.ceil(len(ts) / max_points)
+    return ts.iloc[::step]
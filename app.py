@@ -1,114 +1,446 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context, g, has_request_context, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
 import pandas as pd
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-from statsmodels.tsa.seasonal import seasonal_decompose
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import plotly
 import json
-import io
-import base64
 from werkzeug.utils import secure_filename
-import locale
+from werkzeug.formparser import FormDataParser
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 import re
+import time
+from contextlib import contextmanager
+import hmac
+import random
+import tracemalloc
+import base64
+import fcntl
+import io
+
+from result_store import ResultStore, file_fingerprint, make_key
+from shared_arrays import SharedArrayRegistry
+from jobs import JobQueue, RunnerSupervisor
+from singleflight import SingleFlight
+from metrics import MetricsRegistry, MEMORY_BUCKETS, process_rss_bytes
+from profiling import ProfileStore
+import admission
+import datasets
+import ingest
+import parsers
+import numeric
+import smoothing
+import streams
+import models
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records response encoding as the 'serialize' stage"""
+    
+    def response(self, *args, **kwargs):
+        with stage('serialize'):
+            return super().response(*args, **kwargs)
 
 app = Flask(__name__)
+app.json_provider_class = TimedJSONProvider
+app.json = TimedJSONProvider(app)
 CORS(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', 'dev-secret-key')
 app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
+# Uploads are streamed to disk and parsed on the fly, so they get a separate, larger limit
+app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_MB', '4096')) * 1024 * 1024
+app.config['UPLOAD_MAX_EXPANDED_BYTES'] = int(os.environ.get('UPLOAD_MAX_EXPANDED_MB', '16384')) * 1024 * 1024  # decompressed
+app.config['RESULT_STORE_DIR'] = os.environ.get('RESULT_STORE_DIR', 'cache')
+app.config['RESULT_STORE_MAX_BYTES'] = int(os.environ.get('RESULT_STORE_MAX_MB', '512')) * 1024 * 1024
+app.config['SHARED_ARRAY_DIR'] = os.environ.get('SHARED_ARRAY_DIR')  # defaults to /dev/shm
+app.config['SHARED_ARRAY_MAX_BYTES'] = int(os.environ.get('SHARED_ARRAY_MAX_MB', '2048')) * 1024 * 1024
+app.config['JOBS_DIR'] = os.environ.get('JOBS_DIR', app.config['RESULT_STORE_DIR'])
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', '2'))
+app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', '1800'))  # seconds
+# Keep event streams shorter than the gunicorn worker timeout; EventSource reconnects
+app.config['SSE_MAX_DURATION'] = int(os.environ.get('SSE_MAX_DURATION', '20'))  # seconds
+app.config['SINGLE_FLIGHT_TIMEOUT'] = int(os.environ.get('SINGLE_FLIGHT_TIMEOUT', '20'))  # seconds, below the gunicorn timeout
+app.config['ADMISSION_BUDGET'] = float(os.environ.get('ADMISSION_BUDGET', '10'))  # interactive seconds
+app.config['ADMISSION_MAX_COST'] = float(os.environ.get('ADMISSION_MAX_COST', '900'))  # seconds, as a job
+app.config['WARMUP_ENABLED'] = os.environ.get('WARMUP_ENABLED', 'true').lower() == 'true'
+app.config['WARMUP_DATASETS'] = int(os.environ.get('WARMUP_DATASETS', '3'))  # most recently used series to preload
+# Queue a background job after each upload that prepares the likely next artifacts
+app.config['PRECOMPUTE_ON_UPLOAD'] = os.environ.get('PRECOMPUTE_ON_UPLOAD', 'false').lower() == 'true'
+# Profiling is disabled unless a token is set; requests send it in X-Profile-Token
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.config['RESULT_STORE_DIR'], 'profiles'))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', '50'))
+# Fraction of requests sampled for memory accounting (tracemalloc + RSS); 0 disables it
+app.config['MEMORY_PROFILE_RATE'] = float(os.environ.get('MEMORY_PROFILE_RATE', '0'))
+
+# CSV parser: 'auto' uses pyarrow's multithreaded reader when installed, else pandas
+app.config['PARSER_BACKEND'] = os.environ.get('PARSER_BACKEND', 'auto')
+# Appended observations after which a smoothing model is refitted instead of advanced; 0 never refits
+app.config['SMOOTHING_REFIT_EVERY'] = int(os.environ.get('SMOOTHING_REFIT_EVERY', '0'))
+# Saved forecast models (small JSON files, never evicted)
+app.config['MODEL_DIR'] = os.environ.get('MODEL_DIR', os.path.join(app.config['RESULT_STORE_DIR'], 'models'))
+# Live smoothing streams: shared state table size, longest seasonal period, idle time before a slot can be reused
+app.config['STREAM_DIR'] = os.environ.get('STREAM_DIR')  # defaults to /dev/shm
+app.config['STREAM_CAPACITY'] = int(os.environ.get('STREAM_CAPACITY', '65536'))
+app.config['STREAM_MAX_PERIOD'] = int(os.environ.get('STREAM_MAX_PERIOD', '52'))
+app.config['STREAM_IDLE_HOURS'] = float(os.environ.get('STREAM_IDLE_HOURS', '24'))
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Set matplotlib style
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+parser_backend = parsers.get_backend(app.config['PARSER_BACKEND'])
+
+# Shared on-disk store for computed artifacts (survives worker recycling)
+result_store = ResultStore(app.config['RESULT_STORE_DIR'], app.config['RESULT_STORE_MAX_BYTES'])
+
+# Parsed series shared zero-copy between workers through memory-mapped files
+shared_arrays = SharedArrayRegistry(app.config['SHARED_ARRAY_DIR'], app.config['SHARED_ARRAY_MAX_BYTES'])
+
+# Fitted forecast models served by /forecast/<model_id>
+forecast_models = models.ModelStore(app.config['MODEL_DIR'])
+
+# Smoothing states of live series, shared by all workers
+stream_table = streams.StreamTable(app.config['STREAM_DIR'], app.config['STREAM_CAPACITY'],
+                                   app.config['STREAM_MAX_PERIOD'], app.config['STREAM_IDLE_HOURS'] * 3600)
+
+# Identical concurrent computations (same dataset, endpoint and params) run once
+single_flight = SingleFlight(os.path.join(app.config['RESULT_STORE_DIR'], 'locks'),
+                             app.config['SINGLE_FLIGHT_TIMEOUT'])
 
-def read_csv_with_auto_delimiter(filepath, encoding=None):
+# Long-running analyses executed by a job runner outside the HTTP workers
+job_queue = JobQueue(app.config['JOBS_DIR'], app.config['JOB_WORKERS'], app.config['JOB_TIMEOUT'])
+
+# Saved cProfile runs of requests that asked for one
+profiles = ProfileStore(app.config['PROFILE_DIR'], app.config['PROFILE_KEEP'])
+
+# Prometheus metrics aggregated across workers
+metrics = MetricsRegistry(app.config['RESULT_STORE_DIR'])
+metrics.describe('admission_decisions_total', 'counter', 'Admission decisions by endpoint and outcome')
+metrics.describe('jobs', 'gauge', 'Background jobs by status (queued is the queue depth)')
+metrics.register_collector(lambda: [('jobs', {'status': status}, count) for status, count in job_queue.counts().items()])
+metrics.describe('request_duration_seconds', 'histogram', 'Request latency by endpoint')
+metrics.describe('request_stage_seconds', 'histogram', 'Time spent in named stages (load, parse_dates, prepare, fit, build_figure, serialize) by endpoint')
+metrics.describe('result_store_lookups_total', 'counter', 'Result store lookups by outcome (hit/miss)')
+metrics.describe('prepared_series_lookups_total', 'counter', 'Prepared series lookups by source (shared, store, load)')
+metrics.describe('smoothing_state_lookups_total', 'counter', 'Smoothing model lookups by source (state, fit)')
+metrics.describe('result_store_bytes', 'gauge', 'Size of the result store')
+metrics.describe('shared_arrays_bytes', 'gauge', 'Size of the datasets published to shared memory')
+metrics.register_collector(lambda: [('result_store_bytes', {}, result_store.stats()['bytes']),
+                                    ('shared_arrays_bytes', {}, shared_arrays.stats()['bytes'])])
+metrics.describe('streams', 'gauge', 'Live smoothing streams registered')
+metrics.describe('stream_observations_total', 'counter', 'Observations pushed to live smoothing streams')
+metrics.register_collector(lambda: [('streams', {}, stream_table.stats()['streams'])])
+metrics.describe('request_memory_peak_bytes', 'histogram', 'Peak Python allocation during sampled requests, by endpoint', MEMORY_BUCKETS)
+metrics.describe('request_memory_retained_bytes', 'histogram', 'Memory allocated by sampled requests and still held afterwards, by endpoint', MEMORY_BUCKETS)
+metrics.describe('request_rss_growth_bytes', 'histogram', 'Worker RSS growth during sampled requests, by endpoint', MEMORY_BUCKETS)
+metrics.describe('process_resident_memory_bytes', 'gauge', 'Resident memory of the worker serving the scrape')
+metrics.describe('worker_recycles_total', 'counter', 'Workers restarted by the recycling policy, by reason')
+metrics.register_collector(lambda: [('process_resident_memory_bytes', {'pid': os.getpid()}, process_rss_bytes())])
+result_store.on_lookup = lambda hit: metrics.inc('result_store_lookups_total', {'result': 'hit' if hit else 'miss'})
+
+# Endpoints that accept async=true and run as background jobs
+ASYNC_ENDPOINTS = {
+    '/plot_lag_series', '/analyze_series', '/holt_winters_forecast',
+    '/comparative_analysis', '/analyze_model_type', '/analyze_all'
+}
+
+# Artifacts /analyze_all can compute, in the order they are produced (cheap first;
+# the forecast follows the decomposition so it can reuse the detected model type)
+ANALYZE_ALL_ARTIFACTS = ('table', 'segments', 'acf', 'decomposition', 'forecast', 'comparative')
+
+def sniff_csv_dialects(filepath, encoding=None):
     """
-    Read CSV file with automatic delimiter detection.
+    Rank (delimiter, encoding) candidates on the first rows of a file, best first.
     Tries common delimiters: comma (,), semicolon (;), tab (\t)
     """
     delimiters = [',', ';', '\t']
     encodings = [encoding] if encoding else ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
+    candidates = []
     
-    best_df = None
-    best_score = 0
-    best_info = {'delimiter': None, 'encoding': None, 'columns': 0}
-    
-    # Try each encoding
     for enc in encodings:
-        if enc is None:
-            continue
+        for delimiter in delimiters:
+            try:
+                # Read just a few rows to test
+                sample_df = pd.read_csv(filepath, sep=delimiter, encoding=enc, nrows=5)
+            except Exception:
+                continue
+            
+            # Calculate score based on:
+            # 1. Number of columns (more is usually better)
+            # 2. Consistent number of non-null values across rows
+            # 3. At least 2 columns
+            if len(sample_df.columns) < 2:
+                continue
+            
+            # Check for consistent data across rows
+            non_null_counts = [sample_df.iloc[i].notna().sum() for i in range(min(3, len(sample_df)))]
+            consistency = 1.0 if len(set(non_null_counts)) <= 1 else 0.5
+            
+            # Score = number of columns * consistency factor
+            score = len(sample_df.columns) * consistency
+            
+            # Bonus for having reasonable column names (not mostly numbers)
+            named_columns = sum(1 for col in sample_df.columns if not str(col).startswith('Unnamed'))
+            if named_columns == len(sample_df.columns):
+                score *= 1.2
             
+            candidates.append((score, {'delimiter': delimiter, 'encoding': enc}))
+    
+    # Stable sort: ties keep the order above (utf-8 first, comma first)
+    candidates.sort(key=lambda candidate: -candidate[0])
+    return [dialect for _, dialect in candidates]
+
+def read_csv_with_auto_delimiter(filepath, encoding=None, usecols=None, dtype=None, dialect=None):
+    """
+    Read CSV file with automatic delimiter detection.
+    The dialect is sniffed on a few rows (or taken from the metadata sidecar)
+    and the file is read once by the configured parser backend, decoding only
+    usecols with the given dtype hints.
+    Compressed files (.gz, .bz2, .xz, .zst, .zip) are decompressed while reading.
+    """
+    candidates = [dialect] if dialect else sniff_csv_dialects(filepath, encoding)
+    
+    # A file can look fine in its first rows and still fail later (e.g. a latin-1
+    # character deep in a "utf-8" file), so fall through to the next candidate
+    for candidate in candidates:
         try:
-            # Try each delimiter
-            for delimiter in delimiters:
-                try:
-                    # Read just a few rows to test
-                    sample_df = pd.read_csv(filepath, sep=delimiter, encoding=enc, nrows=5)
-                    
-                    # Calculate score based on:
-                    # 1. Number of columns (more is usually better)
-                    # 2. Consistent number of non-null values across rows
-                    # 3. At least 2 columns
-                    
-                    if len(sample_df.columns) < 2:
-                        continue
-                    
-                    # Check for consistent data across rows
-                    non_null_counts = [sample_df.iloc[i].notna().sum() for i in range(min(3, len(sample_df)))]
-                    consistency = 1.0 if len(set(non_null_counts)) <= 1 else 0.5
-                    
-                    # Score = number of columns * consistency factor
-                    score = len(sample_df.columns) * consistency
-                    
-                    # Bonus for having reasonable column names (not mostly numbers)
-                    named_columns = sum(1 for col in sample_df.columns if not str(col).startswith('Unnamed'))
-                    if named_columns == len(sample_df.columns):
-                        score *= 1.2
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_info = {
-                            'delimiter': delimiter,
-                            'encoding': enc,
-                            'columns': len(sample_df.columns)
-                        }
-                        # Read the full file with the best parameters
-                        best_df = pd.read_csv(filepath, sep=delimiter, encoding=enc)
-                
-                except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError, UnicodeError):
-                    continue
-                except Exception:
-                    continue
-        
-        except Exception:
+            df = parsers.read_csv(parser_backend, filepath, candidate['delimiter'], candidate['encoding'], usecols, dtype)
+        except (pd.errors.ParserError, UnicodeDecodeError, UnicodeError):
             continue
-    
-    # If we found a good configuration, return it
-    if best_df is not None and best_score > 0:
-        print(f"Auto-detected CSV format: delimiter='{best_info['delimiter']}', encoding='{best_info['encoding']}', columns={best_info['columns']}")
-        return best_df
+        print(f"Auto-detected CSV format: delimiter='{candidate['delimiter']}', encoding='{candidate['encoding']}', columns={len(df.columns)}")
+        df.attrs['csv_dialect'] = dict(candidate)
+        return df
     
     # Fallback: try basic pandas read_csv with default settings
     try:
-        return pd.read_csv(filepath)
+        df = pd.read_csv(filepath, usecols=usecols)
+        df.attrs['csv_dialect'] = {'delimiter': ',', 'encoding': 'utf-8'}
+        return df
     except Exception as e:
         raise Exception(f"No se pudo leer el archivo CSV. Intente con formato UTF-8 y delimitador de coma. Error: {str(e)}")
 
+@contextmanager
+def stage(name):
+    """Time a named stage of the current request for Server-Timing and /metrics"""
+    if not has_request_context() or 'stage_timings' not in g:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.stage_timings[name] = g.stage_timings.get(name, 0.0) + time.perf_counter() - started
+
+@app.before_request
+def start_request_timer():
+    """Start per-request stage timing"""
+    g.request_started = time.perf_counter()
+    g.stage_timings = {}
+
+@app.after_request
+def report_request_timings(response):
+    """Report stage timings in a Server-Timing header and record them as histograms"""
+    if 'request_started' not in g:
+        return response
+    
+    total = time.perf_counter() - g.request_started
+    endpoint = request.url_rule.rule if request.url_rule else 'not_found'
+    timings = g.stage_timings
+    
+    response.headers['Server-Timing'] = ', '.join(
+        [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings.items()] +
+        [f'total;dur={total * 1000:.1f}']
+    )
+    if endpoint != '/metrics':
+        metrics.observe('request_duration_seconds', total, {'endpoint': endpoint, 'status': str(response.status_code)})
+        for name, seconds in timings.items():
+            metrics.observe('request_stage_seconds', seconds, {'endpoint': endpoint, 'stage': name})
+    return response
+
+def is_profiling_admin():
+    """True when profiling is enabled and the request carries the profiling token"""
+    token = app.config['PROFILE_TOKEN']
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token)
+
+@app.before_request
+def start_profile():
+    """Run the request under cProfile when asked with ?profile=1 or X-Profile: 1"""
+    if not app.config['PROFILE_TOKEN']:
+        return None
+    if request.args.get('profile') != '1' and request.headers.get('X-Profile') != '1':
+        return None
+    if is_profiling_admin():
+        g.profiler = profiles.start()
+    return None
+
+@app.after_request
+def save_profile(response):
+    """Save the request profile and return its id in the X-Profile-Id header"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    
+    # Streamed bodies are produced after this point and are not included
+    payload = request.get_json(silent=True)
+    dataset = payload.get('filename') if isinstance(payload, dict) else request.args.get('filename')
+    try:
+        profile_id = profiles.save(profiler, {
+            'method': request.method,
+            'path': request.path,
+            'query': request.query_string.decode('utf-8', 'replace'),
+            'dataset': dataset,
+            'status': response.status_code
+        })
+        response.headers['X-Profile-Id'] = profile_id
+    except OSError as e:
+        print(f"Profile save failed: {str(e)}")
+    return response
+
+@app.before_request
+def start_memory_sampling():
+    """Trace allocations of a sampled fraction of requests"""
+    rate = app.config['MEMORY_PROFILE_RATE']
+    if rate <= 0 or random.random() >= rate or tracemalloc.is_tracing():
+        return None
+    g.rss_before = process_rss_bytes()
+    tracemalloc.start()
+    return None
+
+@app.after_request
+def record_memory_sample(response):
+    """Record peak and retained allocation and RSS growth of a sampled request"""
+    if 'rss_before' not in g:
+        return response
+    
+    # Blocks allocated before start() are not traced, so current is what the request kept.
+    # Tracing is process-wide: requests served concurrently by other threads are included
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = max(0, process_rss_bytes() - g.pop('rss_before'))
+    
+    endpoint = request.url_rule.rule if request.url_rule else 'not_found'
+    metrics.observe('request_memory_peak_bytes', peak, {'endpoint': endpoint})
+    metrics.observe('request_memory_retained_bytes', retained, {'endpoint': endpoint})
+    metrics.observe('request_rss_growth_bytes', rss_growth, {'endpoint': endpoint})
+    return response
+
+@app.teardown_request
+def stop_memory_sampling(exc):
+    """Stop tracing when an unhandled error skipped record_memory_sample"""
+    if g.pop('rss_before', None) is not None:
+        tracemalloc.stop()
+
+def is_async_request():
+    """True when the client asked for the analysis to run as a background job"""
+    if request.args.get('async', '').lower() == 'true':
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and str(data.get('async', '')).lower() == 'true'
+
+@app.before_request
+def submit_async_request():
+    """Queue async=true analysis requests as jobs instead of running them inline"""
+    if request.method != 'POST' or request.path not in ASYNC_ENDPOINTS:
+        return None
+    if request.headers.get('X-Job-Id') or not is_async_request():
+        return None
+    
+    payload = request.get_json(silent=True) or {}
+    rejection = reject_job(request.path, payload)
+    if rejection is not None:
+        return rejection
+    job_id = job_queue.submit(request.path, payload)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('get_job', job_id=job_id)
+    }), 202
+
+@app.before_request
+def admit_request():
+    """Run cheap requests inline; downgrade, queue or reject expensive ones"""
+    stream = request.path == '/comparative_analysis/stream'
+    if stream:
+        endpoint = '/comparative_analysis'
+        data = request.args.to_dict()
+    elif request.method == 'POST' and request.path in admission.ENDPOINT_COSTS:
+        endpoint = request.path
+        data = request.get_json(silent=True) or {}
+    else:
+        return None
+    if request.headers.get('X-Job-Id'):
+        return None
+    
+    admitted = admission_decision(endpoint, data)
+    if admitted is None:
+        return None  # The route reports the error
+    decision, cost, limits = admitted
+    g.admission_limits = limits
+    
+    if decision == admission.QUEUE:
+        job_id = job_queue.submit(endpoint, data)
+        body = {
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': url_for('get_job', job_id=job_id),
+            'message': f'El análisis es demasiado costoso para ejecutarse en línea (~{cost:.0f} s estimados); se ejecutará en segundo plano'
+        }
+        if stream:
+            return event_stream(iter([sse_event('queued', body)]))
+        return jsonify(body), 202
+    
+    if decision == admission.REJECT:
+        body = rejection_body(cost)
+        if stream:
+            return event_stream(iter([sse_event('analysis_error', body)]))
+        return jsonify(body), 413
+    
+    return None
+
+def admission_decision(endpoint, data):
+    """(decision, estimated cost, limits) for an analysis request, or None when its file cannot be resolved"""
+    if not isinstance(data, dict) or not isinstance(data.get('filename'), str):
+        return None
+    filepath, error = resolve_upload_path(data.get('filename'))
+    if error:
+        return None
+    
+    # The sidecar has the exact row count; the size-based estimate covers files without one
+    metadata = datasets.read_sidecar(filepath)
+    rows = metadata['rows'] if metadata else admission.estimate_rows(filepath)
+    decision, cost, limits = admission.decide(
+        endpoint, rows, data,
+        app.config['ADMISSION_BUDGET'], app.config['ADMISSION_MAX_COST']
+    )
+    metrics.inc('admission_decisions_total', {'endpoint': endpoint, 'decision': decision})
+    return decision, cost, limits
+
+def rejection_body(cost):
+    return {
+        'error': f'El análisis excede el límite de cómputo permitido (~{cost:.0f} s estimados, máximo {app.config["ADMISSION_MAX_COST"]:.0f} s). '
+                 'Reduzca el tamaño del archivo o los parámetros del análisis.'
+    }
+
+def reject_job(endpoint, params):
+    """413 response when a job would be rejected inline; running in the background does not lift the cost limit"""
+    if endpoint not in admission.ENDPOINT_COSTS:
+        return None
+    admitted = admission_decision(endpoint, params)
+    if admitted is not None and admitted[0] == admission.REJECT:
+        return jsonify(rejection_body(admitted[1])), 413
+    return None
+
+def admission_limit(name):
+    """Downgrade limit applied to the current request by admission control, if any"""
+    return getattr(g, 'admission_limits', {}).get(name)
+
 @app.route('/')
 def dashboard():
     """Dashboard welcome page for time series analysis"""
@@ -137,6 +469,8 @@ def modelo_de_serie():
 @app.route('/plot_series', methods=['POST'])
 def plot_series():
     """Generate time series plots"""
+    import plotly.graph_objects as go
+    
     try:
         data = request.get_json()
         filename = data.get('filename')
@@ -148,68 +482,72 @@ def plot_series():
             return jsonify({'error': 'Faltan parámetros requeridos'}), 400
         
         # Load the data safely
-        df, error = safe_load_file(filename)
+        df, error = safe_load_file(filename, columns=[date_column, value_column])
         if error:
             return jsonify({'error': error}), 400
         
         # Process the time series
-        df[date_column] = parse_spanish_dates(df[date_column])
-        df[date_column] = pd.to_datetime(df[date_column])
-        df = df.sort_values(date_column)
-        ts = df[[date_column, value_column]]
-        
-        # Create basic time series plot
-        fig = go.Figure()
-        
-        # Set title based on plot type
-        if plot_type == 'line':
-            fig.add_trace(go.Scatter(
-                x=ts[date_column],
-                y=ts[value_column],
-                mode='lines',
-                name='Serie de Tiempo',
-                line=dict(color='blue', width=2)
-            ))
-            title = 'Gráfico de Serie de Tiempo'
-        elif plot_type == 'scatter':
-            fig.add_trace(go.Scatter(
-                x=ts[date_column],
-                y=ts[value_column],
-                mode='markers',
-                name='Serie de Tiempo',
-                marker=dict(color='blue', size=4)
-            ))
-            title = 'Gráfico de Dispersión de Serie de Tiempo'
-        elif plot_type == 'both':
-            fig.add_trace(go.Scatter(
-                x=ts[date_column],
-                y=ts[value_column],
-                mode='lines+markers',
-                name='Serie de Tiempo',
-                line=dict(color='blue', width=2),
-                marker=dict(color='red', size=3)
-            ))
-            title = 'Gráfico de Serie de Tiempo (Línea + Puntos)'
-        else:
-            title = 'Gráfico de Serie de Tiempo'
-        
-        fig.update_layout(
-            title=title,
-            xaxis_title='Fecha',
-            yaxis_title=value_column,
-            hovermode='x unified',
-            template='plotly_white'
-        )
+        with stage('parse_dates'):
+            df[date_column] = parse_spanish_dates(df[date_column])
+            df[date_column] = pd.to_datetime(df[date_column])
+        with stage('prepare'):
+            df = df.sort_values(date_column)
+            ts = admission.downsample(df[[date_column, value_column]], admission_limit('max_points'))
+        
+        with stage('build_figure'):
+            # Create basic time series plot
+            fig = go.Figure()
+            
+            # Set title based on plot type
+            if plot_type == 'line':
+                fig.add_trace(go.Scatter(
+                    x=ts[date_column],
+                    y=ts[value_column],
+                    mode='lines',
+                    name='Serie de Tiempo',
+                    line=dict(color='blue', width=2)
+                ))
+                title = 'Gráfico de Serie de Tiempo'
+            elif plot_type == 'scatter':
+                fig.add_trace(go.Scatter(
+                    x=ts[date_column],
+                    y=ts[value_column],
+                    mode='markers',
+                    name='Serie de Tiempo',
+                    marker=dict(color='blue', size=4)
+                ))
+                title = 'Gráfico de Dispersión de Serie de Tiempo'
+            elif plot_type == 'both':
+                fig.add_trace(go.Scatter(
+                    x=ts[date_column],
+                    y=ts[value_column],
+                    mode='lines+markers',
+                    name='Serie de Tiempo',
+                    line=dict(color='blue', width=2),
+                    marker=dict(color='red', size=3)
+                ))
+                title = 'Gráfico de Serie de Tiempo (Línea + Puntos)'
+            else:
+                title = 'Gráfico de Serie de Tiempo'
+            
+            fig.update_layout(
+                title=title,
+                xaxis_title='Fecha',
+                yaxis_title=value_column,
+                hovermode='x unified',
+                template='plotly_white'
+            )
         
-        graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        graphJSON = figure_to_json(fig)
         
         return jsonify({
             'success': True,
             'plot': graphJSON,
-            'data_points': len(ts),
+            'data_points': len(df),
+            'plotted_points': len(ts),
             'date_range': {
-                'start': ts[date_column].min().strftime('%Y-%m-%d'),
-                'end': ts[date_column].max().strftime('%Y-%m-%d')
+                'start': df[date_column].min().strftime('%Y-%m-%d'),
+                'end': df[date_column].max().strftime('%Y-%m-%d')
             }
         })
         
@@ -219,79 +557,96 @@ def plot_series():
 @app.route('/plot_lag_series', methods=['POST'])
 def plot_lag_series():
     """Generate lag plots for time series"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     try:
         data = request.get_json()
         filename = data.get('filename')
         date_column = data.get('date_column')
         value_column = data.get('value_column')
-        max_lags = data.get('max_lags', 12)
         
         if not all([filename, date_column, value_column]):
             return jsonify({'error': 'Faltan parámetros requeridos'}), 400
+        try:
+            max_lags = int(data.get('max_lags', 12))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_lags debe ser un número entero'}), 400
         
-        # Load the data safely
-        df, error = safe_load_file(filename)
+        # Load and prepare the time series
+        ts, error = load_prepared_series(filename, date_column, value_column)
         if error:
             return jsonify({'error': error}), 400
         
-        # Process the time series
-        df[date_column] = parse_spanish_dates(df[date_column])
-        df[date_column] = pd.to_datetime(df[date_column])
-        df = df.sort_values(date_column)
-        df.set_index(date_column, inplace=True)
-        ts = df[value_column].dropna()
-        
-        # Create lag plots
-        n_lags = min(max_lags, len(ts) - 1)
-        
-        # Create subplots for lag plots
-        rows = (n_lags + 3) // 4  # 4 plots per row
-        fig = make_subplots(
-            rows=rows, cols=4,
-            subplot_titles=[f'Lag {i+1}' for i in range(n_lags)],
-            horizontal_spacing=0.08,
-            vertical_spacing=0.12
-        )
+        # Create lag plots (admission control may shorten the lag range)
+        n_lags = min(max_lags, admission_limit('max_lags') or max_lags, len(ts) - 1)
         
-        for lag in range(1, n_lags + 1):
-            row = ((lag - 1) // 4) + 1
-            col = ((lag - 1) % 4) + 1
+        with stage('build_figure'):
+            # Create subplots for lag plots
+            rows = (n_lags + 3) // 4  # 4 plots per row
+            fig = make_subplots(
+                rows=rows, cols=4,
+                subplot_titles=[f'Lag {i+1}' for i in range(n_lags)],
+                horizontal_spacing=0.08,
+                vertical_spacing=0.12
+            )
             
-            # Create lagged series
-            ts_lag = ts.shift(lag)
+            for lag in range(1, n_lags + 1):
+                row = ((lag - 1) // 4) + 1
+                col = ((lag - 1) % 4) + 1
+                
+                # Create lagged series
+                ts_lag = ts.shift(lag)
+                
+                # Remove NaN values for plotting
+                mask = ~(ts.isna() | ts_lag.isna())
+                x_vals = ts_lag[mask]
+                y_vals = ts[mask]
+                
+                fig.add_trace(go.Scatter(
+                    x=x_vals,
+                    y=y_vals,
+                    mode='markers',
+                    name=f'Lag {lag}',
+                    marker=dict(size=4, opacity=0.6),
+                    showlegend=False
+                ), row=row, col=col)
             
-            # Remove NaN values for plotting
-            mask = ~(ts.isna() | ts_lag.isna())
-            x_vals = ts_lag[mask]
-            y_vals = ts[mask]
+            fig.update_layout(
+                title=f'Gráficos de Series Retardadas (Lags 1-{n_lags})',
+                height=300 * rows,
+                template='plotly_white'
+            )
             
-            fig.add_trace(go.Scatter(
-                x=x_vals,
-                y=y_vals,
-                mode='markers',
-                name=f'Lag {lag}',
-                marker=dict(size=4, opacity=0.6),
-                showlegend=False
-            ), row=row, col=col)
+            # Update all axes
+            fig.update_xaxes(title_text='Valor t-k')
+            fig.update_yaxes(title_text='Valor t')
         
-        fig.update_layout(
-            title=f'Gráficos de Series Retardadas (Lags 1-{n_lags})',
-            height=300 * rows,
-            template='plotly_white'
-        )
+        graphJSON = figure_to_json(fig)
         
-        # Update all axes
-        fig.update_xaxes(title_text='Valor t-k')
-        fig.update_yaxes(title_text='Valor t')
+        autocorrs, autocorr_graphJSON = build_autocorrelation(ts, n_lags)
         
-        graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        return jsonify({
+            'success': True,
+            'lag_plot': graphJSON,
+            'autocorr_plot': autocorr_graphJSON,
+            'autocorrelations': autocorrs,
+            'n_lags': n_lags
+        })
         
-        # Also create autocorrelation plot
+    except Exception as e:
+        return jsonify({'error': f'Error en gráficos retardados: {str(e)}'}), 500
+
+def build_autocorrelation(ts, n_lags):
+    """Autocorrelations for lags 1..n_lags and their bar chart as JSON"""
+    import plotly.graph_objects as go
+    
+    # Calculate autocorrelations
+    autocorrs = [ts.autocorr(lag=lag) for lag in range(1, n_lags + 1)]
+    
+    with stage('build_figure'):
         autocorr_fig = go.Figure()
         
-        # Calculate autocorrelations
-        autocorrs = [ts.autocorr(lag=lag) for lag in range(1, n_lags + 1)]
-        
         autocorr_fig.add_trace(go.Bar(
             x=list(range(1, n_lags + 1)),
             y=autocorrs,
@@ -305,19 +660,8 @@ def plot_lag_series():
             yaxis_title='Autocorrelación',
             template='plotly_white'
         )
-        
-        autocorr_graphJSON = json.dumps(autocorr_fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        return jsonify({
-            'success': True,
-            'lag_plot': graphJSON,
-            'autocorr_plot': autocorr_graphJSON,
-            'autocorrelations': autocorrs,
-            'n_lags': n_lags
-        })
-        
-    except Exception as e:
-        return jsonify({'error': f'Error en gráficos retardados: {str(e)}'}), 500
+    
+    return autocorrs, figure_to_json(autocorr_fig)
 
 @app.route('/get_data_table', methods=['POST'])
 def get_data_table():
@@ -329,71 +673,487 @@ def get_data_table():
         if not filename:
             return jsonify({'error': 'Nombre de archivo requerido'}), 400
         
-        # Load the data safely
-        df, error = safe_load_file(filename)
+        # Paging, sorting and filtering run against the columnar copy
+        if any(data.get(param) not in (None, '', False) for param in TABLE_QUERY_PARAMS):
+            return query_data_table(filename, data)
+        
+        # Answered from the metadata sidecar; the file is only parsed if it is missing or stale
+        metadata, error = file_metadata(filename)
         if error:
             return jsonify({'error': error}), 400
         
         return jsonify({
             'success': True,
-            'columns': df.columns.tolist(),
-            'data': df.head(100).to_dict('records'),  # First 100 rows
-            'total_rows': len(df),
-            'dtypes': df.dtypes.astype(str).to_dict()
+            'columns': metadata['columns'],
+            'data': metadata['head'],  # First 100 rows
+            'total_rows': metadata['rows'],
+            'dtypes': metadata['dtypes']
         })
         
     except Exception as e:
         return jsonify({'error': f'Error al cargar tabla: {str(e)}'}), 500
 
+# get_data_table parameters that switch from the sidecar sample to a table query
+TABLE_QUERY_PARAMS = ('offset', 'limit', 'cursor', 'sort_by', 'sort_order',
+                      'date_from', 'date_to', 'min_value', 'max_value', 'nulls_only')
+
+def query_data_table(filename, data):
+    """One page of the table with optional sort and filters (date range, value range, rows with nulls)"""
+    table, meta, error = attach_table(filename)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    version = dataset_key(filename)[:16]
+    columns = meta['columns']
+    try:
+        limit = max(1, min(int(data.get('limit') or 100), 1000))
+        offset = max(0, int(data.get('offset') or 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit y offset deben ser números enteros'}), 400
+    if data.get('cursor'):
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(str(data['cursor']).encode('ascii')))
+            offset = int(cursor['offset'])
+        except (ValueError, KeyError, TypeError):
+            return jsonify({'error': 'Cursor no válido'}), 400
+        if cursor.get('version') != version:
+            return jsonify({'error': 'El archivo cambió; vuelva a la primera página'}), 409
+    
+    date_column = meta.get('date_column')
+    value_column = data.get('value_column') or meta.get('value_column')
+    has_date_filter = data.get('date_from') or data.get('date_to')
+    has_value_filter = data.get('min_value') not in (None, '') or data.get('max_value') not in (None, '')
+    if has_date_filter and 'dates' not in table:
+        return jsonify({'error': 'No se detectó una columna de fecha para filtrar'}), 400
+    if has_value_filter and value_column not in columns:
+        return jsonify({'error': 'Columna de valores no encontrada'}), 400
+    
+    # Sort key: the parsed dates for the date column (chronological), else the raw column
+    sort_by = data.get('sort_by') or (date_column if has_date_filter else None)
+    if sort_by is not None and sort_by not in columns:
+        return jsonify({'error': 'Columna de ordenamiento no encontrada'}), 400
+    sort_key = None
+    if sort_by is not None:
+        sort_key = 'dates' if sort_by == date_column and 'dates' in table else f'c{columns.index(sort_by)}'
+    
+    sort_range = None
+    masks = []
+    if has_date_filter:
+        try:
+            low = pd.Timestamp(data['date_from']).value if data.get('date_from') else None
+            high = pd.Timestamp(data['date_to']).value if data.get('date_to') else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Fechas de filtro no válidas'}), 400
+        if sort_key == 'dates':
+            sort_range = (low, high)
+        else:
+            dates = table['dates']
+            masks.append((dates != datasets.NAT) & (dates >= (low if low is not None else datasets.NAT + 1))
+                         & (dates <= (high if high is not None else np.iinfo('int64').max)))
+    if has_value_filter:
+        key = f'c{columns.index(value_column)}'
+        try:
+            low = float(data['min_value']) if data.get('min_value') not in (None, '') else None
+            high = float(data['max_value']) if data.get('max_value') not in (None, '') else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'min_value y max_value deben ser números'}), 400
+        if meta['kinds'][columns.index(value_column)] == 'str':
+            return jsonify({'error': 'La columna de valores no es numérica'}), 400
+        if sort_key == key and sort_range is None:
+            sort_range = (low, high)
+        else:
+            values = table[key]
+            mask = ~table[f'n{columns.index(value_column)}']
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+            masks.append(mask)
+    if str(data.get('nulls_only', '')).lower() == 'true':
+        masks.append(table['any_null'])
+    
+    sort_index = attach_sort_index(filename, version, table, sort_key) if sort_key else None
+    descending = str(data.get('sort_order', 'asc')).lower() == 'desc'
+    with stage('query'):
+        indices, matching = datasets.query_rows(table, sort_index, sort_range, masks, descending, offset, limit)
+        rows = datasets.rows_to_records(table, meta, indices)
+    
+    next_offset = offset + len(rows)
+    next_cursor = None
+    if next_offset < matching:
+        next_cursor = base64.urlsafe_b64encode(
+            json.dumps({'offset': next_offset, 'version': version}).encode('utf-8')
+        ).decode('ascii')
+    
+    return jsonify({
+        'success': True,
+        'columns': columns,
+        'data': rows,
+        'total_rows': meta['rows'],
+        'matching_rows': matching,
+        'offset': offset,
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'dtypes': meta['dtypes']
+    })
+
+def attach_table(filename):
+    """Return (arrays, meta, error) for the columnar copy of a file, building it on first use"""
+    fingerprint = dataset_key(filename)
+    if fingerprint is None:
+        _, error = resolve_upload_path(filename)
+        return None, None, error
+    dataset = secure_filename(os.path.basename(filename))
+    
+    table, meta = shared_arrays.attach(dataset, fingerprint[:16], 'table')
+    if table is not None:
+        return table, meta, None
+    
+    df, error = safe_load_file(filename)
+    if error:
+        return None, None, error
+    metadata, error = file_metadata(filename, df)
+    if error:
+        return None, None, error
+    
+    dates = None
+    date_column = metadata.get('date_column')
+    if date_column in df.columns:
+        with stage('parse_dates'):
+            parsed = pd.to_datetime(parse_spanish_dates(df[date_column].copy()), errors='coerce')
+            dates = parsed.to_numpy(dtype='datetime64[ns]').view('int64')
+    
+    with stage('prepare'):
+        arrays, meta = datasets.build_table_arrays(df, dates)
+        meta.update({'date_column': date_column, 'value_column': metadata.get('value_column'),
+                     'dtypes': metadata['dtypes']})
+        table, meta = shared_arrays.publish(dataset, fingerprint[:16], 'table', arrays, meta)
+    if table is None:
+        return None, None, 'No se pudo preparar la tabla'
+    return table, meta, None
+
+def attach_sort_index(filename, version, table, key):
+    """Sort index of a table column ('c<i>' or 'dates'), built and shared on first use"""
+    dataset = secure_filename(os.path.basename(filename))
+    entry = f'table-sort-{key}'
+    index, _ = shared_arrays.attach(dataset, version, entry)
+    if index is None:
+        nulls = table.get('n' + key[1:]) if key.startswith('c') else None
+        with stage('prepare'):
+            index, _ = shared_arrays.publish(dataset, version, entry,
+                                             datasets.build_sort_index(np.asarray(table[key]), nulls))
+    return index
+
 @app.route('/upload_data', methods=['POST'])
 def upload_data():
-    """Handle file upload for time series data"""
+    """
+    Handle file upload for time series data.
+    CSV and TXT files are parsed while they are received (see ingest.py), so
+    large uploads are never held in memory or read twice. The file can be
+    sent as multipart form data (field 'file') or as the raw request body
+    with ?filename=.
+    """
+    # Uploads have their own size limit; MAX_CONTENT_LENGTH still applies to every other request
+    request.max_content_length = app.config['UPLOAD_MAX_BYTES']
+    sinks = []
+    
+    def open_sink(filename):
+        if not filename:
+            raise ingest.IngestError('No se seleccionó ningún archivo')
+        if sinks:
+            raise ingest.IngestError('Solo se puede subir un archivo por solicitud')
+        filename = secure_filename(filename)
+        if not allowed_file(filename):
+            raise ingest.IngestError('Formato de archivo no permitido. Formatos soportados: CSV, Excel (.xlsx, .xls), TXT (MS-DOS), comprimidos con gzip, bz2, xz, zstd o zip')
+        inner_name, compression = ingest.split_compression(filename)
+        if compression == 'zstd' and not ingest.zstd_available():
+            raise ingest.IngestError('La compresión zstd no está disponible en el servidor')
+        sinks.append(ingest.StreamingIngest(
+            os.path.join(app.config['UPLOAD_FOLDER'], filename),
+            max_bytes=app.config['UPLOAD_MAX_BYTES'],
+            # MS-DOS .txt exports are latin-1, as in safe_load_file (zip members are checked when read)
+            encoding='latin-1' if inner_name.endswith('.txt') else None,
+            parse=compression == 'zip' or inner_name.endswith(ingest.TEXT_EXTENSIONS),
+            detect_columns=detect_series_columns,
+            parse_dates=parse_upload_dates,
+            compression=compression,
+            max_expanded_bytes=app.config['UPLOAD_MAX_EXPANDED_BYTES']
+        ))
+        return sinks[0]
+    
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
-        
-        file = request.files['file']
-        if not file or file.filename == '':
-            return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
-        
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
+        with stage('load'):
+            if request.mimetype == 'multipart/form-data':
+                parser = FormDataParser(
+                    stream_factory=lambda total_content_length, content_type, filename, content_length=None: open_sink(filename),
+                    max_content_length=app.config['UPLOAD_MAX_BYTES'],
+                    silent=False
+                )
+                _, form, _ = parser.parse(request.stream, request.mimetype, request.content_length, request.mimetype_params)
+            else:
+                form = request.args
+                sink = open_sink(request.args.get('filename'))
+                for chunk in iter(lambda: request.stream.read(1024 * 1024), b''):
+                    sink.write(chunk)
             
-            # Read and process the file
-            try:
-                if filename.endswith('.csv'):
-                    # Auto-detect delimiter for CSV files
-                    df = read_csv_with_auto_delimiter(filepath)
-                elif filename.endswith(('.xlsx', '.xls')):
-                    df = pd.read_excel(filepath)
-                elif filename.endswith('.txt'):
-                    # Try different separators for MS-DOS .txt files
-                    df = read_csv_with_auto_delimiter(filepath, encoding='latin-1')
-                else:
-                    return jsonify({'error': 'Formato de archivo no soportado'}), 400
-                
-                # Basic validation
-                if len(df.columns) < 2:
-                    return jsonify({'error': 'El archivo debe tener al menos 2 columnas (fecha y valor)'}), 400
-                
-                return jsonify({
-                    'success': True,
-                    'filename': filename,
-                    'columns': df.columns.tolist(),
-                    'rows': len(df),
-                    'sample_data': df.head().to_dict('records')
-                })
-                
-            except Exception as e:
-                return jsonify({'error': f'Error al procesar el archivo: {str(e)}'}), 400
+            if not sinks:
+                return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
+            metadata = sinks[0].finish()
+        
+        filepath = sinks[0].path
+        filename = os.path.basename(filepath)
+        signature = datasets.source_signature(filepath)
+        
+        # Previous shared arrays for this name belong to the old contents
+        shared_arrays.release(filename)
+        
+        def discard(message):
+            # Rejected after it was saved: remove it like a rejected stream
+            os.remove(filepath)
+            datasets.remove_sidecar(filepath)
+            return jsonify({'error': message}), 400
+        
+        if metadata is None:
+            # Excel, or text the streaming parser could not describe: parse the saved file.
+            # A workbook is read once here, from the sheet given in the form (default: the first)
+            sheets = excel_sheets(filepath)
+            sheet = None
+            if sheets:
+                sheet = form.get('sheet') or sheets[0]
+                if sheet not in sheets:
+                    return discard(f"Hoja no encontrada. Hojas disponibles: {', '.join(sheets)}")
+            df, error = safe_load_file(filename, sheet=sheet)
+            if error:
+                return discard(f'Error al procesar el archivo: {error}')
+            if len(df.columns) < 2:
+                return discard('El archivo debe tener al menos 2 columnas (fecha y valor)')
+            metadata = build_file_metadata(df)
+            if sheets:
+                metadata.update({'sheets': sheets, 'sheet': sheet})
+        
+        # Describe the file once so info and table requests do not parse it again
+        try:
+            datasets.write_sidecar(filepath, metadata, signature)
+        except Exception as e:
+            print(f"Metadata sidecar failed for {filename}: {str(e)}")
         
-        return jsonify({'error': 'Formato de archivo no permitido. Formatos soportados: CSV, Excel (.xlsx, .xls), TXT (MS-DOS)'}), 400
+        response = {
+            'success': True,
+            'filename': filename,
+            'columns': metadata['columns'],
+            'rows': metadata['rows'],
+            'sample_data': metadata['head'][:5]
+        }
+        if metadata.get('sheets'):
+            response.update({'sheets': metadata['sheets'], 'sheet': metadata['sheet']})
+        
+        # Prepare what the next requests usually need on the job runner
+        precompute = form.get('precompute', str(app.config['PRECOMPUTE_ON_UPLOAD']))
+        if precompute.lower() == 'true':
+            response['precompute_job_id'] = job_queue.submit('/precompute', {'filename': filename})
         
+        return jsonify(response)
+    
+    except ingest.IngestError as e:
+        for sink in sinks:
+            sink.abort()
+        return jsonify({'error': str(e)}), e.status
+    except RequestEntityTooLarge:
+        for sink in sinks:
+            sink.abort()
+        return jsonify({'error': f"El archivo supera el tamaño máximo permitido ({app.config['UPLOAD_MAX_BYTES'] // (1024 * 1024)} MB)"}), 413
     except Exception as e:
+        for sink in sinks:
+            sink.abort()
         return jsonify({'error': f'Error en la carga: {str(e)}'}), 500
 
+@app.route('/select_sheet', methods=['POST'])
+def select_sheet():
+    """Switch the worksheet an uploaded workbook is analyzed from"""
+    try:
+        data = request.get_json()
+        filename = data.get('filename')
+        sheet = data.get('sheet')
+        
+        if not all([filename, sheet]):
+            return jsonify({'error': 'Faltan parámetros requeridos'}), 400
+        
+        filepath, error = resolve_upload_path(filename)
+        if error:
+            return jsonify({'error': error}), 400
+        sheets = excel_sheets(filepath)
+        if not sheets:
+            return jsonify({'error': 'El archivo no es un libro de Excel'}), 400
+        if sheet not in sheets:
+            return jsonify({'error': f"Hoja no encontrada. Hojas disponibles: {', '.join(sheets)}"}), 400
+        
+        # Cached artifacts are keyed by the file's modification time: touching it
+        # gives the new sheet a fresh version instead of the old sheet's results
+        os.utime(filepath)
+        signature = datasets.source_signature(filepath)
+        shared_arrays.release(os.path.basename(filepath))
+        
+        df, error = safe_load_file(filename, sheet=sheet)
+        if error:
+            return jsonify({'error': error}), 400
+        metadata = build_file_metadata(df)
+        metadata.update({'sheets': sheets, 'sheet': sheet})
+        datasets.write_sidecar(filepath, metadata, signature)
+        
+        return jsonify({
+            'success': True,
+            'filename': os.path.basename(filepath),
+            'sheet': sheet,
+            'columns': metadata['columns'],
+            'rows': metadata['rows'],
+            'sample_data': metadata['head'][:5]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Error al cambiar de hoja: {str(e)}'}), 500
+
+@app.route('/append_data', methods=['POST'])
+def append_data():
+    """
+    Append rows to an uploaded CSV or TXT file.
+    The rows (JSON objects keyed by column) must have increasing dates later
+    than the file's last date. Instead of invalidating everything like a
+    re-upload, the metadata sidecar, the cached prepared series and the
+    smoothing states of the file are advanced over the new rows only.
+    """
+    try:
+        data = request.get_json()
+        filename = data.get('filename')
+        rows = data.get('rows')
+        refit = str(data.get('refit', '')).lower() == 'true'
+        
+        if not filename or not rows or not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': 'Faltan parámetros requeridos (filename y rows)'}), 400
+        
+        filepath, error = resolve_upload_path(filename)
+        if error:
+            return jsonify({'error': error}), 400
+        filename = os.path.basename(filepath)
+        if ingest.source_name(filepath) != filename or not filename.endswith(ingest.TEXT_EXTENSIONS):
+            return jsonify({'error': 'Solo se pueden agregar filas a archivos CSV o TXT sin comprimir'}), 400
+        
+        # Appends to one file are serialized across workers
+        os.makedirs(os.path.join(app.config['RESULT_STORE_DIR'], 'locks'), exist_ok=True)
+        with open(os.path.join(app.config['RESULT_STORE_DIR'], 'locks', f'append-{filename}.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return append_rows(filename, filepath, rows, data.get('date_column'), refit)
+        
+    except Exception as e:
+        return jsonify({'error': f'Error al agregar filas: {str(e)}'}), 500
+
+def append_rows(filename, filepath, rows, date_column, refit):
+    """Validate and append rows to filepath, then advance its cached state; returns the response"""
+    metadata, error = file_metadata(filename)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    unknown = [str(column) for column in pd.DataFrame(rows).columns if column not in metadata['columns']]
+    if unknown:
+        return jsonify({'error': f'Columnas desconocidas: {", ".join(unknown)}'}), 400
+    new = pd.DataFrame(rows, columns=metadata['columns'])
+    
+    # Numeric columns take numbers, or text in the file's number format; they are
+    # written back as numbers so the file reads them as before
+    number_format = metadata.get('number_format')
+    for column in metadata['columns']:
+        if not (metadata['dtypes'][column].startswith(('int', 'float'))
+                or column in (number_format or {}).get('columns', [])):
+            continue
+        given = [row.get(column) for row in rows]
+        values = numeric.parse_values(given, number_format)
+        missing = pd.Series([value is None or (isinstance(value, str) and not value.strip()) for value in given])
+        invalid = values.isna() & ~missing
+        if invalid.any():
+            return jsonify({'error': f'Valor no numérico en la columna {column}: {given[invalid.idxmax()]}'}), 400
+        if metadata['dtypes'][column].startswith('int') and not missing.any() and (values % 1 == 0).all():
+            values = values.astype(np.int64)
+        new[column] = values
+    
+    date_column = date_column or metadata['date_column']
+    if date_column not in metadata['columns']:
+        return jsonify({'error': 'No se encontró la columna de fecha'}), 400
+    with stage('parse_dates'):
+        dates = pd.to_datetime(parse_spanish_dates(new[date_column].copy()), errors='coerce')
+    if dates.isna().any():
+        return jsonify({'error': f'Fechas no válidas en las filas nuevas: {new[date_column][dates.isna()].iloc[0]}'}), 400
+    if not dates.is_monotonic_increasing or dates.duplicated().any():
+        return jsonify({'error': 'Las fechas de las filas nuevas deben ser estrictamente crecientes'}), 400
+    
+    if date_column == metadata['date_column'] and metadata.get('date_range'):
+        last_date = pd.Timestamp(metadata['date_range']['end'])
+    else:
+        df, error = safe_load_file(filename, columns=[date_column])
+        if error:
+            return jsonify({'error': error}), 400
+        last_date = pd.to_datetime(parse_spanish_dates(df[date_column].copy()), errors='coerce').max()
+    if pd.notna(last_date) and dates.iloc[0] <= last_date:
+        return jsonify({'error': f'Las fechas nuevas deben ser posteriores a la última fecha del archivo ({last_date.isoformat()})'}), 400
+    
+    # Write the rows in the file's dialect and number format
+    dialect = metadata['dialect']
+    with open(filepath, 'rb') as fh:
+        fh.seek(max(0, os.path.getsize(filepath) - 2))
+        tail = fh.read()
+    newline = '\r\n' if tail.endswith(b'\r\n') else '\n'
+    text = new.to_csv(sep=dialect['delimiter'], header=False, index=False, lineterminator=newline,
+                      decimal=number_format['decimal'] if number_format else '.')
+    if tail and not tail.endswith(b'\n'):
+        text = newline + text
+    
+    old_fingerprint = dataset_key(filename)
+    with open(filepath, 'ab') as fh:
+        fh.write(text.encode(dialect.get('encoding') or 'utf-8'))
+        fh.flush()
+        os.fsync(fh.fileno())
+    signature = datasets.source_signature(filepath)
+    fingerprint = dataset_key(filename)
+    
+    # Describe the new rows as a full read would and fold them into the sidecar
+    appended = pd.read_csv(io.StringIO(text), sep=dialect['delimiter'], header=None, names=metadata['columns'])
+    if number_format:
+        appended = numeric.apply_format(appended, number_format)
+    metadata = datasets.merge_descriptions(metadata, datasets.describe_frame(appended))
+    if date_column == metadata['date_column']:
+        start = metadata['date_range']['start'] if metadata.get('date_range') else dates.iloc[0].isoformat()
+        metadata['date_range'] = {'start': start, 'end': dates.iloc[-1].isoformat()}
+    datasets.write_sidecar(filepath, metadata, signature)
+    
+    # Extend the prepared series of this file cached under the previous version
+    # (those of recently used selections; others are rebuilt when requested)
+    series_updated = models_advanced = models_dropped = 0
+    for name, series_date, series_value in result_store.get(RECENT_SERIES_KEY) or []:
+        if name != filename or series_date != date_column:
+            continue
+        ts = cached_prepared_series(filename, old_fingerprint, series_date, series_value)
+        if ts is None:
+            continue
+        points = pd.Series(appended[series_value].values, index=pd.DatetimeIndex(dates.values, name=ts.index.name),
+                           name=ts.name).dropna()
+        with stage('prepare'):
+            store_prepared_series(filename, fingerprint, series_date, series_value, pd.concat([ts, points]))
+        series_updated += 1
+        with stage('fit'):
+            advanced, dropped = advance_smoothing_models((filename, series_date, series_value), old_fingerprint,
+                                                         fingerprint, len(ts), points.values, refit)
+        models_advanced += advanced
+        models_dropped += dropped
+    
+    return jsonify({
+        'success': True,
+        'filename': filename,
+        'appended': len(new),
+        'rows': metadata['rows'],
+        'date_range': metadata.get('date_range'),
+        'series_updated': series_updated,
+        'models_advanced': models_advanced,
+        'models_refit': models_dropped
+    })
+
 @app.route('/analyze_series', methods=['POST'])
 def analyze_series():
     """Analyze time series to determine if it's additive or multiplicative"""
@@ -406,94 +1166,23 @@ def analyze_series():
         if not all([filename, date_column, value_column]):
             return jsonify({'error': 'Faltan parámetros requeridos'}), 400
         
-        # Load the data safely
-        df, error = safe_load_file(filename)
+        # Load and prepare the time series (cached per file and columns)
+        ts, error = load_prepared_series(filename, date_column, value_column)
         if error:
             return jsonify({'error': error}), 400
         
-        # Process the time series
-        df[date_column] = parse_spanish_dates(df[date_column])
-        df[date_column] = pd.to_datetime(df[date_column])
-        df = df.sort_values(date_column)
-        df.set_index(date_column, inplace=True)
-        
         # Ensure we have enough data points
-        if len(df) < 24:  # Minimum for seasonal decomposition
+        if len(ts) < 24:  # Minimum for seasonal decomposition
             return jsonify({'error': 'Se necesitan al menos 24 puntos de datos para la descomposición'}), 400
         
-        # Perform decomposition analysis
-        ts = df[value_column].dropna()
-        
         # Try both additive and multiplicative decomposition
         try:
-            decomp_add = seasonal_decompose(ts, model='additive', period=12)
-            decomp_mult = seasonal_decompose(ts, model='multiplicative', period=12)
-            
-            # Calculate variance ratios to determine model type
-            add_residual_var = np.var(decomp_add.resid.dropna())
-            mult_residual_var = np.var(decomp_mult.resid.dropna())
-            
-            # Determine model type based on residual variance
-            is_additive = add_residual_var < mult_residual_var
-            model_type = 'additive' if is_additive else 'multiplicative'
-            
-            # Create visualization
-            fig = make_subplots(
-                rows=4, cols=1,
-                subplot_titles=('Serie Original', 'Tendencia', 'Estacionalidad', 'Residuos'),
-                vertical_spacing=0.08
+            result = cached_artifact(
+                'decomposition', filename,
+                {'date_column': date_column, 'value_column': value_column},
+                lambda: build_decomposition(ts)
             )
-            
-            decomp = decomp_add if is_additive else decomp_mult
-            
-            # Original series
-            fig.add_trace(go.Scatter(
-                x=ts.index, y=ts.values,
-                mode='lines', name='Original',
-                line=dict(color='blue')
-            ), row=1, col=1)
-            
-            # Trend
-            fig.add_trace(go.Scatter(
-                x=decomp.trend.index, y=decomp.trend.values,
-                mode='lines', name='Tendencia',
-                line=dict(color='red')
-            ), row=2, col=1)
-            
-            # Seasonal
-            fig.add_trace(go.Scatter(
-                x=decomp.seasonal.index, y=decomp.seasonal.values,
-                mode='lines', name='Estacionalidad',
-                line=dict(color='green')
-            ), row=3, col=1)
-            
-            # Residuals
-            fig.add_trace(go.Scatter(
-                x=decomp.resid.index, y=decomp.resid.values,
-                mode='lines', name='Residuos',
-                line=dict(color='orange')
-            ), row=4, col=1)
-            
-            fig.update_layout(
-                height=800,
-                title_text=f"Descomposición de Series de Tiempo - Modelo {model_type.capitalize()}",
-                showlegend=False
-            )
-            
-            # Convert to JSON
-            graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-            
-            return jsonify({
-                'success': True,
-                'model_type': model_type,
-                'is_additive': bool(is_additive),
-                'explanation': get_model_explanation(is_additive),
-                'plot': graphJSON,
-                'residual_variance': {
-                    'additive': float(add_residual_var),
-                    'multiplicative': float(mult_residual_var)
-                }
-            })
+            return jsonify(result)
             
         except Exception as e:
             return jsonify({'error': f'Error en la descomposición: {str(e)}'}), 400
@@ -501,6 +1190,96 @@ def analyze_series():
     except Exception as e:
         return jsonify({'error': f'Error en el análisis: {str(e)}'}), 500
 
+def decompose_series(ts):
+    """
+    Additive and multiplicative seasonal decompositions of the series (trend,
+    seasonal and residual components) and the model whose residuals vary least
+    """
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    
+    with stage('fit'):
+        decomp_add = seasonal_decompose(ts, model='additive', period=12)
+        decomp_mult = seasonal_decompose(ts, model='multiplicative', period=12)
+    
+    # Calculate variance ratios to determine model type
+    add_residual_var = np.var(decomp_add.resid.dropna())
+    mult_residual_var = np.var(decomp_mult.resid.dropna())
+    
+    # Determine model type based on residual variance
+    is_additive = add_residual_var < mult_residual_var
+    return {
+        'additive': decomp_add,
+        'multiplicative': decomp_mult,
+        'is_additive': is_additive,
+        'model_type': 'additive' if is_additive else 'multiplicative',
+        'residual_variance': {'additive': float(add_residual_var), 'multiplicative': float(mult_residual_var)}
+    }
+
+def build_decomposition(ts, decomposition=None):
+    """Decompose the series (unless given decompose_series' result) and plot the chosen model"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    decomposition = decomposition or decompose_series(ts)
+    is_additive = decomposition['is_additive']
+    model_type = decomposition['model_type']
+    
+    with stage('build_figure'):
+        # Create visualization
+        fig = make_subplots(
+            rows=4, cols=1,
+            subplot_titles=('Serie Original', 'Tendencia', 'Estacionalidad', 'Residuos'),
+            vertical_spacing=0.08
+        )
+        
+        decomp = decomposition[model_type]
+        
+        # Original series
+        fig.add_trace(go.Scatter(
+            x=ts.index, y=ts.values,
+            mode='lines', name='Original',
+            line=dict(color='blue')
+        ), row=1, col=1)
+        
+        # Trend
+        fig.add_trace(go.Scatter(
+            x=decomp.trend.index, y=decomp.trend.values,
+            mode='lines', name='Tendencia',
+            line=dict(color='red')
+        ), row=2, col=1)
+        
+        # Seasonal
+        fig.add_trace(go.Scatter(
+            x=decomp.seasonal.index, y=decomp.seasonal.values,
+            mode='lines', name='Estacionalidad',
+            line=dict(color='green')
+        ), row=3, col=1)
+        
+        # Residuals
+        fig.add_trace(go.Scatter(
+            x=decomp.resid.index, y=decomp.resid.values,
+            mode='lines', name='Residuos',
+            line=dict(color='orange')
+        ), row=4, col=1)
+        
+        fig.update_layout(
+            height=800,
+            title_text=f"Descomposición de Series de Tiempo - Modelo {model_type.capitalize()}",
+            showlegend=False
+        )
+    
+    # Convert to JSON
+    graphJSON = figure_to_json(fig)
+    
+    return {
+        'success': True,
+        'model_type': model_type,
+        'is_additive': bool(is_additive),
+        'explanation': get_model_explanation(is_additive),
+        'plot': graphJSON,
+        'residual_variance': decomposition['residual_variance']
+    }
+
 @app.route('/holt_winters_forecast', methods=['POST'])
 def holt_winters_forecast():
     """Apply Holt-Winters forecasting"""
@@ -510,35 +1289,42 @@ def holt_winters_forecast():
         date_column = data.get('date_column')
         value_column = data.get('value_column')
         model_type = data.get('model_type', 'additive')
-        periods = data.get('periods', 12)
+        try:
+            periods = int(data.get('periods', 12))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'periods debe ser un número entero'}), 400
         
         # Load and process data safely
-        df, error = safe_load_file(filename)
+        ts, error = load_prepared_series(filename, date_column, value_column)
         if error:
             return jsonify({'error': error}), 400
         
-        df[date_column] = parse_spanish_dates(df[date_column])
-        df[date_column] = pd.to_datetime(df[date_column])
-        df = df.sort_values(date_column)
-        df.set_index(date_column, inplace=True)
-        ts = df[value_column].dropna()
-        
-        # Apply Holt-Winters
-        trend = 'add' if model_type == 'additive' else 'mul'
-        seasonal = 'add' if model_type == 'additive' else 'mul'
-        
-        model = ExponentialSmoothing(
-            ts, 
-            trend=trend, 
-            seasonal=seasonal, 
-            seasonal_periods=12
+        result = cached_artifact(
+            'holt_winters_forecast', filename,
+            {'date_column': date_column, 'value_column': value_column,
+             'model_type': model_type, 'periods': periods},
+            lambda: build_holt_winters_forecast(ts, model_type, periods, (filename, date_column, value_column))
         )
-        fitted_model = model.fit()
-        
-        # Generate forecast
-        forecast = fitted_model.forecast(periods)
-        fitted_values = fitted_model.fittedvalues
+        return jsonify(result)
         
+    except Exception as e:
+        return jsonify({'error': f'Error en el pronóstico: {str(e)}'}), 500
+
+def build_holt_winters_forecast(ts, model_type, periods, series=None):
+    """Fit Holt-Winters on the series (or reuse its smoothing state) and build the forecast payload"""
+    import plotly.graph_objects as go
+    
+    # Apply Holt-Winters
+    trend = 'add' if model_type == 'additive' else 'mul'
+    seasonal = 'add' if model_type == 'additive' else 'mul'
+    
+    state = fitted_smoothing(ts, series, trend=trend, seasonal=seasonal, seasonal_periods=12)
+    
+    # Generate forecast
+    forecast = smoothing.forecast(state, periods)
+    fitted_values = pd.Series(state['fitted'], index=ts.index)
+    
+    with stage('build_figure'):
         # Create forecast visualization
         fig = go.Figure()
         
@@ -569,7 +1355,7 @@ def holt_winters_forecast():
         
         fig.add_trace(go.Scatter(
             x=forecast_dates,
-            y=forecast.values,
+            y=forecast,
             mode='lines+markers',
             name='Pronóstico',
             line=dict(color='green')
@@ -581,40 +1367,104 @@ def holt_winters_forecast():
             yaxis_title='Valor',
             hovermode='x unified'
         )
-        
-        graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
-        
-        # Calculate metrics
-        mse = np.mean((ts - fitted_values) ** 2)
-        mae = np.mean(np.abs(ts - fitted_values))
-        
-        return jsonify({
-            'success': True,
-            'plot': graphJSON,
-            'forecast_values': forecast.tolist(),
-            'forecast_dates': forecast_dates.strftime('%Y-%m-%d').tolist(),
-            'metrics': {
-                'mse': float(mse),
-                'mae': float(mae),
-                'rmse': float(np.sqrt(mse))
-            },
-            'model_params': {
-                'alpha': fitted_model.params['smoothing_level'],
-                'beta': fitted_model.params.get('smoothing_trend', None),
-                'gamma': fitted_model.params.get('smoothing_seasonal', None)
-            }
-        })
-        
-    except Exception as e:
-        return jsonify({'error': f'Error en el pronóstico: {str(e)}'}), 500
+    
+    graphJSON = figure_to_json(fig)
+    
+    # Calculate metrics
+    mse = np.mean((ts - fitted_values) ** 2)
+    mae = np.mean(np.abs(ts - fitted_values))
+    
+    result = {
+        'success': True,
+        'plot': graphJSON,
+        'forecast_values': forecast.tolist(),
+        'forecast_dates': forecast_dates.strftime('%Y-%m-%d').tolist(),
+        'metrics': {
+            'mse': float(mse),
+            'mae': float(mae),
+            'rmse': float(np.sqrt(mse))
+        },
+        'model_params': {
+            'alpha': state['params']['alpha'],
+            'beta': state['params']['beta'],
+            'gamma': state['params']['gamma']
+        }
+    }
+    if series:
+        # Keep the fitted model servable from /forecast/<model_id>
+        result['model_id'] = save_forecast_model(series, model_type, state, ts, result['metrics'])
+    return result
+
+def save_forecast_model(series, model_type, state, ts, fit_metrics):
+    """Persist the final states of a fitted model (see models.py) and return its id"""
+    filename, date_column, value_column = series
+    version = dataset_key(filename)
+    model_id = make_key('forecast_model', version, date_column, value_column, model_type,
+                        state['params']['seasonal_periods'])[:20]
+    if forecast_models.exists(model_id):
+        return model_id
+    
+    try:
+        freq = pd.infer_freq(ts.index)
+    except (TypeError, ValueError):
+        freq = None
+    return forecast_models.save(models.model_from_state(model_id, state, {
+        'kind': 'holt_winters',
+        'model_type': model_type,
+        'dataset': {'filename': filename, 'date_column': date_column, 'value_column': value_column,
+                    'version': version[:16] if version else None},
+        'nobs': len(ts),
+        'last_date': ts.index[-1].isoformat() if len(ts) else None,
+        'freq': freq,
+        'metrics': fit_metrics,
+        'created': time.time()
+    }))
+
+# Longest horizon /forecast/<model_id> serves
+MAX_FORECAST_HORIZON = 10000
+
+@app.route('/forecast/<model_id>')
+def serve_forecast(model_id):
+    """
+    Forecast from a saved model (model_id from /holt_winters_forecast) for
+    any horizon (?horizon=, default 12). Uses only the stored final states:
+    no dataset, no statsmodels, constant cost in the training series length.
+    """
+    model = forecast_models.load(model_id)
+    if model is None:
+        return jsonify({'error': 'Modelo no encontrado'}), 404
+    
+    try:
+        horizon = int(request.args.get('horizon', 12))
+    except ValueError:
+        return jsonify({'error': 'El horizonte debe ser un entero'}), 400
+    if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+        return jsonify({'error': f'El horizonte debe estar entre 1 y {MAX_FORECAST_HORIZON}'}), 400
+    
+    values, dates = models.forecast(model, horizon)
+    return jsonify({
+        'success': True,
+        'model_id': model_id,
+        'model_type': model['model_type'],
+        'horizon': horizon,
+        'forecast_values': values.tolist(),
+        'forecast_dates': dates,
+        'dataset': model['dataset'],
+        'last_date': model['last_date']
+    })
 
 def allowed_file(filename):
-    """Check if file extension is allowed"""
+    """Check if file extension is allowed (CSV/TXT may be compressed, zip archives hold one CSV/TXT)"""
     ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'txt'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    name, compression = ingest.split_compression(filename)
+    if compression == 'zip':
+        return True
+    if compression is not None and not name.lower().endswith(ingest.TEXT_EXTENSIONS):
+        return False
+    return '.' in name and name.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def safe_load_file(filename):
-    """Safely load a file with security checks"""
+def resolve_upload_path(filename):
+    """Resolve an uploaded filename to a safe path inside UPLOAD_FOLDER"""
     if not filename:
         return None, "Nombre de archivo requerido"
     
@@ -623,7 +1473,7 @@ def safe_load_file(filename):
     
     # Check if allowed extension
     if not allowed_file(secure_name):
-        return None, "Formato de archivo no soportado. Formatos permitidos: CSV, Excel (.xlsx, .xls), TXT"
+        return None, "Formato de archivo no soportado. Formatos permitidos: CSV, Excel (.xlsx, .xls), TXT (también .gz, .bz2, .xz, .zst o .zip)"
     
     # Build secure filepath
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_name)
@@ -639,23 +1489,287 @@ def safe_load_file(filename):
     if not os.path.exists(filepath):
         return None, "Archivo no encontrado"
     
-    # Load the file
-    try:
-        if secure_name.endswith('.csv'):
-            # Auto-detect delimiter for CSV files
-            df = read_csv_with_auto_delimiter(filepath)
-        elif secure_name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(filepath)
-        elif secure_name.endswith('.txt'):
-            # Try different separators for MS-DOS .txt files
-            df = read_csv_with_auto_delimiter(filepath, encoding='latin-1')
+    return filepath, None
+
+def safe_load_file(filename, columns=None, sheet=None):
+    """
+    Safely load a file with security checks.
+    With columns, files that have a metadata sidecar listing them decode only
+    those columns; the sidecar also supplies the CSV dialect and dtypes, and
+    the selected worksheet of a workbook (unless sheet is given).
+    Numeric text columns ('1.234,56', '$ 1,200') are converted to float64
+    under the file's number format, recorded in the sidecar once detected.
+    """
+    filepath, error = resolve_upload_path(filename)
+    if error:
+        return None, error
+    
+    # Compressed files are parsed by the name of the data inside them
+    try:
+        secure_name = ingest.source_name(filepath)
+    except ingest.IngestError as e:
+        return None, str(e)
+    
+    hints = {}
+    usecols = None
+    metadata = datasets.read_sidecar(filepath)
+    if metadata:
+        if columns and all(column in metadata['columns'] for column in columns):
+            usecols = list(columns)
+        if metadata.get('dialect'):
+            dtypes = dict(metadata.get('dtypes') or {})
+            # Formatted numbers are read as text and converted below
+            for column in (metadata.get('number_format') or {}).get('columns', []):
+                dtypes[column] = 'object'
+            hints = {'dialect': metadata['dialect'], 'dtype': dtypes, 'usecols': usecols}
+        if sheet is None:
+            sheet = metadata.get('sheet')
+    
+    # Load the file
+    try:
+        with stage('load'):
+            if secure_name.endswith('.csv'):
+                # Auto-detect delimiter for CSV files
+                df = read_csv_with_auto_delimiter(filepath, **hints)
+            elif secure_name.endswith(('.xlsx', '.xls')):
+                df = load_excel(filepath, sheet, usecols)
+            elif secure_name.endswith('.txt'):
+                # Try different separators for MS-DOS .txt files
+                df = read_csv_with_auto_delimiter(filepath, encoding='latin-1', **hints)
+            else:
+                return None, "Formato de archivo no soportado"
+        
+        with stage('normalize_numbers'):
+            if metadata and 'number_format' in metadata:
+                number_format = metadata['number_format']
+            else:
+                dialect = df.attrs.get('csv_dialect') or {}
+                number_format = numeric.detect_format(df, prefer_comma=dialect.get('delimiter') == ';')
+            if number_format:
+                df = numeric.apply_format(df, number_format)
+        
+        if metadata and df.attrs.get('rejected_hints'):
+            correct_sidecar_dtypes(filepath, metadata, df)
+        
+        return df, None
+        
+    except Exception as e:
+        return None, f"Error al cargar el archivo: {str(e)}"
+
+def correct_sidecar_dtypes(filepath, metadata, df):
+    """Record the dtypes of a read that rejected the sidecar's hints, so later loads are hinted correctly"""
+    dtypes = dict(metadata['dtypes'])
+    dtypes.update({column: str(dtype) for column, dtype in df.dtypes.items() if column in dtypes})
+    try:
+        # The signature read with the sidecar: a file changed since then keeps its sidecar stale
+        datasets.write_sidecar(filepath, dict(metadata, dtypes=dtypes), metadata.get('source'))
+    except (OSError, ValueError) as e:
+        print(f"Sidecar update failed for {filepath}: {str(e)}")
+
+def load_excel(filepath, sheet=None, columns=None):
+    """
+    Read a worksheet once per file version and keep it in the result store,
+    so requests after the first do not parse the workbook again. Column
+    projections are cut from the cached sheet; without one, only the
+    requested columns are read and cached.
+    """
+    fingerprint = file_fingerprint(filepath)
+    full_key = make_key('excel_sheet', fingerprint, sheet, None)
+    df = result_store.get(full_key)
+    if df is not None:
+        return df[columns] if columns else df
+    
+    key = make_key('excel_sheet', fingerprint, sheet, columns) if columns else full_key
+    df = result_store.get(key) if columns else None
+    if df is None:
+        df = parsers.read_excel(filepath, sheet, columns)
+        result_store.set(key, df, kind='excel_sheet')
+    return df
+
+def excel_sheets(filepath):
+    """Worksheet names of an uploaded workbook, or None for other files"""
+    if not ingest.source_name(filepath).endswith(('.xlsx', '.xls')):
+        return None
+    return parsers.excel_sheet_names(filepath)
+
+def dataset_key(filename):
+    """Fingerprint of an uploaded file, used to key cached artifacts"""
+    filepath, error = resolve_upload_path(filename)
+    if error:
+        return None
+    return file_fingerprint(filepath)
+
+def load_prepared_series(filename, date_column, value_column, df=None):
+    """
+    Load a file and return the sorted, date-indexed value series.
+    Numeric series are published to shared memory so every worker attaches the
+    same pages; other series are kept in the result store. A caller that has
+    already loaded the file can pass it as df.
+    """
+    fingerprint = dataset_key(filename)
+    key = make_key('prepared_series', fingerprint, date_column, value_column)
+    dataset = secure_filename(os.path.basename(filename or ''))
+    entry = make_key(date_column, value_column)[:16]
+    if fingerprint:
+        ts = attach_shared_series(dataset, fingerprint[:16], entry)
+        if ts is not None:
+            metrics.inc('prepared_series_lookups_total', {'source': 'shared'})
+            return ts, None
+        ts = result_store.get(key)
+        if ts is not None:
+            metrics.inc('prepared_series_lookups_total', {'source': 'store'})
+            return ts, None
+    
+    metrics.inc('prepared_series_lookups_total', {'source': 'load'})
+    if df is None:
+        df, error = safe_load_file(filename, columns=[date_column, value_column])
+        if error:
+            return None, error
+    
+    if date_column not in df.columns or value_column not in df.columns:
+        return None, 'Columnas especificadas no encontradas'
+    
+    with stage('parse_dates'):
+        df[date_column] = parse_spanish_dates(df[date_column])
+        df[date_column] = pd.to_datetime(df[date_column])
+    with stage('prepare'):
+        df = df.sort_values(date_column)
+        df.set_index(date_column, inplace=True)
+        ts = df[value_column].dropna()
+        ts = store_prepared_series(filename, fingerprint, date_column, value_column, ts)
+    if fingerprint:
+        # Recorded on misses only: hits stay read-only on the result store
+        remember_recent_series(filename, date_column, value_column)
+    
+    return ts, None
+
+def store_prepared_series(filename, fingerprint, date_column, value_column, ts):
+    """Publish a prepared series to shared memory, or keep it in the result store; returns the stored series"""
+    dataset = secure_filename(os.path.basename(filename or ''))
+    entry = make_key(date_column, value_column)[:16]
+    if fingerprint and pd.api.types.is_numeric_dtype(ts) and isinstance(ts.index, pd.DatetimeIndex) and ts.index.tz is None:
+        try:
+            shared_arrays.publish(
+                dataset, fingerprint[:16], entry,
+                {'index': ts.index.values.astype('datetime64[ns]').view('int64'),
+                 'values': ts.values.astype('float64')},
+                meta={'name': value_column, 'index_name': date_column}
+            )
+            shared = attach_shared_series(dataset, fingerprint[:16], entry)
+            if shared is not None:
+                return shared
+        except OSError as e:
+            print(f"Shared memory publish failed: {str(e)}")
+    
+    result_store.set(make_key('prepared_series', fingerprint, date_column, value_column), ts, kind='prepared_series')
+    return ts
+
+def cached_prepared_series(filename, fingerprint, date_column, value_column):
+    """The prepared series stored for a version of a file, or None"""
+    dataset = secure_filename(os.path.basename(filename or ''))
+    ts = attach_shared_series(dataset, fingerprint[:16], make_key(date_column, value_column)[:16])
+    if ts is None:
+        ts = result_store.get(make_key('prepared_series', fingerprint, date_column, value_column))
+    return ts
+
+RECENT_SERIES_KEY = make_key('recent_series')
+
+def remember_recent_series(filename, date_column, value_column, limit=20):
+    """Record a prepared (file, columns) selection so warm-up can preload it after restarts"""
+    selection = [filename, date_column, value_column]
+    recent = result_store.get(RECENT_SERIES_KEY) or []
+    if recent[:1] == [selection]:
+        return
+    recent = [selection] + [item for item in recent if item != selection]
+    result_store.set(RECENT_SERIES_KEY, recent[:limit], kind='recent_series')
+
+def attach_shared_series(dataset, version, entry):
+    """Build a pandas Series over shared read-only arrays without copying"""
+    arrays, meta = shared_arrays.attach(dataset, version, entry)
+    if arrays is None:
+        return None
+    index = pd.DatetimeIndex(arrays['index'].view('datetime64[ns]'), name=meta.get('index_name'))
+    return pd.Series(arrays['values'], index=index, name=meta.get('name'), copy=False)
+
+def artifact_key(kind, filename, params):
+    """Result store key for an artifact of a dataset"""
+    return make_key(kind, dataset_key(filename), params)
+
+def cached_artifact(kind, filename, params, compute):
+    """
+    Return an artifact from the result store, computing and storing it on a miss.
+    Concurrent requests for the same artifact wait for a single computation.
+    """
+    key = artifact_key(kind, filename, params)
+    
+    def compute_and_store():
+        value = compute()
+        result_store.set(key, value, kind=kind)
+        return value
+    
+    return single_flight.run(key, lambda: result_store.get(key), compute_and_store)
+
+def smoothing_state_key(series, trend, seasonal, seasonal_periods):
+    return make_key('smoothing_state', list(series), trend, seasonal, seasonal_periods)
+
+def fitted_smoothing(ts, series=None, trend=None, seasonal=None, seasonal_periods=None):
+    """
+    Exponential smoothing state of ts (see smoothing.py). With series =
+    (filename, date_column, value_column) the state is kept per series and
+    model; a state covering the current version of the file, e.g. one that
+    /append_data advanced over new rows, is reused instead of refitting.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing, SimpleExpSmoothing
+    
+    version = dataset_key(series[0]) if series else None
+    key = smoothing_state_key(series, trend, seasonal, seasonal_periods) if version else None
+    if key:
+        state = result_store.get(key)
+        if state is not None and state['version'] == version and state['nobs'] == len(ts):
+            metrics.inc('smoothing_state_lookups_total', {'source': 'state'})
+            return state
+    
+    metrics.inc('smoothing_state_lookups_total', {'source': 'fit'})
+    with stage('fit'):
+        if trend is None and seasonal is None:
+            results = SimpleExpSmoothing(ts).fit()
         else:
-            return None, "Formato de archivo no soportado"
-        
-        return df, None
-        
-    except Exception as e:
-        return None, f"Error al cargar el archivo: {str(e)}"
+            results = ExponentialSmoothing(ts, trend=trend, seasonal=seasonal, seasonal_periods=seasonal_periods).fit()
+    state = smoothing.from_results(results, trend, seasonal, seasonal_periods)
+    
+    if key:
+        state['version'] = version
+        result_store.set(key, state, kind='smoothing_state')
+        # Remember the model so appends can find its state
+        models_key = make_key('smoothing_models', list(series))
+        models = result_store.get(models_key) or []
+        if [trend, seasonal, seasonal_periods] not in models:
+            result_store.set(models_key, models + [[trend, seasonal, seasonal_periods]], kind='smoothing_models')
+    return state
+
+def advance_smoothing_models(series, old_version, new_version, old_nobs, values, refit=False):
+    """
+    Advance the smoothing states of a series over appended values. States due
+    for a refit (refit, or SMOOTHING_REFIT_EVERY observations since the last
+    fit) are dropped, so the next request refits on the whole series.
+    Returns (advanced, dropped).
+    """
+    advanced = dropped = 0
+    refit_every = app.config['SMOOTHING_REFIT_EVERY']
+    for trend, seasonal, seasonal_periods in result_store.get(make_key('smoothing_models', list(series))) or []:
+        key = smoothing_state_key(series, trend, seasonal, seasonal_periods)
+        state = result_store.get(key)
+        if state is None or state['version'] != old_version or state['nobs'] != old_nobs:
+            continue
+        if refit or (refit_every and state['nobs'] + len(values) - state['refit_nobs'] >= refit_every):
+            result_store.delete(key)
+            dropped += 1
+            continue
+        state = smoothing.advance(state, values)
+        state['version'] = new_version
+        result_store.set(key, state, kind='smoothing_state')
+        advanced += 1
+    return advanced, dropped
 
 def parse_spanish_dates(date_series):
     """
@@ -774,50 +1888,140 @@ def comparative_analysis():
             return jsonify({'error': 'Faltan parámetros requeridos'}), 400
         
         # Load and process data safely
-        df, error = safe_load_file(filename)
+        ts, error = load_prepared_series(filename, date_column, value_column)
         if error:
             return jsonify({'error': error}), 400
         
-        df[date_column] = parse_spanish_dates(df[date_column])
-        df[date_column] = pd.to_datetime(df[date_column])
-        df = df.sort_values(date_column)
-        df.set_index(date_column, inplace=True)
-        ts = df[value_column].dropna()
-        
         if len(ts) < 12:
             return jsonify({'error': 'Se necesitan al menos 12 puntos de datos para el análisis comparativo'}), 400
         
-        # Execute all three methods
-        exponential_results = execute_exponential_smoothing(ts)
-        holt_results = execute_holt_method(ts)
-        winter_results = execute_winter_method(ts)
-        
-        # Create comparison plot
-        comparison_plot = create_comparison_plot(ts, exponential_results, holt_results, winter_results)
-        
-        return jsonify({
-            'success': True,
-            'exponential': exponential_results,
-            'holt': holt_results,
-            'winter': winter_results,
-            'comparison_plot': comparison_plot
-        })
+        result = cached_artifact(
+            'comparative_analysis', filename,
+            {'date_column': date_column, 'value_column': value_column},
+            lambda: build_comparative_analysis(ts, progress=job_progress_reporter(4),
+                                               series=(filename, date_column, value_column))
+        )
+        return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'Error en el análisis comparativo: {str(e)}'}), 500
 
-def execute_exponential_smoothing(ts):
+@app.route('/comparative_analysis/stream')
+def comparative_analysis_stream():
+    """Stream comparative analysis results as each method finishes (Server-Sent Events)"""
+    filename = request.args.get('filename')
+    date_column = request.args.get('date_column')
+    value_column = request.args.get('value_column')
+    
+    if not all([filename, date_column, value_column]):
+        return jsonify({'error': 'Faltan parámetros requeridos'}), 400
+    
+    ts, error = load_prepared_series(filename, date_column, value_column)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    if len(ts) < 12:
+        return jsonify({'error': 'Se necesitan al menos 12 puntos de datos para el análisis comparativo'}), 400
+    
+    key = artifact_key('comparative_analysis', filename,
+                       {'date_column': date_column, 'value_column': value_column})
+    
+    def generate():
+        cached = result_store.get(key)
+        stages = cached_comparative_stages(cached) if cached is not None else iter_comparative_analysis(ts, (filename, date_column, value_column))
+        result = {'success': True}
+        try:
+            for method, value in stages:
+                result[COMPARATIVE_RESULT_KEYS[method]] = value
+                yield sse_event(method, value)
+            if cached is None:
+                result_store.set(key, result, kind='comparative_analysis')
+            yield sse_event('done', {'success': True})
+        except Exception as e:
+            yield sse_event('analysis_error', {'error': f'Error en el análisis comparativo: {str(e)}'})
+    
+    return event_stream(generate())
+
+# Stream event name -> key in the comparative_analysis response
+COMPARATIVE_RESULT_KEYS = {
+    'exponential': 'exponential',
+    'holt': 'holt',
+    'winter': 'winter',
+    'comparison': 'comparison_plot'
+}
+
+def iter_comparative_analysis(ts, series=None):
+    """Yield (method, result) as each method finishes, cheapest first, then the comparison plot"""
+    results = {}
+    for method, execute in (('exponential', execute_exponential_smoothing),
+                            ('holt', execute_holt_method),
+                            ('winter', execute_winter_method)):
+        results[method] = execute(ts, series)
+        yield method, results[method]
+    
+    # Create comparison plot
+    yield 'comparison', create_comparison_plot(ts, results['exponential'], results['holt'], results['winter'])
+
+def cached_comparative_stages(result):
+    """Replay a stored comparative analysis as stream stages"""
+    for method, key in COMPARATIVE_RESULT_KEYS.items():
+        yield method, result[key]
+
+def build_comparative_analysis(ts, progress=None, series=None):
+    """Run the three smoothing methods and build the comparison payload"""
+    result = {'success': True}
+    for method, value in iter_comparative_analysis(ts, series):
+        result[COMPARATIVE_RESULT_KEYS[method]] = value
+        if progress:
+            progress(method)
+    return result
+
+def figure_to_json(fig):
+    """Serialize a Plotly figure for the frontend"""
+    from plotly.utils import PlotlyJSONEncoder
+    
+    with stage('serialize'):
+        return json.dumps(fig, cls=PlotlyJSONEncoder)
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream(generator):
+    """Wrap a generator of SSE strings in an unbuffered streaming response"""
+    return Response(
+        stream_with_context(generator),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def job_progress_reporter(total):
+    """Return a callback that records per-item progress when running as a job, else None"""
+    job_id = request.headers.get('X-Job-Id')
+    if not job_id:
+        return None
+    
+    completed = []
+    def report(item):
+        completed.append(item)
+        job_queue.set_progress(job_id, {
+            'current': item,
+            'completed': list(completed),
+            'done': len(completed),
+            'total': total
+        })
+    return report
+
+def execute_exponential_smoothing(ts, series=None):
     """Execute simple exponential smoothing"""
-    from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+    import plotly.graph_objects as go
     
     try:
         # Fit simple exponential smoothing
-        model = SimpleExpSmoothing(ts)
-        fitted_model = model.fit()
+        state = fitted_smoothing(ts, series)
         
-        # Get fitted values and parameters
-        fitted_values = fitted_model.fittedvalues
-        alpha = fitted_model.params['smoothing_level']
+        # Get parameters
+        alpha = state['params']['alpha']
         
         # Calculate step-by-step smoothing
         calculations = []
@@ -852,19 +2056,20 @@ def execute_exponential_smoothing(ts):
         rmse = np.sqrt(mse)
         mape = np.mean(np.abs((actual_array - fitted_array) / actual_array)) * 100
         
-        # Create plot
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=ts.index, y=ts.values, mode='lines', name='Serie Original', line=dict(color='blue')))
-        fig.add_trace(go.Scatter(x=ts.index[1:], y=fitted_array, mode='lines', name='Suavizado Exponencial', line=dict(color='red', dash='dash')))
-        
-        fig.update_layout(
-            title='Suavizado Exponencial Simple',
-            xaxis_title='Fecha',
-            yaxis_title='Valor',
-            template='plotly_white'
-        )
+        with stage('build_figure'):
+            # Create plot
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=ts.index, y=ts.values, mode='lines', name='Serie Original', line=dict(color='blue')))
+            fig.add_trace(go.Scatter(x=ts.index[1:], y=fitted_array, mode='lines', name='Suavizado Exponencial', line=dict(color='red', dash='dash')))
+            
+            fig.update_layout(
+                title='Suavizado Exponencial Simple',
+                xaxis_title='Fecha',
+                yaxis_title='Valor',
+                template='plotly_white'
+            )
         
-        plot_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        plot_json = figure_to_json(fig)
         
         return {
             'alpha': float(alpha),
@@ -881,16 +2086,17 @@ def execute_exponential_smoothing(ts):
     except Exception as e:
         raise Exception(f"Error en suavizado exponencial: {str(e)}")
 
-def execute_holt_method(ts):
+def execute_holt_method(ts, series=None):
     """Execute Holt's double exponential smoothing"""
+    import plotly.graph_objects as go
+    
     try:
         # Fit Holt's method
-        model = ExponentialSmoothing(ts, trend='add', seasonal=None)
-        fitted_model = model.fit()
+        state = fitted_smoothing(ts, series, trend='add')
         
         # Get parameters
-        alpha = fitted_model.params['smoothing_level']
-        beta = fitted_model.params['smoothing_trend']
+        alpha = state['params']['alpha']
+        beta = state['params']['beta']
         
         # Calculate step-by-step
         calculations = []
@@ -940,19 +2146,20 @@ def execute_holt_method(ts):
         rmse = np.sqrt(mse)
         mape = np.mean(np.abs((actual_array - forecast_array) / actual_array)) * 100
         
-        # Create plot
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=ts.index, y=ts.values, mode='lines', name='Serie Original', line=dict(color='blue')))
-        fig.add_trace(go.Scatter(x=ts.index[1:], y=forecast_array, mode='lines', name='Método de Holt', line=dict(color='orange', dash='dash')))
-        
-        fig.update_layout(
-            title='Método de Holt (Suavizado Exponencial Doble)',
-            xaxis_title='Fecha',
-            yaxis_title='Valor',
-            template='plotly_white'
-        )
+        with stage('build_figure'):
+            # Create plot
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=ts.index, y=ts.values, mode='lines', name='Serie Original', line=dict(color='blue')))
+            fig.add_trace(go.Scatter(x=ts.index[1:], y=forecast_array, mode='lines', name='Método de Holt', line=dict(color='orange', dash='dash')))
+            
+            fig.update_layout(
+                title='Método de Holt (Suavizado Exponencial Doble)',
+                xaxis_title='Fecha',
+                yaxis_title='Valor',
+                template='plotly_white'
+            )
         
-        plot_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        plot_json = figure_to_json(fig)
         
         return {
             'alpha': float(alpha),
@@ -970,8 +2177,10 @@ def execute_holt_method(ts):
     except Exception as e:
         raise Exception(f"Error en método de Holt: {str(e)}")
 
-def execute_winter_method(ts):
+def execute_winter_method(ts, series=None):
     """Execute Winter's triple exponential smoothing"""
+    import plotly.graph_objects as go
+    
     try:
         # Determine seasonality period (try 12 months, 4 quarters, or auto-detect)
         seasonal_period = min(12, len(ts) // 3)
@@ -979,16 +2188,15 @@ def execute_winter_method(ts):
             seasonal_period = 4
         
         # Fit Winter's method
-        model = ExponentialSmoothing(ts, trend='add', seasonal='mul', seasonal_periods=seasonal_period)
-        fitted_model = model.fit()
+        state = fitted_smoothing(ts, series, trend='add', seasonal='mul', seasonal_periods=seasonal_period)
         
         # Get parameters
-        alpha = fitted_model.params['smoothing_level'] 
-        beta = fitted_model.params['smoothing_trend']
-        gamma = fitted_model.params['smoothing_seasonal']
+        alpha = state['params']['alpha']
+        beta = state['params']['beta']
+        gamma = state['params']['gamma']
         
         # Get fitted values for calculations display
-        fitted_values = fitted_model.fittedvalues
+        fitted_values = pd.Series(state['fitted'], index=ts.index)
         
         # Calculate step-by-step (simplified for display)
         calculations = []
@@ -1015,19 +2223,20 @@ def execute_winter_method(ts):
         rmse = np.sqrt(mse)
         mape = np.mean(np.abs((actual_array - fitted_array) / actual_array)) * 100
         
-        # Create plot
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=ts.index, y=ts.values, mode='lines', name='Serie Original', line=dict(color='blue')))
-        fig.add_trace(go.Scatter(x=ts.index[seasonal_period:], y=fitted_array, mode='lines', name='Método de Winter', line=dict(color='green', dash='dash')))
-        
-        fig.update_layout(
-            title='Método de Winter (Suavizado Exponencial Triple)',
-            xaxis_title='Fecha', 
-            yaxis_title='Valor',
-            template='plotly_white'
-        )
+        with stage('build_figure'):
+            # Create plot
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=ts.index, y=ts.values, mode='lines', name='Serie Original', line=dict(color='blue')))
+            fig.add_trace(go.Scatter(x=ts.index[seasonal_period:], y=fitted_array, mode='lines', name='Método de Winter', line=dict(color='green', dash='dash')))
+            
+            fig.update_layout(
+                title='Método de Winter (Suavizado Exponencial Triple)',
+                xaxis_title='Fecha', 
+                yaxis_title='Valor',
+                template='plotly_white'
+            )
         
-        plot_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        plot_json = figure_to_json(fig)
         
         return {
             'alpha': float(alpha),
@@ -1048,52 +2257,55 @@ def execute_winter_method(ts):
 
 def create_comparison_plot(ts, exp_results, holt_results, winter_results):
     """Create comparison plot for all three methods"""
+    import plotly.graph_objects as go
+    
     try:
-        fig = go.Figure()
-        
-        # Original series
-        fig.add_trace(go.Scatter(
-            x=ts.index, y=ts.values,
-            mode='lines', name='Serie Original',
-            line=dict(color='blue', width=3)
-        ))
-        
-        # Extract fitted values from each method (simplified)
-        # For exponential smoothing
-        exp_fitted = [ts.iloc[0]] + [calc['smoothed'] for calc in exp_results['calculations']]
-        fig.add_trace(go.Scatter(
-            x=ts.index[:len(exp_fitted)], y=exp_fitted,
-            mode='lines', name='Suavizado Exponencial Simple',
-            line=dict(color='red', dash='dash', width=2)
-        ))
-        
-        # For Holt method  
-        holt_fitted = [ts.iloc[0]] + [calc['forecast'] for calc in holt_results['calculations']]
-        fig.add_trace(go.Scatter(
-            x=ts.index[:len(holt_fitted)], y=holt_fitted,
-            mode='lines', name='Método de Holt',
-            line=dict(color='orange', dash='dot', width=2)
-        ))
-        
-        # For Winter method
-        winter_fitted = [calc['forecast'] for calc in winter_results['calculations']]
-        seasonal_period = min(12, len(ts) // 3) if len(ts) // 3 >= 4 else 4
-        fig.add_trace(go.Scatter(
-            x=ts.index[seasonal_period:seasonal_period+len(winter_fitted)], y=winter_fitted,
-            mode='lines', name='Método de Winter',
-            line=dict(color='green', dash='dashdot', width=2)
-        ))
-        
-        fig.update_layout(
-            title='Comparación de Métodos de Descomposición',
-            xaxis_title='Fecha',
-            yaxis_title='Valor',
-            hovermode='x unified',
-            template='plotly_white',
-            legend=dict(x=0, y=1, bgcolor='rgba(255,255,255,0.8)')
-        )
+        with stage('build_figure'):
+            fig = go.Figure()
+            
+            # Original series
+            fig.add_trace(go.Scatter(
+                x=ts.index, y=ts.values,
+                mode='lines', name='Serie Original',
+                line=dict(color='blue', width=3)
+            ))
+            
+            # Extract fitted values from each method (simplified)
+            # For exponential smoothing
+            exp_fitted = [ts.iloc[0]] + [calc['smoothed'] for calc in exp_results['calculations']]
+            fig.add_trace(go.Scatter(
+                x=ts.index[:len(exp_fitted)], y=exp_fitted,
+                mode='lines', name='Suavizado Exponencial Simple',
+                line=dict(color='red', dash='dash', width=2)
+            ))
+            
+            # For Holt method  
+            holt_fitted = [ts.iloc[0]] + [calc['forecast'] for calc in holt_results['calculations']]
+            fig.add_trace(go.Scatter(
+                x=ts.index[:len(holt_fitted)], y=holt_fitted,
+                mode='lines', name='Método de Holt',
+                line=dict(color='orange', dash='dot', width=2)
+            ))
+            
+            # For Winter method
+            winter_fitted = [calc['forecast'] for calc in winter_results['calculations']]
+            seasonal_period = min(12, len(ts) // 3) if len(ts) // 3 >= 4 else 4
+            fig.add_trace(go.Scatter(
+                x=ts.index[seasonal_period:seasonal_period+len(winter_fitted)], y=winter_fitted,
+                mode='lines', name='Método de Winter',
+                line=dict(color='green', dash='dashdot', width=2)
+            ))
+            
+            fig.update_layout(
+                title='Comparación de Métodos de Descomposición',
+                xaxis_title='Fecha',
+                yaxis_title='Valor',
+                hovermode='x unified',
+                template='plotly_white',
+                legend=dict(x=0, y=1, bgcolor='rgba(255,255,255,0.8)')
+            )
         
-        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+        return figure_to_json(fig)
         
     except Exception as e:
         raise Exception(f"Error creando gráfico de comparación: {str(e)}")
@@ -1102,15 +2314,23 @@ def create_comparison_plot(ts, exp_results, holt_results, winter_results):
 def get_data_info(filename):
     """Get basic information about uploaded data file"""
     try:
-        df, error = safe_load_file(filename)
+        metadata, error = file_metadata(filename)
         if error:
             return jsonify({'error': error}), 400
         
         return jsonify({
             'success': True,
-            'rows': len(df),
-            'columns': df.columns.tolist(),
-            'dtypes': df.dtypes.astype(str).to_dict()
+            'rows': metadata['rows'],
+            'columns': metadata['columns'],
+            'dtypes': metadata['dtypes'],
+            'null_counts': metadata['null_counts'],
+            'stats': metadata['stats'],
+            'date_column': metadata['date_column'],
+            'value_column': metadata['value_column'],
+            'date_range': metadata['date_range'],
+            'dialect': metadata['dialect'],
+            'sheets': metadata.get('sheets'),
+            'sheet': metadata.get('sheet')
         })
         
     except Exception as e:
@@ -1129,7 +2349,7 @@ def get_data_preview():
         if not all([filename, time_column, value_column]):
             return jsonify({'error': 'Faltan parámetros requeridos'}), 400
         
-        df, error = safe_load_file(filename)
+        df, error = safe_load_file(filename, columns=[time_column, value_column])
         if error:
             return jsonify({'error': error}), 400
         
@@ -1162,7 +2382,7 @@ def analyze_model_type():
         if not all([filename, time_column, value_column]):
             return jsonify({'error': 'Faltan parámetros requeridos'}), 400
         
-        df, error = safe_load_file(filename)
+        df, error = safe_load_file(filename, columns=[time_column, value_column])
         if error:
             return jsonify({'error': error}), 400
         
@@ -1177,13 +2397,14 @@ def analyze_model_type():
         if len(values) < num_segments * 2:
             return jsonify({'error': f'Se necesitan al menos {num_segments * 2} observaciones para {num_segments} segmentos'}), 400
         
-        # Perform analysis
-        analysis_result = perform_segment_analysis(values, num_segments)
-        
-        # Add data for plotting
-        analysis_result['data_for_plot'] = [
-            {'index': i+1, 'value': float(val)} for i, val in enumerate(values)
-        ]
+        with stage('fit'):
+            # Perform analysis
+            analysis_result = perform_segment_analysis(values, num_segments)
+            
+            # Add data for plotting
+            analysis_result['data_for_plot'] = [
+                {'index': i+1, 'value': float(val)} for i, val in enumerate(values)
+            ]
         
         return jsonify({
             'success': True,
@@ -1302,13 +2523,614 @@ def perform_segment_analysis(values, num_segments):
         'confianza': float(confianza)
     }
 
+@app.route('/precompute', methods=['POST'])
+def precompute():
+    """
+    Compute and cache the artifacts usually requested right after an upload:
+    file metadata, the prepared series, ACF, seasonal period and the default
+    decomposition. Queued by upload_data; also callable directly.
+    """
+    try:
+        data = request.get_json()
+        filename = data.get('filename')
+        
+        df, error = safe_load_file(filename)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        progress = job_progress_reporter(5)
+        metadata, error = file_metadata(filename, df)
+        if error:
+            return jsonify({'error': error}), 400
+        if progress:
+            progress('metadata')
+        
+        date_column = data.get('date_column') or metadata['date_column']
+        value_column = data.get('value_column') or metadata['value_column']
+        if not date_column or not value_column:
+            return jsonify({'success': True, 'metadata': metadata,
+                            'message': 'No se detectaron columnas de fecha y valor'})
+        columns = {'date_column': date_column, 'value_column': value_column}
+        
+        ts, error = load_prepared_series(filename, date_column, value_column, df=df.copy())
+        if error:
+            return jsonify({'error': error}), 400
+        if progress:
+            progress('prepared_series')
+        
+        n_lags = min(12, len(ts) - 1)
+        autocorrelations = cached_artifact('acf', filename, dict(columns, max_lags=n_lags),
+                                           lambda: [ts.autocorr(lag=lag) for lag in range(1, n_lags + 1)])
+        if progress:
+            progress('acf')
+        
+        period = cached_artifact('period', filename, columns, lambda: {'period': detect_period(ts)})['period']
+        if progress:
+            progress('period')
+        
+        artifacts = ['metadata', 'prepared_series', 'acf', 'period']
+        if len(ts) >= 24:
+            try:
+                cached_artifact('decomposition', filename, columns, lambda: build_decomposition(ts))
+                artifacts.append('decomposition')
+            except Exception as e:
+                print(f"Precompute decomposition failed for {filename}: {str(e)}")
+        if progress:
+            progress('decomposition')
+        
+        return jsonify({
+            'success': True,
+            'date_column': date_column,
+            'value_column': value_column,
+            'rows': len(ts),
+            'period': period,
+            'autocorrelations': autocorrelations,
+            'artifacts': artifacts
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Error en el precálculo: {str(e)}'}), 500
+
+def parse_upload_dates(values):
+    """Parse a block of date strings: vectorized for ISO dates, parse_spanish_dates otherwise"""
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    if dates.notna().sum() == values.notna().sum():
+        return dates
+    return pd.to_datetime(parse_spanish_dates(values), errors='coerce')
+
+def build_file_metadata(df):
+    """Sidecar metadata of a loaded file: description, CSV dialect, detected columns and date range"""
+    date_column, value_column = detect_series_columns(df)
+    metadata = datasets.describe_frame(df)
+    metadata.update({
+        'dialect': df.attrs.get('csv_dialect'),
+        'number_format': df.attrs.get('number_format'),
+        'date_column': date_column,
+        'value_column': value_column,
+        'date_range': None
+    })
+    
+    if date_column is not None:
+        dates = pd.to_datetime(parse_spanish_dates(df[date_column].copy()), errors='coerce').dropna()
+        if not dates.empty:
+            metadata['date_range'] = {'start': dates.min().isoformat(), 'end': dates.max().isoformat()}
+    return metadata
+
+def file_metadata(filename, df=None):
+    """Return (metadata, error) from the file's sidecar, rebuilding it when missing or stale"""
+    filepath, error = resolve_upload_path(filename)
+    if error:
+        return None, error
+    
+    metadata = datasets.read_sidecar(filepath)
+    if metadata is not None:
+        return metadata, None
+    
+    signature = datasets.source_signature(filepath)
+    if df is None:
+        df, error = safe_load_file(filename)
+        if error:
+            return None, error
+    metadata = build_file_metadata(df)
+    sheets = excel_sheets(filepath)
+    if sheets:
+        metadata.update({'sheets': sheets, 'sheet': sheets[0]})
+    try:
+        metadata = datasets.write_sidecar(filepath, metadata, signature)
+    except OSError as e:
+        print(f"Metadata sidecar write failed: {str(e)}")
+    return metadata, None
+
+def detect_series_columns(df, sample_size=50):
+    """Guess the date column (the first one whose sample parses as dates) and the value column (the last numeric one)"""
+    date_column = None
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]):
+            continue
+        sample = df[column].dropna().head(sample_size)
+        if sample.empty:
+            continue
+        parsed = pd.to_datetime(parse_spanish_dates(sample), errors='coerce')
+        if parsed.notna().mean() >= 0.8:
+            date_column = column
+            break
+    
+    numeric = [c for c in df.columns
+               if c != date_column and pd.api.types.is_numeric_dtype(df[c]) and df[c].notna().any()]
+    return date_column, numeric[-1] if numeric else None
+
+def detect_period(ts, candidates=(4, 7, 12, 24, 52)):
+    """Most likely seasonal period: the candidate lag with the strongest autocorrelation, if clear enough"""
+    best_period, best_autocorr = None, 0.3
+    for period in candidates:
+        if len(ts) < 2 * period:
+            break
+        autocorr = ts.autocorr(lag=period)
+        if autocorr > best_autocorr:
+            best_period, best_autocorr = period, autocorr
+    return best_period
+
+@app.route('/analyze_all', methods=['POST'])
+def analyze_all():
+    """Compute several analyses of one series in a single request, optionally as a stream"""
+    try:
+        data = request.get_json()
+        filename = data.get('filename')
+        date_column = data.get('date_column')
+        value_column = data.get('value_column')
+        artifacts = data.get('artifacts') or list(ANALYZE_ALL_ARTIFACTS)
+        
+        if not all([filename, date_column, value_column]):
+            return jsonify({'error': 'Faltan parámetros requeridos'}), 400
+        
+        unknown = [name for name in artifacts if name not in ANALYZE_ALL_ARTIFACTS]
+        if unknown:
+            return jsonify({'error': f'Análisis no soportados: {", ".join(map(str, unknown))}'}), 400
+        
+        # Load and prepare the series once for every artifact
+        ts, error = load_prepared_series(filename, date_column, value_column)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        results = iter_all_artifacts(ts, data, artifacts)
+        
+        # Jobs always store a plain JSON result
+        if str(data.get('stream', '')).lower() == 'true' and not request.headers.get('X-Job-Id'):
+            def generate():
+                for name, value in results:
+                    yield sse_event(name, value)
+                yield sse_event('done', {'success': True})
+            return event_stream(generate())
+        
+        response = {'success': True}
+        for name, value in results:
+            response[name] = value
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({'error': f'Error en el análisis: {str(e)}'}), 500
+
+def iter_all_artifacts(ts, data, artifacts):
+    """
+    Yield (artifact, result) for each requested artifact. A failing artifact
+    yields {'error': ...} without stopping the others. Decomposition, forecast
+    and comparative results share the result store entries of their own routes.
+    The seasonal decomposition is computed at most once and shared by the
+    decomposition artifact and the forecast's model choice; fitted smoothing
+    models are shared through fitted_smoothing.
+    """
+    filename = data.get('filename')
+    columns = {'date_column': data.get('date_column'), 'value_column': data.get('value_column')}
+    series = (filename, columns['date_column'], columns['value_column'])
+    model_type = data.get('model_type')
+    progress = job_progress_reporter(len(artifacts))
+    shared = {}
+    
+    def decomposition():
+        if 'decomposition' not in shared:
+            shared['decomposition'] = decompose_series(ts)
+        return shared['decomposition']
+    
+    for name in ANALYZE_ALL_ARTIFACTS:
+        if name not in artifacts:
+            continue
+        try:
+            if name == 'table':
+                value = series_table_page(ts, columns, int(data.get('page', 1)), int(data.get('page_size', 100)))
+            elif name == 'segments':
+                num_segments = int(data.get('num_segments', 4))
+                if len(ts) < num_segments * 2:
+                    value = {'error': f'Se necesitan al menos {num_segments * 2} observaciones para {num_segments} segmentos'}
+                else:
+                    with stage('fit'):
+                        value = perform_segment_analysis(ts.values.astype(float), num_segments)
+            elif name == 'acf':
+                n_lags = min(int(data.get('max_lags', 12)), len(ts) - 1)
+                if n_lags < 1:
+                    value = {'error': 'Se necesitan al menos 2 puntos de datos para la autocorrelación'}
+                else:
+                    autocorrs, plot = build_autocorrelation(ts, n_lags)
+                    value = {'autocorr_plot': plot, 'autocorrelations': autocorrs, 'n_lags': n_lags}
+            elif name == 'decomposition':
+                if len(ts) < 24:
+                    value = {'error': 'Se necesitan al menos 24 puntos de datos para la descomposición'}
+                else:
+                    value = cached_artifact('decomposition', filename, columns,
+                                            lambda: build_decomposition(ts, decomposition()))
+                    model_type = model_type or value['model_type']
+            elif name == 'forecast':
+                if not model_type:
+                    # Reuse a decomposition computed earlier, e.g. by /analyze_series
+                    stored = result_store.get(artifact_key('decomposition', filename, columns))
+                    if stored:
+                        model_type = stored['model_type']
+                    else:
+                        model_type = decomposition()['model_type'] if len(ts) >= 24 else 'additive'
+                periods = int(data.get('periods', 12))
+                value = cached_artifact(
+                    'holt_winters_forecast', filename,
+                    dict(columns, model_type=model_type, periods=periods),
+                    lambda: build_holt_winters_forecast(ts, model_type, periods, series)
+                )
+                value = dict(value, model_type=model_type)
+            elif name == 'comparative':
+                if len(ts) < 12:
+                    value = {'error': 'Se necesitan al menos 12 puntos de datos para el análisis comparativo'}
+                else:
+                    value = cached_artifact('comparative_analysis', filename, columns,
+                                            lambda: build_comparative_analysis(ts, series=series))
+        except Exception as e:
+            value = {'error': f'Error en {name}: {str(e)}'}
+        
+        if progress:
+            progress(name)
+        yield name, value
+
+def series_table_page(ts, columns, page, page_size):
+    """One page of the prepared series as table rows"""
+    page = max(1, page)
+    page_size = max(1, min(page_size, 1000))
+    chunk = ts.iloc[(page - 1) * page_size:page * page_size]
+    date_column, value_column = columns['date_column'], columns['value_column']
+    return {
+        'columns': [date_column, value_column],
+        'data': [{date_column: index.isoformat(), value_column: value}
+                 for index, value in zip(chunk.index, chunk.tolist())],
+        'total_rows': len(ts),
+        'page': page,
+        'page_size': page_size
+    }
+
+# Models a live stream can be registered with from a series: (trend, seasonal)
+STREAM_MODELS = {
+    'simple': (None, None),
+    'holt': ('add', None),
+    'winter': ('add', 'mul'),
+    'additive': ('add', 'add'),
+    'multiplicative': ('mul', 'mul')
+}
+
+@app.route('/streams', methods=['POST'])
+def register_stream():
+    """
+    Register a live series for online exponential smoothing (see streams.py).
+    The body is either a smoothing state (params, level, trend, season) or a
+    series of an uploaded file (filename, date_column, value_column) with a
+    model from STREAM_MODELS, whose fitted state the stream starts from.
+    """
+    try:
+        data = request.get_json() or {}
+        horizon = stream_horizon(data)
+        state = data
+        if data.get('filename'):
+            state, error = series_stream_state(data)
+            if error:
+                return jsonify({'error': error}), 400
+        
+        stream_id = stream_table.register(state)
+        return jsonify(dict(stream_table.describe(stream_id, stream_table.get(stream_id), horizon), success=True))
+        
+    except streams.StreamError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': f'Error al registrar la serie: {str(e)}'}), 500
+
+def series_stream_state(data):
+    """Return (state, error): the fitted smoothing state of an uploaded series"""
+    filename = data.get('filename')
+    date_column = data.get('date_column')
+    value_column = data.get('value_column')
+    model = data.get('model', 'simple')
+    
+    if not all([filename, date_column, value_column]):
+        return None, 'Faltan parámetros requeridos'
+    if model not in STREAM_MODELS:
+        return None, f"Modelo no soportado. Modelos disponibles: {', '.join(STREAM_MODELS)}"
+    
+    ts, error = load_prepared_series(filename, date_column, value_column)
+    if error:
+        return None, error
+    
+    trend, seasonal = STREAM_MODELS[model]
+    seasonal_periods = int(data.get('seasonal_periods', 12)) if seasonal else None
+    if len(ts) < (2 * seasonal_periods if seasonal else 2):
+        return None, 'La serie es demasiado corta para ajustar el modelo'
+    return fitted_smoothing(ts, (filename, date_column, value_column), trend, seasonal, seasonal_periods), None
+
+def stream_horizon(data):
+    """Forecast steps requested (horizon), between 1 and 1000; raises StreamError if it is not a number"""
+    try:
+        horizon = int(data.get('horizon', 1))
+    except (TypeError, ValueError):
+        raise streams.StreamError('horizon debe ser un número entero')
+    return max(1, min(horizon, 1000))
+
+def stream_values(values):
+    """Observations as a float array, or None if any is not a finite number"""
+    if not isinstance(values, list) or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    values = np.asarray(values, dtype='float64')
+    return values if np.isfinite(values).all() else None
+
+@app.route('/streams/<stream_id>')
+def get_stream(stream_id):
+    """Current state and next forecasts of a live stream"""
+    try:
+        horizon = stream_horizon(request.args)
+    except streams.StreamError as e:
+        return jsonify({'error': str(e)}), e.status
+    state = stream_table.get(stream_id)
+    if state is None:
+        return jsonify({'error': 'Serie no encontrada'}), 404
+    return jsonify(stream_table.describe(stream_id, state, horizon))
+
+@app.route('/streams/<stream_id>', methods=['DELETE'])
+def delete_stream(stream_id):
+    """Remove a live stream"""
+    if not stream_table.remove(stream_id):
+        return jsonify({'error': 'Serie no encontrada'}), 404
+    return jsonify({'success': True})
+
+@app.route('/streams/<stream_id>/observations', methods=['POST'])
+def push_stream_observations(stream_id):
+    """
+    Push one observation (value) or a micro-batch (values, in order) to a
+    stream. Returns the one-step prediction made for each observation, the
+    updated state and the next forecasts.
+    """
+    try:
+        data = request.get_json() or {}
+        values = stream_values(data['values'] if 'values' in data else [data.get('value')])
+        if values is None or not len(values):
+            return jsonify({'error': 'Las observaciones deben ser números finitos'}), 400
+        # Validated before the push: a rejected request must not advance the state
+        horizon = stream_horizon(data)
+        
+        predictions, state = stream_table.push(stream_id, values)
+        metrics.inc('stream_observations_total', value=len(values))
+        return jsonify(dict(stream_table.describe(stream_id, state, horizon),
+                            success=True, predictions=predictions.tolist()))
+        
+    except streams.StreamError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': f'Error al actualizar la serie: {str(e)}'}), 500
+
+@app.route('/streams/observations', methods=['POST'])
+def push_observations():
+    """
+    Push a micro-batch spanning many streams: observations is a list of
+    {stream_id, value}, in order per stream. The batch is applied with
+    vectorized updates over the state table; the response has the one-step
+    prediction of each observation and the next forecasts of each stream.
+    """
+    try:
+        data = request.get_json() or {}
+        observations = data.get('observations')
+        if not isinstance(observations, list) or not observations \
+                or not all(isinstance(o, dict) and isinstance(o.get('stream_id'), str) for o in observations):
+            return jsonify({'error': 'Se requiere una lista de observaciones con stream_id y value'}), 400
+        values = stream_values([o.get('value') for o in observations])
+        if values is None:
+            return jsonify({'error': 'Las observaciones deben ser números finitos'}), 400
+        horizon = stream_horizon(data)
+        
+        stream_ids = [o['stream_id'] for o in observations]
+        predictions = stream_table.push_many(stream_ids, values)
+        metrics.inc('stream_observations_total', value=len(values))
+        
+        forecasts = {}
+        for stream_id in dict.fromkeys(stream_ids):
+            state = stream_table.get(stream_id)
+            if state is not None:
+                forecasts[stream_id] = smoothing.forecast(state, horizon).tolist()
+        return jsonify({'success': True, 'predictions': predictions.tolist(), 'forecasts': forecasts})
+        
+    except streams.StreamError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': f'Error al actualizar las series: {str(e)}'}), 500
+
+@app.route('/streams/<stream_id>/events')
+def stream_events(stream_id):
+    """Stream a live series' state each time observations arrive (Server-Sent Events)"""
+    try:
+        horizon = stream_horizon(request.args)
+    except streams.StreamError as e:
+        return jsonify({'error': str(e)}), e.status
+    if stream_table.get(stream_id) is None:
+        return jsonify({'error': 'Serie no encontrada'}), 404
+    
+    def generate():
+        # Ask EventSource to reconnect quickly when the stream is closed below
+        yield 'retry: 1000\n\n'
+        deadline = time.time() + app.config['SSE_MAX_DURATION']
+        last_nobs = None
+        while time.time() < deadline:
+            state = stream_table.get(stream_id)
+            if state is None:
+                yield sse_event('removed', {'stream_id': stream_id})
+                return
+            if state['nobs'] != last_nobs:
+                yield sse_event('state', stream_table.describe(stream_id, state, horizon))
+                last_nobs = state['nobs']
+            time.sleep(0.25)
+    
+    return event_stream(generate())
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Submit an analysis as a background job"""
+    data = request.get_json(silent=True) or {}
+    endpoint = data.get('endpoint')
+    params = data.get('params', {})
+    
+    if endpoint not in ASYNC_ENDPOINTS:
+        return jsonify({'error': f'Endpoint no soportado para trabajos: {endpoint}'}), 400
+    if not isinstance(params, dict):
+        return jsonify({'error': 'Los parámetros deben ser un objeto JSON'}), 400
+    rejection = reject_job(endpoint, params)
+    if rejection is not None:
+        return rejection
+    
+    job_id = job_queue.submit(endpoint, params)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('get_job', job_id=job_id)
+    }), 202
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Get job status, including the result once it has finished"""
+    job = job_queue.get(job_id, include_result=True)
+    if job is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify({'success': True, **job})
+
+@app.route('/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Return the original endpoint response of a finished job"""
+    job = job_queue.get(job_id, include_result=True)
+    if job is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    if 'result' not in job:
+        return jsonify({'error': 'El trabajo aún no ha terminado', 'status': job['status']}), 409
+    return jsonify(job['result']), job['status_code']
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream job progress and the final result (Server-Sent Events)"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    
+    def generate():
+        # Ask EventSource to reconnect quickly when the stream is closed below
+        yield 'retry: 1000\n\n'
+        deadline = time.time() + app.config['SSE_MAX_DURATION']
+        last_state = None
+        while time.time() < deadline:
+            job = job_queue.get(job_id, include_result=True)
+            state = (job['status'], json.dumps(job['progress']))
+            if state != last_state:
+                yield sse_event('progress', {k: v for k, v in job.items() if k != 'result'})
+                last_state = state
+            if 'result' in job or job['status'] == 'cancelled':
+                yield sse_event('done', job)
+                return
+            time.sleep(0.5)
+    
+    return event_stream(generate())
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    if not job_queue.cancel(job_id):
+        return jsonify({'error': 'El trabajo ya terminó'}), 409
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'cancelled'})
+
+def warm_up():
+    """
+    Pay one-time initialization before serving traffic: import statsmodels and
+    Plotly, run a tiny fit of every smoothing method and decomposition, and
+    attach the most recently used series. Run in the gunicorn master
+    (when_ready) so forked workers inherit the warm state.
+    """
+    if not app.config['WARMUP_ENABLED']:
+        return
+    
+    started = time.time()
+    index = pd.date_range('2000-01-01', periods=48, freq='MS')
+    dummy = pd.Series(100 + np.arange(48) + 10 * np.sin(np.arange(48) * np.pi / 6), index=index)
+    try:
+        build_decomposition(dummy)
+        build_holt_winters_forecast(dummy, 'additive', 12)
+        build_comparative_analysis(dummy)
+    except Exception as e:
+        print(f"Warm-up fit failed: {str(e)}")
+    
+    preloaded = 0
+    for filename, date_column, value_column in (result_store.get(RECENT_SERIES_KEY) or [])[:app.config['WARMUP_DATASETS']]:
+        ts, error = load_prepared_series(filename, date_column, value_column)
+        if ts is not None:
+            preloaded += 1
+    
+    print(f"Warm-up finished in {time.time() - started:.2f} s ({preloaded} datasets preloaded)")
+
+def warm_up_worker():
+    """Open per-process store connections after fork so the first request does not pay for them"""
+    if not app.config['WARMUP_ENABLED']:
+        return
+    result_store.stats()
+    job_queue.counts()
+    metrics.flush()
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
     return {'status': 'healthy', 'service': 'time-series-dashboard'}
 
+@app.route('/profiles')
+def list_profiles():
+    """List recent request profiles"""
+    if not is_profiling_admin():
+        return jsonify({'error': 'No encontrado'}), 404
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'success': True, 'profiles': profiles.list(limit)})
+
+@app.route('/profiles/<profile_id>')
+def get_profile(profile_id):
+    """Return a profile summary, or the pstats file with ?format=pstats"""
+    if not is_profiling_admin():
+        return jsonify({'error': 'No encontrado'}), 404
+    
+    path = profiles.path(profile_id)
+    if path is None:
+        return jsonify({'error': 'Perfil no encontrado'}), 404
+    if request.args.get('format') == 'pstats':
+        return send_file(os.path.abspath(path), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f'{profile_id}.prof')
+    return jsonify({'success': True, 'profile': profiles.summary(profile_id)})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     # Development server configuration (use gunicorn for production)
     import os
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-    app.run(host='0.0.0.0', port=5000, debug=debug_mode)
\ No newline at end of file
+    
+    # With the reloader only the child process serves requests and runs jobs
+    job_runner = None
+    if not debug_mode or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_runner = RunnerSupervisor()
+    try:
+        app.run(host='0.0.0.0', port=5000, debug=debug_mode)
+    finally:
+        if job_runner is not None:
+            job_runner.stop()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Import-time report for the application (python -X importtime).
+
+Usage:
+    python benchmarks/import_time.py [--module app] [--top 15] [--max-seconds 1.0] [--json]
+
+Runs the import in a fresh interpreter, prints the total and the slowest
+modules by cumulative time, and exits with status 1 when --max-seconds is
+exceeded so it can be used as a startup regression check.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    """Return [(module, self_us, cumulative_us)] for importing module in a fresh interpreter"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f'Import of {module} failed:\n{proc.stderr[-2000:]}')
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-seconds', type=float, default=None)
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total = next((cum for name, _, cum in rows if name == args.module), sum(s for _, s, _ in rows))
+    top_level = sorted((r for r in rows if r[0] != args.module), key=lambda r: r[2], reverse=True)[:args.top]
+
+    report = {
+        'module': args.module,
+        'total_seconds': total / 1e6,
+        'slowest': [{'module': n, 'self_seconds': s / 1e6, 'cumulative_seconds': c / 1e6} for n, s, c in top_level]
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.module}: {report['total_seconds']:.3f} s")
+        for item in report['slowest']:
+            print(f"  {item['cumulative_seconds']:8.3f} s  {item['module']}")
+
+    if args.max_seconds is not None and report['total_seconds'] > args.max_seconds:
+        print(f"Import time exceeds {args.max_seconds:.3f} s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
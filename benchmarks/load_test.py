@@ -0,0 +1,356 @@
+"""
+Offline load test replaying the frontend's user sessions against gunicorn.
+
+Usage:
+    python benchmarks/load_test.py [--workers 4] [--concurrency 8] [--sessions 40 | --duration 60]
+                                   [--flows session=3,visualization=1]
+                                   [--datasets monthly:120=3,daily:2000=1,uploads/datas.csv=1]
+                                   [--url http://127.0.0.1:5000] [--json report.json]
+
+Unless --url is given, a gunicorn server is started with gunicorn.conf.py on
+a free local port, with uploads, result store, jobs and shared arrays in a
+temporary directory, and stopped at the end. Each virtual user repeatedly
+picks a flow and a dataset (weighted), uploads the file and issues the same
+requests as the pages in static/js. Queued analyses (202 + job) are polled
+like resolveJobResult does, and the comparative analysis is read from its
+event stream like the browser. The report has throughput and p50/p95/p99
+latency per route.
+
+Dataset specs are <frequency>:<rows> for synthetic series
+(benchmarks/synthetic.py) or a path to an existing CSV/TXT/Excel file.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+
+# Requests issued by each page, in order (see static/js/*.js)
+FLOWS = {
+    'session': ['upload_data', 'get_data_table', 'analyze_series', 'holt_winters_forecast', 'comparative_analysis'],
+    'decomposition': ['upload_data', 'get_data_table', 'analyze_series', 'holt_winters_forecast'],
+    'comparative': ['upload_data', 'comparative_analysis_stream'],
+    'visualization': ['upload_data', 'plot_series', 'plot_lag_series'],
+    'model_type': ['upload_data', 'get_data_preview', 'analyze_model_type']
+}
+
+
+class Client:
+    """Minimal JSON/multipart HTTP client on urllib"""
+
+    def __init__(self, base_url, timeout=300):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, headers=None):
+        """Return (status, body bytes)"""
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def post_json(self, path, payload):
+        return self.request('POST', path, json.dumps(payload).encode('utf-8'),
+                            {'Content-Type': 'application/json'})
+
+    def upload(self, path, filename, content):
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode('utf-8') + content + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        return self.request('POST', path, body, {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+    def stream(self, path):
+        """Read a Server-Sent Events response until a done/analysis_error/queued event"""
+        request = urllib.request.Request(self.base_url + path, headers={'Accept': 'text/event-stream'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                event = None
+                for raw in response:
+                    line = raw.decode('utf-8').rstrip('\n')
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                    elif line.startswith('data:') and event in ('done', 'analysis_error', 'queued'):
+                        return response.status, event, json.loads(line[len('data:'):])
+                return response.status, event, None
+        except urllib.error.HTTPError as e:
+            return e.code, None, None
+
+
+class Dataset:
+    def __init__(self, spec, workdir, seed):
+        self.spec = spec
+        if os.path.exists(spec):
+            self.filename = os.path.basename(spec)
+            with open(spec, 'rb') as fh:
+                self.content = fh.read()
+        else:
+            frequency, rows = spec.split(':')
+            self.filename = f'load_{frequency}_{rows}.csv'
+            path = os.path.join(workdir, self.filename)
+            synthetic.write_csv(path, int(float(rows)), frequency, seed=seed)
+            with open(path, 'rb') as fh:
+                self.content = fh.read()
+
+
+def pick_columns(columns):
+    """Date column by name (fecha/date/time) or the first one; value column is the last"""
+    names = [str(c) for c in columns]
+    date_column = next((c for c in names if any(k in c.lower() for k in ('fecha', 'date', 'time'))), names[0])
+    return date_column, names[-1]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.queued = {}
+        self.sessions = 0
+
+    def record(self, route, seconds, ok, queued=False):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+            if queued:
+                self.queued[route] = self.queued.get(route, 0) + 1
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def wait_for_job(client, job_id, poll_interval=1.0):
+    """Poll /jobs/<id> until it finishes, like resolveJobResult in static/js/jobs.js"""
+    while True:
+        time.sleep(poll_interval)
+        status, body = client.request('GET', f'/jobs/{job_id}')
+        job = json.loads(body or b'{}')
+        if status >= 400:
+            return False
+        if job.get('status') in ('done', 'failed', 'cancelled'):
+            return job.get('status') == 'done'
+
+
+def run_step(client, step, dataset, session, stats):
+    """Issue one request of a flow; session carries the uploaded name and chosen columns"""
+    name = session['filename']
+    payload = {'filename': name, 'date_column': session.get('date_column'), 'value_column': session.get('value_column')}
+    started = time.perf_counter()
+    queued = False
+
+    if step == 'upload_data':
+        status, body = client.upload('/upload_data', name, dataset.content)
+        result = json.loads(body or b'{}')
+        ok = status == 200 and bool(result.get('success'))
+        if ok:
+            session['date_column'], session['value_column'] = pick_columns(result['columns'])
+    elif step == 'comparative_analysis_stream':
+        query = urllib.parse.urlencode(payload)
+        status, event, data = client.stream(f'/comparative_analysis/stream?{query}')
+        ok = status == 200 and event in ('done', 'queued')
+        if event == 'queued':
+            queued = True
+            ok = wait_for_job(client, data['job_id'])
+    else:
+        if step == 'get_data_table':
+            payload = {'filename': name}
+        elif step in ('get_data_preview', 'analyze_model_type'):
+            payload = {'filename': name, 'time_column': payload['date_column'], 'value_column': payload['value_column']}
+        elif step == 'holt_winters_forecast':
+            payload = dict(payload, model_type='additive', periods=12)
+        status, body = client.post_json(f'/{step}', payload)
+        result = json.loads(body or b'{}')
+        if status == 202 and result.get('job_id'):
+            queued = True
+            ok = wait_for_job(client, result['job_id'])
+        else:
+            ok = status == 200 and bool(result.get('success'))
+
+    stats.record(step, time.perf_counter() - started, ok, queued)
+    return ok
+
+
+def virtual_user(client, flows, datasets, stats, deadline, remaining, seed):
+    rng = random.Random(seed)
+    flow_names, flow_weights = zip(*flows)
+    dataset_items, dataset_weights = zip(*datasets)
+    while time.time() < deadline:
+        with stats.lock:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+        flow = rng.choices(flow_names, flow_weights)[0]
+        dataset = rng.choices(dataset_items, dataset_weights)[0]
+        # Each session uploads its own copy, like separate users would
+        session = {'filename': f'{uuid.uuid4().hex[:8]}_{dataset.filename}'}
+        for step in FLOWS[flow]:
+            if not run_step(client, step, dataset, session, stats) and step == 'upload_data':
+                break
+        with stats.lock:
+            stats.sessions += 1
+
+
+def parse_weighted(value):
+    """'a=3,b=1,c' -> [('a', 3.0), ('b', 1.0), ('c', 1.0)]"""
+    items = []
+    for part in value.split(','):
+        name, _, weight = part.rpartition('=')
+        if not name:
+            name, weight = weight, '1'
+        items.append((name, float(weight)))
+    return items
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir, workers):
+    """Start gunicorn in workdir and return (process, base_url) once /health answers"""
+    port = free_port()
+    env = dict(os.environ,
+               RESULT_STORE_DIR=os.path.join(workdir, 'cache'),
+               SHARED_ARRAY_DIR=os.path.join(workdir, 'shm'),
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+         '--pid', os.path.join(workdir, 'gunicorn.pid'), '--access-logfile', os.devnull, 'app:app'],
+        cwd=workdir, env=env
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    client = Client(base_url, timeout=2)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('gunicorn exited during startup')
+        try:
+            if client.request('GET', '/health')[0] == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit('gunicorn did not become ready in 120 s')
+
+
+def report(stats, elapsed, args):
+    routes = {}
+    total = 0
+    for route, latencies in sorted(stats.latencies.items()):
+        latencies = sorted(latencies)
+        total += len(latencies)
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': stats.errors.get(route, 0),
+            'queued': stats.queued.get(route, 0),
+            'throughput_rps': round(len(latencies) / elapsed, 3),
+            'p50': round(percentile(latencies, 50), 4),
+            'p95': round(percentile(latencies, 95), 4),
+            'p99': round(percentile(latencies, 99), 4),
+            'max': round(latencies[-1], 4)
+        }
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'options': {'workers': args.workers, 'concurrency': args.concurrency,
+                    'flows': args.flows, 'datasets': args.datasets, 'url': args.url},
+        'elapsed_seconds': round(elapsed, 3),
+        'sessions': stats.sessions,
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 3),
+        'routes': routes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='target a running server instead of starting gunicorn')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers for the local server')
+    parser.add_argument('--concurrency', type=int, default=8, help='virtual users')
+    parser.add_argument('--sessions', type=int, default=None, help='total sessions to run (default 5 per user)')
+    parser.add_argument('--duration', type=float, default=None, help='run for this many seconds instead')
+    parser.add_argument('--flows', default='session')
+    parser.add_argument('--datasets', default='monthly:120=3,daily:2000=1')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report as JSON to this path')
+    args = parser.parse_args()
+
+    flows = parse_weighted(args.flows)
+    unknown = [name for name, _ in flows if name not in FLOWS]
+    if unknown:
+        parser.error(f'unknown flows: {", ".join(unknown)} (choose from {", ".join(FLOWS)})')
+
+    workdir = tempfile.mkdtemp(prefix='ts-load-')
+    process = None
+    try:
+        datasets = [(Dataset(spec, workdir, args.seed), weight) for spec, weight in parse_weighted(args.datasets)]
+        if args.url:
+            base_url = args.url
+        else:
+            process, base_url = start_server(workdir, args.workers)
+
+        stats = Stats()
+        remaining = None
+        if args.duration is None:
+            remaining = [args.sessions if args.sessions is not None else 5 * args.concurrency]
+        deadline = time.time() + (args.duration if args.duration is not None else float('inf'))
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=virtual_user, daemon=True,
+                             args=(Client(base_url), flows, datasets, stats, deadline, remaining, args.seed + i))
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(30)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = report(stats, elapsed, args)
+    print(f"{result['sessions']} sessions, {result['requests']} requests in {result['elapsed_seconds']:.1f} s "
+          f"({result['throughput_rps']:.2f} req/s)")
+    print(f"{'route':<30} {'reqs':>6} {'err':>5} {'queued':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, r in result['routes'].items():
+        print(f"{route:<30} {r['requests']:>6} {r['errors']:>5} {r['queued']:>6} {r['throughput_rps']:>7.2f} "
+              f"{r['p50']:>8.3f} {r['p95']:>8.3f} {r['p99']:>8.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(result, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
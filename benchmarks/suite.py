@@ -0,0 +1,284 @@
+"""
+Benchmark suite for the parsing helpers, the smoothing methods and every
+analysis route, across dataset sizes.
+
+Usage:
+    python benchmarks/suite.py [--sizes 100,1000,10000,100000] [--frequencies monthly,daily,hourly]
+                               [--date-format iso|spanish] [--only plot_series,analyze_series]
+                               [--no-admission] [--no-memory] [--output results.json]
+                               [--compare baseline.json] [--max-regression 1.25]
+
+Synthetic datasets (benchmarks/synthetic.py) are written to a temporary
+uploads folder; the result store and shared arrays also live in temporary
+directories so nothing touches the real ones. Routes are called through the
+Flask test client twice: cold (empty caches) and warm. Each result records
+wall time, peak traced memory (tracemalloc, measured in a separate cold run)
+and the response payload size, and the report is written as JSON so runs
+can be compared release over release with --compare.
+
+Sizes up to 10**7 are supported; combinations that do not fit the date range
+of a frequency are skipped (use --frequencies minutely for 10**7 rows).
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic
+
+DEFAULT_SIZES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5]
+
+# name -> (method, path template, JSON body); {f} is the dataset file name
+ROUTES = {
+    'upload_data': ('UPLOAD', '/upload_data', None),
+    'get_data_info': ('GET', '/get_data_info/{f}', None),
+    'get_data_table': ('POST', '/get_data_table', {'filename': '{f}'}),
+    'get_data_preview': ('POST', '/get_data_preview', {'filename': '{f}', 'time_column': 'fecha', 'value_column': 'valor'}),
+    'plot_series': ('POST', '/plot_series', {'filename': '{f}', 'date_column': 'fecha', 'value_column': 'valor'}),
+    'plot_lag_series': ('POST', '/plot_lag_series', {'filename': '{f}', 'date_column': 'fecha', 'value_column': 'valor', 'max_lags': 12}),
+    'analyze_series': ('POST', '/analyze_series', {'filename': '{f}', 'date_column': 'fecha', 'value_column': 'valor'}),
+    'holt_winters_forecast': ('POST', '/holt_winters_forecast', {'filename': '{f}', 'date_column': 'fecha', 'value_column': 'valor', 'periods': 12}),
+    'comparative_analysis': ('POST', '/comparative_analysis', {'filename': '{f}', 'date_column': 'fecha', 'value_column': 'valor'}),
+    'analyze_model_type': ('POST', '/analyze_model_type', {'filename': '{f}', 'time_column': 'fecha', 'value_column': 'valor', 'num_segments': 4})
+}
+
+
+def load_app(workdir):
+    """Import the app with its stores redirected to workdir"""
+    os.environ['RESULT_STORE_DIR'] = os.path.join(workdir, 'cache')
+    os.environ['SHARED_ARRAY_DIR'] = os.path.join(workdir, 'shm')
+    os.environ.pop('PROFILE_TOKEN', None)
+    import app as app_module
+    app_module.app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    os.makedirs(app_module.app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Pay the lazy imports up front so they are not charged to the first case
+    app_module.warm_up()
+    return app_module
+
+
+def clear_caches(app_module):
+    app_module.result_store.clear()
+    app_module.shared_arrays.purge()
+    gc.collect()
+
+
+def measure(fn, memory=False):
+    """Run fn once and return (result, seconds, peak_bytes or None)"""
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def payload_size(value):
+    """Size of a JSON-serializable result; None for DataFrames and other objects"""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(json.dumps(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def function_cases(app_module, path, df):
+    """(name, callable) for the module-level helpers"""
+    import pandas as pd
+
+    # The execute_* functions receive an already parsed, date-indexed series
+    dates = pd.to_datetime(app_module.parse_spanish_dates(df['fecha'].copy()))
+    ts = pd.Series(df['valor'].values, index=dates, name='valor')
+    values = df['valor'].astype(float).values
+    return [
+        ('read_csv_with_auto_delimiter', lambda: app_module.read_csv_with_auto_delimiter(path)),
+        ('parse_spanish_dates', lambda: app_module.parse_spanish_dates(df['fecha'].copy())),
+        ('perform_segment_analysis', lambda: app_module.perform_segment_analysis(values, 4)),
+        ('execute_exponential_smoothing', lambda: app_module.execute_exponential_smoothing(ts)),
+        ('execute_holt_method', lambda: app_module.execute_holt_method(ts)),
+        ('execute_winter_method', lambda: app_module.execute_winter_method(ts))
+    ]
+
+
+def call_route(client, name, filename, path):
+    method, url, body = ROUTES[name]
+    url = url.format(f=filename)
+    if method == 'UPLOAD':
+        with open(path, 'rb') as fh:
+            response = client.post(url, data={'file': (fh, filename)}, content_type='multipart/form-data')
+    elif method == 'GET':
+        response = client.get(url)
+    else:
+        response = client.post(url, json={k: v.format(f=filename) if isinstance(v, str) else v for k, v in body.items()})
+    return response
+
+
+def run_case(kind, name, size, frequency, fn, app_module, memory, warm):
+    """Measure one case cold (and warm for routes); returns a result dict"""
+    result = {'kind': kind, 'name': name, 'rows': size, 'frequency': frequency}
+    try:
+        clear_caches(app_module)
+        value, seconds, _ = measure(fn)
+        result['seconds'] = round(seconds, 6)
+        if kind == 'route':
+            result['status'] = value.status_code
+            result['payload_bytes'] = len(value.get_data())
+            if value.status_code >= 400:
+                result['error'] = (value.get_json(silent=True) or {}).get('error')
+        else:
+            result['payload_bytes'] = payload_size(value)
+            if isinstance(value, dict) and 'error' in value:
+                result['error'] = value['error']
+
+        if warm:
+            _, warm_seconds, _ = measure(fn)
+            result['warm_seconds'] = round(warm_seconds, 6)
+        if memory:
+            clear_caches(app_module)
+            _, _, peak = measure(fn, memory=True)
+            result['peak_bytes'] = peak
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    """Print cases slower than the baseline by more than max_regression; return how many"""
+    with open(baseline_path) as fh:
+        baseline = {(r['kind'], r['name'], r['rows'], r['frequency']): r for r in json.load(fh)['results']}
+
+    regressions = 0
+    for r in results:
+        old = baseline.get((r['kind'], r['name'], r['rows'], r['frequency']))
+        if not old or not old.get('seconds') or not r.get('seconds'):
+            continue
+        ratio = r['seconds'] / old['seconds']
+        if ratio > max_regression:
+            regressions += 1
+            print(f"  REGRESSION {r['name']:<32} {r['rows']:>9} {r['frequency']:<8} "
+                  f"{old['seconds']:.4f} s -> {r['seconds']:.4f} s (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='comma-separated row counts (e.g. 100,1000,1e7)')
+    parser.add_argument('--frequencies', default='monthly,daily,hourly')
+    parser.add_argument('--date-format', choices=['iso', 'spanish'], default='iso')
+    parser.add_argument('--only', default=None, help='comma-separated route or function names')
+    parser.add_argument('--no-admission', action='store_true', help='run every route inline regardless of cost')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='JSON report path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='baseline JSON report to compare against')
+    parser.add_argument('--max-regression', type=float, default=1.25)
+    args = parser.parse_args()
+
+    sizes = [int(float(s)) for s in args.sizes.split(',')]
+    frequencies = args.frequencies.split(',')
+    only = set(args.only.split(',')) if args.only else None
+    memory = not args.no_memory
+
+    workdir = tempfile.mkdtemp(prefix='ts-bench-')
+    try:
+        app_module = load_app(workdir)
+        if args.no_admission:
+            app_module.app.config['ADMISSION_BUDGET'] = float('inf')
+        client = app_module.app.test_client()
+        upload_limit = app_module.app.config['UPLOAD_MAX_BYTES']
+
+        results = []
+        for frequency in frequencies:
+            for size in sizes:
+                if size > synthetic.max_rows(frequency):
+                    results.append({'kind': 'dataset', 'name': 'generate', 'rows': size, 'frequency': frequency,
+                                    'skipped': 'does not fit the date range'})
+                    continue
+
+                filename = f'bench_{frequency}_{size}.csv'
+                path = os.path.join(app_module.app.config['UPLOAD_FOLDER'], filename)
+                df = synthetic.write_csv(path, size, frequency, args.date_format, args.seed)
+
+                for name, fn in function_cases(app_module, path, df):
+                    if only and name not in only:
+                        continue
+                    results.append(run_case('function', name, size, frequency, fn, app_module, memory, warm=False))
+                    print_result(results[-1])
+
+                for name in ROUTES:
+                    if only and name not in only:
+                        continue
+                    if name == 'upload_data' and os.path.getsize(path) > upload_limit:
+                        results.append({'kind': 'route', 'name': name, 'rows': size, 'frequency': frequency,
+                                        'skipped': 'file exceeds UPLOAD_MAX_BYTES'})
+                        continue
+                    fn = lambda name=name: call_route(client, name, filename, path)
+                    results.append(run_case('route', name, size, frequency, fn, app_module, memory, warm=True))
+                    print_result(results[-1])
+
+                os.remove(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {'date_format': args.date_format, 'seed': args.seed,
+                    'admission': not args.no_admission, 'memory': memory},
+        'results': results
+    }
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f'Report written to {output}')
+
+    if args.compare:
+        if compare(results, args.compare, args.max_regression):
+            return 1
+    return 0
+
+
+def print_result(r):
+    if 'error' in r and 'seconds' not in r:
+        print(f"{r['name']:<32} {r['rows']:>9} {r['frequency']:<8} ERROR {r['error']}")
+        return
+    peak = f"{r['peak_bytes'] / 1e6:8.1f} MB" if r.get('peak_bytes') is not None else ''
+    warm = f"warm {r['warm_seconds']:.4f} s" if 'warm_seconds' in r else ''
+    status = r.get('status', '')
+    print(f"{r['name']:<32} {r['rows']:>9} {r['frequency']:<8} {r['seconds']:9.4f} s {warm:>16} {peak} {status}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
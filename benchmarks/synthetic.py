@@ -0,0 +1,75 @@
+"""
+Deterministic synthetic time series for benchmarks.
+
+Series are trend + seasonality + noise at monthly, daily, hourly or minutely
+frequency. Dates can be ISO strings or Spanish day-month strings like the
+ones in uploads/ ('6-Ene-2023'). The same seed always produces the same data.
+"""
+
+import numpy as np
+import pandas as pd
+
+SPANISH_MONTHS = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# pandas frequency and seasonal period (in samples) per frequency
+FREQUENCIES = {
+    'monthly': ('MS', 12),
+    'daily': ('D', 7),
+    'hourly': ('h', 24),
+    'minutely': ('min', 60)
+}
+
+START = pd.Timestamp('1700-01-01')
+RECENT_START = pd.Timestamp('2000-01-01')
+
+
+def max_rows(frequency, start=START):
+    """Largest series starting at start that fits in the datetime64[ns] range"""
+    freq, _ = FREQUENCIES[frequency]
+    if freq == 'MS':
+        return (pd.Timestamp.max.year - start.year) * 12
+    return (pd.Timestamp.max.value - start.value) // pd.Timedelta(1, unit=freq).value
+
+
+def generate_series(rows, frequency='monthly', seed=0):
+    """Return a positive date-indexed series with trend, seasonality and noise"""
+    freq, period = FREQUENCIES[frequency]
+    if rows > max_rows(frequency):
+        raise ValueError(f'{rows} rows do not fit in the date range at {frequency} frequency')
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(rows, dtype='float64')
+    trend = 100 + 0.05 * t
+    seasonal = 1 + 0.2 * np.sin(2 * np.pi * t / period)
+    noise = rng.normal(0, 2, rows)
+    values = np.round(trend * seasonal + noise, 3)
+
+    # Start in 2000 when the series fits, so dates look like real uploads
+    start = RECENT_START if rows <= max_rows(frequency, RECENT_START) else START
+    index = pd.date_range(start, periods=rows, freq=freq)
+    return pd.Series(np.maximum(values, 1.0), index=index, name='valor')
+
+
+def spanish_dates(index):
+    """Format dates as 'd-Mmm-YYYY' with Spanish month abbreviations"""
+    months = np.array(SPANISH_MONTHS)[index.month - 1]
+    return pd.Series(index.day.astype(str), dtype=object) + '-' + months + '-' + index.year.astype(str)
+
+
+def generate_frame(rows, frequency='monthly', date_format='iso', seed=0):
+    """Return a two-column DataFrame (fecha, valor) as it would be uploaded"""
+    ts = generate_series(rows, frequency, seed)
+    if date_format == 'spanish':
+        dates = spanish_dates(ts.index)
+    elif frequency in ('hourly', 'minutely'):
+        dates = ts.index.strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        dates = ts.index.strftime('%Y-%m-%d')
+    return pd.DataFrame({'fecha': np.asarray(dates), 'valor': ts.values})
+
+
+def write_csv(path, rows, frequency='monthly', date_format='iso', seed=0):
+    """Write a synthetic dataset as CSV and return the DataFrame"""
+    df = generate_frame(rows, frequency, date_format, seed)
+    df.to_csv(path, index=False)
+    return df
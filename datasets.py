@@ -0,0 +1,255 @@
+"""
+Metadata sidecars for uploaded datasets.
+
+Each uploaded file gets a JSON sidecar in a hidden .meta directory next to
+it, with row count, columns, dtypes, null counts, basic statistics and a
+head sample, so table and info endpoints can answer without parsing the
+file again. The sidecar records the file's size and modification time and
+is ignored once the file changes.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+SIDECAR_DIR = '.meta'
+
+
+def sidecar_path(filepath):
+    directory, name = os.path.split(filepath)
+    return os.path.join(directory, SIDECAR_DIR, name + '.json')
+
+
+def source_signature(filepath):
+    """Size and modification time identifying the current contents of a file"""
+    stat = os.stat(filepath)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_sidecar(filepath):
+    """Return the stored metadata, or None if missing, unreadable or stale"""
+    try:
+        with open(sidecar_path(filepath)) as fh:
+            metadata = json.load(fh)
+        if metadata.get('source') != source_signature(filepath):
+            return None
+        return metadata
+    except (OSError, ValueError):
+        return None
+
+
+def write_sidecar(filepath, metadata, signature=None):
+    """
+    Store metadata for filepath. Pass the signature taken before the file was
+    read so a file replaced in the meantime is not described by old contents.
+    """
+    path = sidecar_path(filepath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    metadata = dict(metadata, source=signature or source_signature(filepath))
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as fh:
+        json.dump(metadata, fh, allow_nan=False, default=str)
+    os.replace(tmp, path)
+    return metadata
+
+
+def remove_sidecar(filepath):
+    try:
+        os.remove(sidecar_path(filepath))
+    except FileNotFoundError:
+        pass
+
+
+def _clean(value):
+    """JSON-safe scalar: NaN and infinities become None"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def describe_frame(df, head_rows=100):
+    """Row count, columns, dtypes, null counts, numeric statistics and a head sample"""
+    stats = {}
+    for column in df.select_dtypes('number').columns:
+        series = df[column]
+        stats[str(column)] = {
+            'count': int(series.count()),
+            'mean': _clean(float(series.mean())) if series.count() else None,
+            'std': _clean(float(series.std())) if series.count() > 1 else None,
+            'min': _clean(float(series.min())) if series.count() else None,
+            'max': _clean(float(series.max())) if series.count() else None
+        }
+
+    return {
+        'rows': len(df),
+        'columns': df.columns.tolist(),
+        'dtypes': df.dtypes.astype(str).to_dict(),
+        'null_counts': {str(k): int(v) for k, v in df.isna().sum().items()},
+        'stats': stats,
+        # to_json turns NaN into null and timestamps into ISO strings
+        'head': json.loads(df.head(head_rows).to_json(orient='records', date_format='iso'))
+    }
+
+
+def _merge_dtype(old, new):
+    if old == new:
+        return old
+    if {old, new} <= {'int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+
+def merge_descriptions(old, new, head_rows=100):
+    """
+    Description of a file after appending rows: old describes the file, new
+    the appended rows (both as returned by describe_frame). Statistics are
+    combined with Chan et al.'s pairwise update; a column that stops being
+    numeric loses its statistics.
+    """
+    merged = dict(old)
+    merged['rows'] = old['rows'] + new['rows']
+    merged['dtypes'] = {column: _merge_dtype(old['dtypes'][column], new['dtypes'][column])
+                        for column in old['dtypes']}
+    merged['null_counts'] = {column: old['null_counts'][column] + new['null_counts'][column]
+                             for column in old['null_counts']}
+
+    stats = {}
+    for column, dtype in merged['dtypes'].items():
+        if dtype == 'object':
+            continue
+        a = old['stats'].get(column) or {'count': 0}
+        b = new['stats'].get(column) or {'count': 0}
+        if not b['count'] or not a['count']:
+            stats[column] = a if a['count'] else b
+            continue
+        n = a['count'] + b['count']
+        delta = b['mean'] - a['mean']
+        m2 = (a['std'] or 0) ** 2 * (a['count'] - 1) + (b['std'] or 0) ** 2 * (b['count'] - 1) \
+            + delta ** 2 * a['count'] * b['count'] / n
+        stats[column] = {
+            'count': n,
+            'mean': _clean(a['mean'] + delta * b['count'] / n),
+            'std': _clean(math.sqrt(m2 / (n - 1))),
+            'min': min(a['min'], b['min']),
+            'max': max(a['max'], b['max'])
+        }
+    merged['stats'] = stats
+    merged['head'] = (old['head'] + new['head'])[:head_rows]
+    return merged
+
+
+# Columnar copies for paging, sorting and filtering large tables.
+#
+# A table is stored as one array per column ('c<i>') plus a null mask
+# ('n<i>'), a parsed date column ('dates', int64 ns, NaT as the minimum) and
+# an 'any_null' row mask. Sort indexes are built lazily per column: the
+# permutation ('order') and, for numeric and date columns, the values in that
+# order ('sorted'), so range filters on the sort column are two binary
+# searches and a page is a slice of the permutation.
+
+NAT = np.iinfo('int64').min
+
+
+def build_table_arrays(df, dates=None):
+    """Return (arrays, meta) for a columnar copy of df; dates are int64 ns or None"""
+    arrays = {}
+    kinds = []
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        nulls = series.isna().to_numpy()
+        if pd.api.types.is_bool_dtype(series) and not nulls.any():
+            values, kind = series.to_numpy(dtype=bool), 'bool'
+        elif pd.api.types.is_integer_dtype(series) and not nulls.any():
+            values, kind = series.to_numpy(dtype='int64'), 'int'
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values, kind = series.to_numpy(dtype='float64', na_value=np.nan), 'float'
+        else:
+            values, kind = series.astype(str).where(~nulls, '').to_numpy(dtype=str), 'str'
+        arrays[f'c{i}'] = values
+        arrays[f'n{i}'] = nulls
+        kinds.append(kind)
+
+    arrays['any_null'] = np.logical_or.reduce([arrays[f'n{i}'] for i in range(len(kinds))]) \
+        if kinds else np.zeros(len(df), dtype=bool)
+    if dates is not None:
+        arrays['dates'] = dates
+    meta = {'columns': [str(c) for c in df.columns], 'kinds': kinds, 'rows': len(df)}
+    return arrays, meta
+
+
+def build_sort_index(values, nulls=None):
+    """Stable ascending order with nulls last, and the sorted values for numeric data"""
+    if nulls is None:
+        nulls = values == NAT if values.dtype == np.int64 else np.zeros(len(values), dtype=bool)
+    order = np.lexsort((values, nulls)).astype('int64')
+    # Non-null rows come first in the order; 'valid' is how many there are
+    arrays = {'order': order, 'valid': np.array([len(order) - int(nulls.sum())])}
+    if values.dtype.kind in 'iuf':
+        arrays['sorted'] = values[order]
+    return arrays
+
+
+def _range_bounds(sorted_values, valid, low=None, high=None):
+    """Slice [lo, hi) of an ascending array (first `valid` entries) within [low, high]"""
+    head = sorted_values[:valid]
+    lo = 0 if low is None else int(np.searchsorted(head, low, side='left'))
+    hi = valid if high is None else int(np.searchsorted(head, high, side='right'))
+    return lo, max(lo, hi)
+
+
+def query_rows(table, sort_index, sort_range, masks, descending, offset, limit):
+    """
+    Return (row indices of the page, number of matching rows).
+
+    sort_index is the index of the sort column, or None for file order.
+    sort_range is a (low, high) filter on the sort column answered by binary
+    search. masks are boolean row masks for the remaining filters, applied
+    vectorized over the mapped arrays. Nulls of the sort column stay last in
+    both directions.
+    """
+    rows = len(table['any_null'])
+    if sort_index is None:
+        order, lo, hi, valid = None, 0, rows, rows
+    else:
+        order = sort_index['order']
+        valid = int(sort_index['valid'][0])
+        lo, hi = _range_bounds(sort_index['sorted'], valid, *sort_range) if sort_range else (0, rows)
+
+    if not masks:
+        # O(log n + page): the matching rows are a contiguous slice of the order
+        total = hi - lo
+        ranks = np.arange(offset, min(offset + limit, total)) if offset < total else np.arange(0)
+        if descending:
+            # Non-null part reversed, then the nulls in their stored order
+            non_null = max(0, min(hi, valid) - lo)
+            positions = np.where(ranks < non_null, lo + non_null - 1 - ranks, lo + ranks)
+        else:
+            positions = lo + ranks
+        page = order[positions] if order is not None else positions
+        return np.asarray(page, dtype='int64'), total
+
+    mask = np.logical_and.reduce(masks)
+    if order is None:
+        candidates = np.flatnonzero(mask)
+        if descending:
+            candidates = candidates[::-1]
+    else:
+        head = order[lo:min(hi, valid)]
+        tail = order[max(lo, valid):hi]
+        head, tail = head[mask[head]], tail[mask[tail]]
+        candidates = np.concatenate([head[::-1] if descending else head, tail])
+    return np.asarray(candidates[offset:offset + limit], dtype='int64'), len(candidates)
+
+
+def rows_to_records(table, meta, indices):
+    """Materialize table rows as JSON-safe dicts"""
+    records = [{} for _ in range(len(indices))]
+    for i, column in enumerate(meta['columns']):
+        values = table[f'c{i}'][indices]
+        nulls = table[f'n{i}'][indices]
+        for record, value, null in zip(records, values.tolist(), nulls.tolist()):
+            record[column] = None if null else _clean(value)
+    return records
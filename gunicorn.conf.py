@@ -8,14 +8,20 @@ backlog = 2048
 
 # Worker processes
 workers = 4
-worker_class = "sync"
-worker_connections = 1000
-timeout = 30
+# Threaded workers: an open event stream (/comparative_analysis/stream,
+# /jobs/<id>/events, /streams/<id>/events) holds one thread, not a whole worker
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+# Workers whose main loop stops responding for this many seconds are killed; raise it for multi-GB uploads
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
 keepalive = 2
 
-# Restart workers after this many requests, to help prevent memory leaks
-max_requests = 1000
-max_requests_jitter = 100
+# Restart a worker once its resident memory exceeds this many MB (see post_request)
+worker_max_rss_mb = int(os.environ.get('WORKER_MAX_RSS_MB', '1024'))
+
+# Request-count recycling is only a backstop now that memory is watched directly
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = 500
 
 # Logging
 accesslog = "-"
@@ -32,6 +38,47 @@ daemon = False
 pidfile = '/tmp/gunicorn.pid'
 tmp_upload_dir = None
 
+# Server hooks
+job_runner = None
+
+def when_ready(server):
+    """Warm up the preloaded app, then start the background job runner and restart it if it dies"""
+    global job_runner
+    from app import warm_up
+    from jobs import RunnerSupervisor
+    # Runs in the master before workers are forked, so they inherit the warm state
+    warm_up()
+    job_runner = RunnerSupervisor(log=server.log.error)
+    server.log.info("Job runner started (pid %s)", job_runner.pid)
+
+def post_fork(server, worker):
+    """Per-worker warm-up of state that is not inherited across fork"""
+    from app import warm_up_worker
+    warm_up_worker()
+
+def post_request(worker, req, environ, resp):
+    """Recycle the worker gracefully when its RSS crosses worker_max_rss_mb"""
+    from metrics import process_rss_bytes
+    rss = process_rss_bytes()
+    if worker_max_rss_mb and rss > worker_max_rss_mb * 1024 * 1024:
+        worker.log.info("Worker %s RSS %.0f MB exceeds %s MB, restarting",
+                        worker.pid, rss / 1024 / 1024, worker_max_rss_mb)
+        from app import metrics
+        metrics.inc('worker_recycles_total', {'reason': 'rss'})
+        worker.alive = False
+
+def worker_exit(server, worker):
+    """Flush buffered metrics before the worker goes away"""
+    from app import metrics
+    metrics.flush()
+
+def on_exit(server):
+    """Stop the job runner and release shared-memory datasets when the master shuts down"""
+    if job_runner is not None:
+        job_runner.stop()
+    from app import shared_arrays
+    shared_arrays.purge()
+
 # SSL (if needed in production)
 # keyfile = None
 # certfile = None
\ No newline at end of file
@@ -0,0 +1,593 @@
+"""
+Streaming ingest of uploaded delimited files.
+
+StreamingIngest is a writable file object: the multipart parser (or a raw
+request body loop) writes the upload into it chunk by chunk. Bytes go
+straight to a temporary file next to the destination while complete lines
+are decoded and parsed in blocks, so row count, dtypes, null counts,
+numeric statistics, the date range and a head sample are known when the
+last byte arrives, without holding the file in memory or reading it again.
+
+Malformed input (binary data, fewer than two columns, rows with more fields
+than the header, uploads over the size limit) raises IngestError as soon as
+it is seen. Input the streaming parser cannot describe reliably (undecodable
+bytes after the head, very long lines) is still saved, and the summary is
+marked deferred so the caller can fall back to a full parse.
+
+Compressed uploads (.csv.gz, .csv.bz2, .csv.xz, .csv.zst and single-member
+.zip) are stored as received and decompressed incrementally for parsing;
+pandas reads them later straight from the compressed file.
+"""
+
+import bz2
+import codecs
+import csv
+import io
+import json
+import lzma
+import math
+import os
+import re
+import struct
+import uuid
+import warnings
+import zipfile
+import zlib
+
+import pandas as pd
+
+import numeric
+
+DELIMITERS = [',', ';', '\t']
+
+
+class IngestError(Exception):
+    """Upload rejected; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def detect_delimiter(text):
+    """
+    Pick the delimiter for the first lines of a file, scoring candidates the
+    same way read_csv_with_auto_delimiter does. Returns None if no delimiter
+    gives at least two columns.
+    """
+    best, best_score = None, 0
+    for delimiter in DELIMITERS:
+        try:
+            sample_df = pd.read_csv(io.StringIO(text), sep=delimiter, nrows=5)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError):
+            continue
+        if len(sample_df.columns) < 2:
+            continue
+        non_null_counts = [sample_df.iloc[i].notna().sum() for i in range(min(3, len(sample_df)))]
+        score = len(sample_df.columns) * (1.0 if len(set(non_null_counts)) <= 1 else 0.5)
+        if all(not str(col).startswith('Unnamed') for col in sample_df.columns):
+            score *= 1.2
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+# Compression by file suffix, named as pandas' compression argument
+COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd', '.zip': 'zip'}
+TEXT_EXTENSIONS = ('.csv', '.txt')
+
+
+def split_compression(filename):
+    """Return (inner filename, compression or None): 'ventas.csv.gz' -> ('ventas.csv', 'gzip')"""
+    root, ext = os.path.splitext(filename)
+    compression = COMPRESSIONS.get(ext.lower())
+    if compression is None:
+        return filename, None
+    return root, compression
+
+
+def zstd_available():
+    try:
+        import zstandard  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def source_name(filepath):
+    """
+    Name of the data inside an uploaded file, which decides how it is parsed:
+    the name without the compression suffix, or the member of a zip archive.
+    Raises IngestError for archives that do not hold a single CSV/TXT file.
+    """
+    name, compression = split_compression(os.path.basename(filepath))
+    if compression != 'zip':
+        return name
+    return os.path.basename(zip_member(filepath))
+
+
+def zip_member(filepath):
+    """Name of the single CSV/TXT member of a zip archive"""
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            members = [info.filename for info in archive.infolist() if not info.is_dir()]
+    except (zipfile.BadZipFile, OSError):
+        raise IngestError('El archivo zip está dañado')
+    if len(members) != 1 or not members[0].lower().endswith(TEXT_EXTENSIONS):
+        raise IngestError('El archivo zip debe contener un único archivo CSV o TXT')
+    return members[0]
+
+
+def open_source(filepath):
+    """Binary file object with the decompressed data of an uploaded file"""
+    _, compression = split_compression(os.path.basename(filepath))
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(filepath, 'rb')
+    if compression == 'bz2':
+        return bz2.open(filepath, 'rb')
+    if compression == 'xz':
+        return lzma.open(filepath, 'rb')
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.open(filepath, 'rb')
+    if compression == 'zip':
+        archive = zipfile.ZipFile(filepath)
+        return archive.open(zip_member(filepath))
+    return open(filepath, 'rb')
+
+
+class _Concatenated:
+    """Decompress a stream of one or more concatenated members (gzip, bz2, xz, zstd frames)"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._decompressor = factory()
+
+    def decompress(self, data):
+        out = self._decompressor.decompress(data)
+        while self._decompressor.eof and self._decompressor.unused_data:
+            rest = self._decompressor.unused_data
+            self._decompressor = self.factory()
+            out += self._decompressor.decompress(rest)
+        return out
+
+    @property
+    def eof(self):
+        return self._decompressor.eof
+
+
+class _ZipMember:
+    """Decompress the first member of a zip archive from its local file header"""
+
+    HEADER = struct.Struct('<4sHHHHHIIIHH')
+
+    def __init__(self):
+        self._buffer = b''
+        self._decompressor = None
+        self._remaining = None
+        self.name = None
+        self.eof = False
+
+    def decompress(self, data):
+        if self.eof:
+            return b''
+        if self._decompressor is None and self._remaining is None:
+            self._buffer += data
+            if len(self._buffer) < self.HEADER.size:
+                return b''
+            (signature, _, flags, method, _, _, _, compressed_size, _,
+             name_length, extra_length) = self.HEADER.unpack_from(self._buffer)
+            if signature != b'PK\x03\x04':
+                raise IngestError('El archivo zip está dañado')
+            start = self.HEADER.size + name_length + extra_length
+            if len(self._buffer) < start:
+                return b''
+            self.name = self._buffer[self.HEADER.size:self.HEADER.size + name_length].decode('utf-8', 'replace')
+            if method == 8:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            elif method == 0 and not flags & 0x08:
+                self._remaining = compressed_size
+            else:
+                raise IngestError('Método de compresión zip no soportado; use deflate')
+            data, self._buffer = self._buffer[start:], b''
+
+        if self._remaining is not None:
+            out, self._remaining = data[:self._remaining], self._remaining - len(data[:self._remaining])
+            self.eof = self._remaining == 0
+            return out
+        out = self._decompressor.decompress(data)
+        self.eof = self._decompressor.eof
+        return out
+
+
+def decompressor(compression):
+    """Incremental decompressor (decompress(data) -> bytes, eof) for a compression name"""
+    if compression == 'gzip':
+        return _Concatenated(lambda: zlib.decompressobj(16 + zlib.MAX_WBITS))
+    if compression == 'bz2':
+        return _Concatenated(bz2.BZ2Decompressor)
+    if compression == 'xz':
+        return _Concatenated(lzma.LZMADecompressor)
+    if compression == 'zstd':
+        import zstandard
+        return _Concatenated(lambda: zstandard.ZstdDecompressor().decompressobj())
+    if compression == 'zip':
+        return _ZipMember()
+    raise ValueError(f'Unknown compression: {compression}')
+
+
+class StreamingIngest:
+    """Write an upload to disk while describing it incrementally"""
+
+    def __init__(self, path, max_bytes=None, encoding=None, parse=True, head_rows=100,
+                 block_bytes=1 << 20, max_line_bytes=16 << 20, detect_columns=None, parse_dates=None,
+                 compression=None, max_expanded_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Limit on the decompressed size of compressed uploads
+        self.max_expanded_bytes = max_expanded_bytes
+        self.compression = compression
+        self._decompressor = decompressor(compression) if compression and parse else None
+        self.expanded_bytes = 0
+        self.encoding = encoding
+        self.parse = parse
+        self.head_rows = head_rows
+        self.block_bytes = block_bytes
+        self.max_line_bytes = max_line_bytes
+        # detect_columns(head_df) -> (date_column, value_column); parse_dates(series) -> datetimes
+        self.detect_columns = detect_columns
+        self.parse_dates = parse_dates
+
+        directory, name = os.path.split(path)
+        self.tmp_path = os.path.join(directory, f'.{name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.part')
+        self._fh = open(self.tmp_path, 'wb')
+        self.bytes_written = 0
+        self.deferred = None if parse else 'not a delimited file'
+
+        self._raw_head = b''
+        self._decoder = None
+        self._pending = ''
+        self.delimiter = None
+        self.columns = None
+        self.rows = 0
+        self._lines = 1  # physical lines consumed, counting the header
+        self._head = []
+        self._columns_detected = False
+        self.date_column = None
+        self.value_column = None
+        self._date_range = None
+        self._stats = {}
+        # Detected on the first block; its columns are normalized in every block
+        self.number_format = None
+
+    # File object interface used by werkzeug's multipart parser
+
+    def write(self, data):
+        if not data:
+            return 0
+        self.bytes_written += len(data)
+        if self.max_bytes is not None and self.bytes_written > self.max_bytes:
+            raise IngestError(f'El archivo supera el tamaño máximo permitido ({self.max_bytes // (1024 * 1024)} MB)', 413)
+        self._fh.write(data)
+        if self.deferred is None:
+            self._feed(self._expand(data) if self._decompressor else data)
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        return self._fh.tell()
+
+    def tell(self):
+        return self._fh.tell()
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+
+    # Incremental parsing
+
+    def _expand(self, data):
+        try:
+            data = self._decompressor.decompress(data)
+        except (zlib.error, OSError, EOFError, lzma.LZMAError) as e:
+            raise IngestError(f'El archivo comprimido está dañado o no es {self.compression}: {str(e)}')
+        except Exception as e:
+            # zstandard raises its own ZstdError
+            if type(e).__name__ != 'ZstdError':
+                raise
+            raise IngestError(f'El archivo comprimido está dañado o no es {self.compression}: {str(e)}')
+
+        if isinstance(self._decompressor, _ZipMember) and self._decompressor.name and self.expanded_bytes == 0 and data:
+            if not self._decompressor.name.lower().endswith(TEXT_EXTENSIONS):
+                raise IngestError('El archivo zip debe contener un único archivo CSV o TXT')
+            if self.encoding is None and self._decompressor.name.lower().endswith('.txt'):
+                self.encoding = 'latin-1'
+        self.expanded_bytes += len(data)
+        if self.max_expanded_bytes is not None and self.expanded_bytes > self.max_expanded_bytes:
+            raise IngestError(f'El archivo descomprimido supera el tamaño máximo permitido '
+                              f'({self.max_expanded_bytes // (1024 * 1024)} MB)', 413)
+        return data
+
+    def _feed(self, data):
+        if self._decoder is None:
+            # Decide encoding and dialect once the head (or the whole file) is buffered
+            self._raw_head += data
+            if len(self._raw_head) < 64 * 1024:
+                return
+            self._start(self._raw_head, final=False)
+            return
+        self._consume(self._decode(data, final=False), final=False)
+
+    def _decode(self, data, final):
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError:
+            self._defer(f'bytes not valid {self.encoding} after the first {self.bytes_written} bytes')
+            return ''
+
+    def _start(self, head, final):
+        if b'\x00' in head[:64 * 1024]:
+            raise IngestError('El archivo no parece ser de texto delimitado (contiene datos binarios)')
+
+        if self.encoding is None:
+            try:
+                # The last bytes may be a multi-byte character cut by the chunk boundary
+                head.decode('utf-8') if final else codecs.getincrementaldecoder('utf-8')().decode(head)
+                self.encoding = 'utf-8'
+            except UnicodeDecodeError:
+                self.encoding = 'latin-1'
+        codec = 'utf-8-sig' if self.encoding == 'utf-8' else self.encoding
+        self._decoder = codecs.getincrementaldecoder(codec)()
+        self._raw_head = b''
+        self._consume(self._decode(head, final), final)
+
+    def _consume(self, text, final):
+        if self.deferred is not None:
+            return
+        self._pending += text
+
+        if self.columns is None:
+            if not final and len(self._pending) < 64 * 1024 and self._pending.count('\n') < 6:
+                return
+            self._read_header(final)
+            if self.columns is None:
+                return
+
+        if not final and len(self._pending) < self.block_bytes:
+            return
+        cut = len(self._pending) if final else self._record_boundary(self._pending)
+        if cut <= 0:
+            if len(self._pending) > self.max_line_bytes:
+                self._defer('line longer than the streaming limit')
+            return
+        block, self._pending = self._pending[:cut], self._pending[cut:]
+        self._parse_block(block)
+
+    def _read_header(self, final):
+        delimiter = detect_delimiter(self._pending)
+        if delimiter is None:
+            if final or self._pending.count('\n') >= 6:
+                self._check_sample_fields(final)
+                raise IngestError('El archivo debe tener al menos 2 columnas (fecha y valor)')
+            if len(self._pending) > self.max_line_bytes:
+                self._defer('header longer than the streaming limit')
+            return
+
+        end = self._pending.find('\n')
+        header = self._pending if end < 0 else self._pending[:end + 1]
+        self.columns = pd.read_csv(io.StringIO(header), sep=delimiter, nrows=0).columns.tolist()
+        self.delimiter = delimiter
+        self._pending = '' if end < 0 else self._pending[end + 1:]
+        self._stats = {column: {'numeric': True, 'integral': True, 'nulls': 0, 'count': 0,
+                                'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None}
+                       for column in self.columns}
+
+    def _check_sample_fields(self, final):
+        """Raise the error of a ragged row when a delimiter splits the header but not the rows after it"""
+        sample = self._pending if final else self._pending[:self._record_boundary(self._pending)]
+        for delimiter in DELIMITERS:
+            try:
+                if len(pd.read_csv(io.StringIO(sample), sep=delimiter, nrows=0).columns) < 2:
+                    continue
+                pd.read_csv(io.StringIO(sample), sep=delimiter, dtype=str, index_col=False)
+            except pd.errors.ParserError as e:
+                if re.search(r'Expected \d+ fields', str(e)):
+                    raise self._row_error(e, 0)
+            except pd.errors.EmptyDataError:
+                return
+
+    def _row_error(self, error, offset):
+        """IngestError for a row with more fields than the header; offset is the line before the parsed text"""
+        match = re.search(r'line (\d+)', str(error))
+        where = f' (línea {offset + int(match.group(1))})' if match else ''
+        return IngestError(f'Fila con más campos que el encabezado{where}: {str(error)}')
+
+    @staticmethod
+    def _record_boundary(text):
+        """End of the last complete record: after a newline outside quotes"""
+        cut = text.rfind('\n')
+        while cut >= 0 and text.count('"', 0, cut) % 2:
+            cut = text.rfind('\n', 0, cut)
+        return cut + 1
+
+    def _parse_block(self, block):
+        try:
+            # With index_col=False pandas truncates a long first row with only a warning
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', pd.errors.ParserWarning)
+                df = pd.read_csv(io.StringIO(block), sep=self.delimiter, header=None, names=self.columns,
+                                 dtype=str, index_col=False)
+        except pd.errors.EmptyDataError:
+            return
+        except pd.errors.ParserWarning:
+            fields = len(next(csv.reader(io.StringIO(block), delimiter=self.delimiter)))
+            raise IngestError(f'Fila con más campos que el encabezado (línea {self._lines + 1}): '
+                              f'se esperaban {len(self.columns)} campos y hay {fields}')
+        except pd.errors.ParserError as e:
+            raise self._row_error(e, self._lines)
+        self._lines += block.count('\n')
+
+        rows_before = self.rows
+        self.rows += len(df)
+        if len(self._head) < self.head_rows:
+            self._head.extend(df.head(self.head_rows - len(self._head)).itertuples(index=False, name=None))
+
+        if rows_before == 0:
+            self.number_format = numeric.detect_format(df, prefer_comma=self.delimiter == ';')
+        if self.number_format:
+            df = numeric.apply_format(df, self.number_format)
+
+        for column in self.columns:
+            self._update_stats(self._stats[column], df[column])
+
+        if not self._columns_detected and len(self._head) >= self.head_rows:
+            self._detect_columns()
+            # Rows of earlier blocks are all in the head
+            self._update_date_range(self._head_frame(raw=True).iloc[:rows_before])
+        if self.date_column is not None:
+            self._update_date_range(df)
+
+    @staticmethod
+    def _update_stats(stats, values):
+        nulls = values.isna()
+        null_count = int(nulls.sum())
+        stats['nulls'] += null_count
+        if not stats['numeric'] or null_count == len(values):
+            return
+        numbers = pd.to_numeric(values, errors='coerce')
+        if int(numbers.isna().sum()) > null_count:
+            stats['numeric'] = False
+            return
+
+        # to_numeric, like read_csv, returns int64 only when every token is written as
+        # an integer ('1.0' and '1e1' give float64) and none is missing
+        if stats['integral'] and not pd.api.types.is_integer_dtype(numbers):
+            stats['integral'] = False
+        numbers = numbers.dropna().astype('float64')
+        # Chan et al. pairwise update of count, mean and sum of squared deviations
+        n, mean, m2 = len(numbers), float(numbers.mean()), float(((numbers - numbers.mean()) ** 2).sum())
+        total = stats['count'] + n
+        delta = mean - stats['mean']
+        stats['m2'] += m2 + delta ** 2 * stats['count'] * n / total
+        stats['mean'] += delta * n / total
+        stats['count'] = total
+        low, high = float(numbers.min()), float(numbers.max())
+        stats['min'] = low if stats['min'] is None else min(stats['min'], low)
+        stats['max'] = high if stats['max'] is None else max(stats['max'], high)
+
+    def _head_frame(self, raw=False):
+        if raw:
+            return pd.DataFrame(self._head, columns=self.columns, dtype=object)
+        # Re-parse the head text so its dtypes are inferred like a full read
+        buffer = io.StringIO()
+        pd.DataFrame(self._head, columns=self.columns).to_csv(buffer, sep=self.delimiter, index=False)
+        buffer.seek(0)
+        df = pd.read_csv(buffer, sep=self.delimiter)
+        return numeric.apply_format(df, self.number_format) if self.number_format else df
+
+    def _formatted(self):
+        return self.number_format['columns'] if self.number_format else []
+
+    def _detect_columns(self):
+        self._columns_detected = True
+        if self.detect_columns is None or not self._head:
+            return
+        self.date_column, self.value_column = self.detect_columns(self._head_frame())
+
+    def _update_date_range(self, df):
+        if self.date_column is None or self.parse_dates is None or df.empty:
+            return
+        dates = self.parse_dates(df[self.date_column].dropna().astype(str).reset_index(drop=True)).dropna()
+        if dates.empty:
+            return
+        low, high = dates.min(), dates.max()
+        if self._date_range is not None:
+            low, high = min(low, self._date_range[0]), max(high, self._date_range[1])
+        self._date_range = (low, high)
+
+    def _defer(self, reason):
+        self.deferred = reason
+        self._pending = ''
+        self._head = []
+
+    # Completion
+
+    def finish(self):
+        """Flush the last partial record, move the file into place and return the summary"""
+        if self._decompressor is not None and self.deferred is None:
+            if not self._decompressor.eof:
+                raise IngestError('El archivo comprimido está incompleto')
+            if self.compression == 'zip':
+                self._fh.flush()
+                zip_member(self.tmp_path)
+        if self.deferred is None:
+            if self._decoder is None:
+                if not self._raw_head:
+                    raise IngestError('El archivo está vacío')
+                self._start(self._raw_head, final=True)
+            else:
+                self._consume(self._decode(b'', final=True), final=True)
+            if self.deferred is None and not self._columns_detected:
+                # Fewer rows than the head: every row is in it
+                self._detect_columns()
+                self._update_date_range(self._head_frame(raw=True))
+
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.close()
+        os.replace(self.tmp_path, self.path)
+        return self.summary()
+
+    def abort(self):
+        """Discard the partial upload"""
+        self.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def summary(self):
+        """Metadata in the sidecar format (see datasets.describe_frame), or None if deferred"""
+        if self.deferred is not None or self.columns is None:
+            return None
+
+        dtypes, stats = {}, {}
+        for column in self.columns:
+            s = self._stats[column]
+            if not s['numeric']:
+                dtypes[column] = 'object'
+                continue
+            integral = s['integral'] and s['count'] and not s['nulls']
+            dtypes[column] = 'int64' if integral and column not in self._formatted() else 'float64'
+            stats[str(column)] = {
+                'count': s['count'],
+                'mean': _clean(s['mean']) if s['count'] else None,
+                'std': _clean(math.sqrt(s['m2'] / (s['count'] - 1))) if s['count'] > 1 else None,
+                'min': s['min'],
+                'max': s['max']
+            }
+
+        head = self._head_frame() if self._head else pd.DataFrame(columns=self.columns)
+        date_range = None
+        if self._date_range is not None:
+            date_range = {'start': self._date_range[0].isoformat(), 'end': self._date_range[1].isoformat()}
+        return {
+            'rows': self.rows,
+            'columns': self.columns,
+            'dtypes': dtypes,
+            'null_counts': {str(column): self._stats[column]['nulls'] for column in self.columns},
+            'stats': stats,
+            'head': json.loads(head.to_json(orient='records', date_format='iso')),
+            'dialect': {'delimiter': self.delimiter, 'encoding': self.encoding},
+            'number_format': self.number_format,
+            'date_column': self.date_column,
+            'value_column': self.value_column,
+            'date_range': date_range
+        }
+
+
+def _clean(value):
+    return value if math.isfinite(value) else None
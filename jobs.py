@@ -0,0 +1,313 @@
+"""
+Local job queue for long-running analyses.
+
+Jobs are persisted in SQLite so they survive HTTP worker restarts. A runner
+process, separate from the gunicorn HTTP workers, claims queued jobs and
+executes each one in its own child process (so it can be cancelled), with a
+bounded number of jobs running at the same time.
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """SQLite-backed job table shared by HTTP workers and the job runner"""
+
+    def __init__(self, directory, max_concurrency=2, timeout=1800):
+        self.directory = directory
+        self.path = os.path.join(directory, 'jobs.sqlite3')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY,'
+            ' endpoint TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' status TEXT NOT NULL,'
+            ' progress TEXT,'
+            ' result TEXT,'
+            ' status_code INTEGER,'
+            ' error TEXT,'
+            ' pid INTEGER,'
+            ' created REAL NOT NULL,'
+            ' started REAL,'
+            ' finished REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def submit(self, endpoint, payload):
+        """Queue a job and return its id"""
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            'INSERT INTO jobs (id, endpoint, payload, status, created) VALUES (?, ?, ?, ?, ?)',
+            (job_id, endpoint, json.dumps(payload), QUEUED, time.time())
+        )
+        return job_id
+
+    def get(self, job_id, include_result=False):
+        """Return the job as a dict, or None if it does not exist"""
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            'job_id': row['id'],
+            'endpoint': row['endpoint'],
+            'status': row['status'],
+            'progress': json.loads(row['progress']) if row['progress'] else None,
+            'error': row['error'],
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished']
+        }
+        if include_result and row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+            job['status_code'] = row['status_code']
+        return job
+
+    def cancel(self, job_id):
+        """Mark a queued or running job as cancelled; the runner stops its process"""
+        cursor = self._connect().execute(
+            'UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status IN (?, ?)',
+            (CANCELLED, time.time(), job_id, QUEUED, RUNNING)
+        )
+        return cursor.rowcount > 0
+
+    def task(self, job_id):
+        """Endpoint and payload of a job, as claim() returns them"""
+        row = self._connect().execute('SELECT id, endpoint, payload FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {'id': row['id'], 'endpoint': row['endpoint'], 'payload': json.loads(row['payload'])}
+
+    def set_progress(self, job_id, progress):
+        """Record partial progress (any JSON-serializable value) for a running job"""
+        self._connect().execute(
+            'UPDATE jobs SET progress = ? WHERE id = ?', (json.dumps(progress), job_id)
+        )
+
+    def finish(self, job_id, result, status_code):
+        status = DONE if status_code < 400 else FAILED
+        error = result.get('error') if isinstance(result, dict) else None
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, result = ?, status_code = ?, error = ?, finished = ? '
+            'WHERE id = ? AND status = ?',
+            (status, json.dumps(result), status_code, error, time.time(), job_id, RUNNING)
+        )
+
+    def fail(self, job_id, error):
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ? AND status = ?',
+            (FAILED, error, time.time(), job_id, RUNNING)
+        )
+
+    def claim(self):
+        """Atomically move the oldest queued job to running and return it"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id, endpoint, payload FROM jobs WHERE status = ? ORDER BY created LIMIT 1',
+                (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    'UPDATE jobs SET status = ?, started = ? WHERE id = ?',
+                    (RUNNING, time.time(), row['id'])
+                )
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return {'id': row['id'], 'endpoint': row['endpoint'], 'payload': json.loads(row['payload'])}
+
+    def set_pid(self, job_id, pid):
+        self._connect().execute('UPDATE jobs SET pid = ? WHERE id = ?', (pid, job_id))
+
+    def status(self, job_id):
+        row = self._connect().execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row['status'] if row else None
+
+    def requeue_orphans(self):
+        """Put back jobs left running by a runner that died"""
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, pid = NULL, started = NULL WHERE status = ?',
+            (QUEUED, RUNNING)
+        )
+
+    def counts(self):
+        """Return the number of jobs per status"""
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def prune(self, max_age=7 * 24 * 3600):
+        """Delete finished jobs older than max_age seconds"""
+        self._connect().execute(
+            'DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished < ?',
+            FINISHED_STATES + (time.time() - max_age,)
+        )
+
+
+def _execute_job(job_id):
+    """
+    Child process body: run the endpoint in-process and store its response.
+    Only the job id crosses the process boundary, so this works with the
+    spawn and forkserver start methods too (the app is imported here; after
+    a fork it is already loaded).
+    """
+    # The runner's SIGTERM handler is inherited on fork; cancellation needs the default
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    from app import app, job_queue as queue
+
+    job = queue.task(job_id)
+    if job is None:
+        return
+    try:
+        with app.test_client() as client:
+            payload = dict(job['payload'])
+            payload.pop('async', None)
+            response = client.post(job['endpoint'], json=payload, headers={'X-Job-Id': job['id']})
+            result = response.get_json(silent=True)
+            if result is None:
+                result = {'error': 'La respuesta del trabajo no es JSON'}
+            queue.finish(job['id'], result, response.status_code)
+    except Exception as e:
+        queue.fail(job['id'], f'Error en el trabajo: {str(e)}')
+
+
+def run_jobs(queue, poll_interval=0.5):
+    """
+    Runner loop: keep up to max_concurrency jobs running, stop cancelled or
+    timed-out jobs and reap finished child processes.
+    """
+    queue.requeue_orphans()
+    running = {}
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    last_prune = 0
+
+    while not stop.is_set():
+        for job_id, (process, started) in list(running.items()):
+            status = queue.status(job_id)
+            if not process.is_alive():
+                process.join()
+                if status == RUNNING:
+                    queue.fail(job_id, 'El proceso del trabajo terminó inesperadamente')
+                del running[job_id]
+            elif status == CANCELLED:
+                process.terminate()
+                process.join()
+                del running[job_id]
+            elif time.time() - started > queue.timeout:
+                process.terminate()
+                process.join()
+                queue.fail(job_id, 'El trabajo excedió el tiempo máximo de ejecución')
+                del running[job_id]
+
+        while len(running) < queue.max_concurrency:
+            job = queue.claim()
+            if job is None:
+                break
+            process = multiprocessing.Process(target=_execute_job, args=(job['id'],), daemon=True)
+            process.start()
+            queue.set_pid(job['id'], process.pid)
+            running[job['id']] = (process, time.time())
+
+        if time.time() - last_prune > 3600:
+            queue.prune()
+            last_prune = time.time()
+
+        stop.wait(poll_interval)
+
+    for process, _ in running.values():
+        process.terminate()
+
+
+def start_runner():
+    """
+    Start the job runner as a separate interpreter and return its Popen handle.
+    A fresh process (rather than a fork of the gunicorn master) keeps forked
+    HTTP workers from inheriting it as a multiprocessing child.
+    """
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__)], cwd=os.getcwd())
+
+
+class RunnerSupervisor:
+    """
+    Keep a job runner alive from the process that started it (the gunicorn
+    master): a thread checks it every interval seconds and starts a new one
+    when it has exited. The new runner requeues the jobs the old one left
+    running (requeue_orphans).
+    """
+
+    def __init__(self, interval=5.0, log=print):
+        self.interval = interval
+        self.log = log
+        self.restarts = 0
+        self.runner = start_runner()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name='job-runner-supervisor', daemon=True)
+        self._thread.start()
+
+    @property
+    def pid(self):
+        return self.runner.pid
+
+    def _watch(self):
+        while not self._done.wait(self.interval):
+            code = self.runner.poll()
+            if code is None:
+                continue
+            self.log(f'Job runner (pid {self.runner.pid}) exited with code {code}; restarting it')
+            self.runner = start_runner()
+            self.restarts += 1
+
+    def stop(self, timeout=10):
+        """Stop supervising and terminate the runner"""
+        self._done.set()
+        self._thread.join(timeout)
+        self.runner.terminate()
+        try:
+            self.runner.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.runner.kill()
+
+
+if __name__ == '__main__':
+    from app import job_queue, warm_up
+
+    warm_up()
+    run_jobs(job_queue)
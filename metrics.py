@@ -0,0 +1,197 @@
+"""
+Minimal Prometheus-format metrics shared by all gunicorn workers.
+
+Counter and histogram increments are buffered in-process and periodically
+flushed as deltas to a SQLite table, so a scrape served by any worker sees the
+totals of every worker. Gauges are computed at scrape time by registered
+collectors.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    inner = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in sorted(labels.items())
+    )
+    return '{' + inner + '}'
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+MEMORY_BUCKETS = tuple(2 ** n for n in range(16, 32, 2))  # 64 KiB .. 1 GiB
+
+
+def _sample_sort_key(sample):
+    """Order samples by name and labels, with histogram buckets in increasing le"""
+    name, labels, _ = sample
+    other = {k: v for k, v in labels.items() if k != 'le'}
+    le = labels.get('le')
+    return (json.dumps(other, sort_keys=True), name, float(le) if le is not None else 0.0)
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def process_rss_bytes():
+    """Resident set size of the current process, or 0 if it cannot be read"""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak in KiB on Linux (bytes on macOS); better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class MetricsRegistry:
+    """Counters and histograms aggregated across processes plus scrape-time gauges"""
+
+    def __init__(self, directory, flush_interval=5.0):
+        self.directory = directory
+        self.path = os.path.join(directory, 'metrics.sqlite3')
+        self.flush_interval = flush_interval
+        self._definitions = {}
+        self._buckets = {}
+        self._collectors = []
+        self._pending = {}
+        self._histogram_key_cache = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = time.time()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS samples ('
+            ' name TEXT NOT NULL,'
+            ' labels TEXT NOT NULL,'
+            ' value REAL NOT NULL,'
+            ' PRIMARY KEY (name, labels))'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def describe(self, name, metric_type, help_text, buckets=DEFAULT_BUCKETS):
+        """Declare a metric family (counter, gauge or histogram) with its help text"""
+        self._definitions[name] = (metric_type, help_text)
+        if metric_type == 'histogram':
+            self._buckets[name] = tuple(sorted(buckets))
+
+    def register_collector(self, collector):
+        """Add a callable returning [(name, labels, value), ...] evaluated at scrape time"""
+        self._collectors.append(collector)
+
+    def inc(self, name, labels=None, value=1):
+        """Increment a counter"""
+        key = (name, json.dumps(labels or {}, sort_keys=True))
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + value
+        self.maybe_flush()
+
+    def observe(self, name, value, labels=None):
+        """Record an observation in a histogram declared with describe()"""
+        sum_key, count_key, bucket_keys, inf_key = self._histogram_keys(name, labels or {})
+        updates = [(sum_key, value), (count_key, 1)]
+        updates.extend((key, 1) for bound, key in bucket_keys if value <= bound)
+        updates.append((inf_key, 1))
+
+        with self._lock:
+            for key, delta in updates:
+                self._pending[key] = self._pending.get(key, 0) + delta
+        self.maybe_flush()
+
+    def _histogram_keys(self, name, labels):
+        """Sample keys of a histogram's series for labels, encoded once per label set"""
+        cache_key = (name, tuple(sorted(labels.items())))
+        keys = self._histogram_key_cache.get(cache_key)
+        if keys is None:
+            encode = lambda sample_name, sample_labels: (sample_name, json.dumps(sample_labels, sort_keys=True))
+            bucket_keys = [(bound, encode(f'{name}_bucket', dict(labels, le=str(bound))))
+                           for bound in self._buckets[name]]
+            keys = self._histogram_key_cache[cache_key] = (
+                encode(f'{name}_sum', labels), encode(f'{name}_count', labels), bucket_keys,
+                encode(f'{name}_bucket', dict(labels, le='+Inf'))
+            )
+        return keys
+
+    def maybe_flush(self):
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered deltas to the shared database"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._last_flush = time.time()
+        if not pending:
+            return
+
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT INTO samples (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value) for (name, labels), value in pending.items()]
+            )
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            print(f"Metrics flush error: {str(e)}")
+            # Keep the deltas for the next flush
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + value
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        self.flush()
+        families = {}
+        for name, labels, value in self._connect().execute('SELECT name, labels, value FROM samples'):
+            families.setdefault(self._family(name), []).append((name, json.loads(labels), value))
+
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    families.setdefault(self._family(name), []).append((name, labels or {}, value))
+            except Exception as e:
+                print(f"Metrics collector error: {str(e)}")
+
+        lines = []
+        for family in sorted(families):
+            metric_type, help_text = self._definitions.get(family, ('untyped', ''))
+            if help_text:
+                lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {metric_type}')
+            for name, labels, value in sorted(families[family], key=_sample_sort_key):
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _family(self, name):
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in self._definitions:
+                return name[:-len(suffix)]
+        return name
@@ -0,0 +1,108 @@
+"""
+Persisted forecast models.
+
+A fitted exponential smoothing model is saved as a small JSON document: the
+smoothing parameters, the final level, trend and seasonal factors (see
+smoothing.py), and metadata about the series it was fitted on. Forecasting
+from it is a few vectorized operations over those states, so serving does
+not load the dataset or import statsmodels, and its cost does not depend on
+the length of the training series.
+
+Model ids are derived from the dataset version and the model specification,
+so refitting the same data yields the same id and a saved model never
+changes. Loaded models are kept in memory.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import smoothing
+
+MODEL_ID = re.compile(r'^[0-9a-f]{20}$')
+
+
+def model_from_state(model_id, state, meta):
+    """Compact, JSON-safe model of a smoothing state; meta describes the series and fit"""
+    return dict(
+        meta,
+        model_id=model_id,
+        params=state['params'],
+        level=state['level'],
+        trend=state['trend'],
+        season=state['season'].tolist() if state['season'] is not None else None
+    )
+
+
+class ModelStore:
+    """Directory of saved models with an in-memory cache of the most recently used"""
+
+    def __init__(self, directory, cache_size=1024):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, model_id):
+        return os.path.join(self.directory, f'{model_id}.json')
+
+    def exists(self, model_id):
+        return model_id in self._cache or os.path.exists(self._path(model_id))
+
+    def save(self, model):
+        """Write a model unless it is already saved; returns its id"""
+        model_id = model['model_id']
+        if self.exists(model_id):
+            return model_id
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f'{self._path(model_id)}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(model, fh, allow_nan=False)
+        os.replace(tmp, self._path(model_id))
+        return model_id
+
+    def load(self, model_id):
+        """Return a saved model (season as an array), or None. Callers must not modify it"""
+        with self._lock:
+            if model_id in self._cache:
+                self._cache.move_to_end(model_id)
+                return self._cache[model_id]
+        if not MODEL_ID.match(model_id or ''):
+            return None
+        try:
+            with open(self._path(model_id)) as fh:
+                model = json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+        if model['season'] is not None:
+            model['season'] = np.asarray(model['season'], dtype='float64')
+        with self._lock:
+            self._cache[model_id] = model
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return model
+
+
+def forecast(model, horizon):
+    """Point forecasts for the next horizon steps, and their dates when the series frequency is known"""
+    values = smoothing.forecast(model, horizon)
+    if not model.get('freq') or not model.get('last_date'):
+        return values, None
+
+    # Dates are the slow part: generate them once per model for the longest horizon asked
+    dates = model.get('_dates')
+    if dates is None or len(dates) < horizon:
+        offset = pd.tseries.frequencies.to_offset(model['freq'])
+        try:
+            index = pd.date_range(pd.Timestamp(model['last_date']) + offset, periods=horizon, freq=offset)
+        except (pd.errors.OutOfBoundsDatetime, OverflowError):
+            # Horizons reaching past the year 2262
+            return values, None
+        dates = model['_dates'] = np.datetime_as_string(index.values, unit='D').tolist()
+    return values, dates[:horizon]
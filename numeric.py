@@ -0,0 +1,107 @@
+"""
+Locale-aware parsing of numeric text columns.
+
+Spanish-locale exports write 1.234,56 (dot thousands, comma decimal) and
+often add currency symbols, so pandas reads those columns as text. The
+convention is detected once per file from a sample of the text columns and
+recorded as a number format ({'decimal', 'thousands', 'columns'}); the listed
+columns are then converted to float64 with vectorized string operations.
+Columns pandas already reads as numbers are left alone.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Currency symbols and ISO codes stripped before parsing
+CURRENCY = r'US\$|S/\.?|Bs\.?|[$€£¥₡₲]|\b(?:USD|EUR|MXN|COP|CLP|ARS|PEN|BOB|UYU|PYG|GTQ|CRC)\b'
+
+# Whole-value patterns per decimal separator, once currency and spaces are removed
+PATTERNS = {
+    ',': r'^[+-]?(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?$',
+    '.': r'^[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?$'
+}
+
+
+def _clean(values):
+    """Strip currency, spaces (thousands groups like '1 234') and accounting parentheses"""
+    text = values.astype('string').str.replace(CURRENCY, '', regex=True)
+    text = text.str.replace(r'\s', '', regex=True)
+    negative = text.str.match(r'^\(.*\)$', na=False)
+    text = text.where(~negative, '-' + text.str.slice(1, -1))
+    return text
+
+
+def detect_format(df, sample_size=200, threshold=0.9, prefer_comma=False):
+    """
+    Return the number format of df's numeric text columns, or None if there are none.
+
+    A column qualifies when at least threshold of its sampled values parse
+    under the file's convention. Values such as '1.234' fit both conventions;
+    the convention is decided by the values that fit only one, and by
+    prefer_comma (e.g. for ';'-delimited files) when every value is ambiguous.
+    """
+    samples = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            continue
+        sample = values.dropna().head(sample_size)
+        if sample.empty or pd.to_numeric(sample, errors='coerce').notna().all():
+            continue
+        samples[column] = _clean(sample).dropna()
+
+    votes = {',': 0, '.': 0}
+    for cleaned in samples.values():
+        comma = cleaned.str.match(PATTERNS[','])
+        dot = cleaned.str.match(PATTERNS['.'])
+        votes[','] += int((comma & ~dot).sum())
+        votes['.'] += int((dot & ~comma).sum())
+    if votes[','] != votes['.']:
+        decimal = ',' if votes[','] > votes['.'] else '.'
+    else:
+        decimal = ',' if prefer_comma else '.'
+
+    columns = [column for column, cleaned in samples.items()
+               if len(cleaned) and cleaned.str.match(PATTERNS[decimal]).mean() >= threshold]
+    if not columns:
+        return None
+    return {'decimal': decimal, 'thousands': '.' if decimal == ',' else ',', 'columns': [str(c) for c in columns]}
+
+
+def normalize(values, number_format):
+    """Convert a text column to float64 under number_format; unparseable values become NaN"""
+    text = _clean(values)
+    text = text.str.replace(number_format['thousands'], '', regex=False)
+    if number_format['decimal'] != '.':
+        text = text.str.replace(number_format['decimal'], '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype(np.float64)
+
+
+def parse_values(values, number_format=None):
+    """
+    Convert values given as numbers or as text to float64; values that are
+    not finite numbers become NaN. Text must be written in number_format (or
+    plain, without one), so '171.25' is rejected under a comma decimal
+    instead of being read as 17125.
+    """
+    values = pd.Series(values, dtype=object)
+    numbers = values.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)))
+    text = values.map(lambda v: isinstance(v, str))
+    parsed = pd.Series(np.nan, index=values.index, dtype=np.float64)
+    parsed[numbers] = values[numbers].astype(np.float64)
+    if text.any():
+        if number_format:
+            valid = _clean(values[text]).str.match(PATTERNS[number_format['decimal']]).fillna(False).astype(bool)
+            parsed[text] = normalize(values[text], number_format).where(valid)
+        else:
+            parsed[text] = pd.to_numeric(values[text].str.strip(), errors='coerce')
+    return parsed.where(np.isfinite(parsed))
+
+
+def apply_format(df, number_format):
+    """Convert the format's columns present in df (and still text) in place; records the format in df.attrs"""
+    for column in number_format['columns']:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = normalize(df[column], number_format)
+    df.attrs['number_format'] = number_format
+    return df
@@ -0,0 +1,231 @@
+"""
+CSV parser backends.
+
+read_csv_with_auto_delimiter sniffs the dialect on a few rows and then reads
+the whole file once through a backend: pyarrow's multithreaded CSV reader
+when pyarrow is installed, pandas' C parser otherwise. Both accept a column
+projection (usecols) so only the requested columns are decoded, and dtype
+hints (the dtypes recorded in the metadata sidecar) so nothing has to be
+inferred. Column names always come from pandas, so both backends name
+unnamed and duplicated columns the same way.
+"""
+
+import numpy as np
+import pandas as pd
+
+import ingest
+
+# Strings pandas reads as missing values; pyarrow is given the same list
+NA_VALUES = sorted(pd._libs.parsers.STR_NA_VALUES)
+
+# Sidecar dtypes usable as parse hints
+HINT_DTYPES = ('object', 'float64', 'int64', 'bool')
+
+
+def pyarrow_available():
+    try:
+        import pyarrow.csv  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def header_names(filepath, delimiter, encoding):
+    """Column names as pandas reads them ('Unnamed: 3', 'valor.1', ...)"""
+    return pd.read_csv(filepath, sep=delimiter, encoding=encoding, nrows=0).columns.tolist()
+
+
+class PandasBackend:
+    """pandas' single-threaded C parser"""
+
+    name = 'pandas'
+
+    def read_csv(self, filepath, delimiter, encoding, usecols=None, dtype=None):
+        if dtype:
+            dtype = {column: str if kind == 'object' else kind for column, kind in dtype.items()
+                     if kind in HINT_DTYPES and (usecols is None or column in usecols)}
+        return pd.read_csv(filepath, sep=delimiter, encoding=encoding, usecols=usecols, dtype=dtype or None)
+
+
+class ArrowBackend:
+    """pyarrow's multithreaded CSV reader, converted to a pandas DataFrame"""
+
+    name = 'pyarrow'
+
+    def __init__(self, block_size=4 << 20):
+        self.block_size = block_size
+
+    def read_csv(self, filepath, delimiter, encoding, usecols=None, dtype=None):
+        import pyarrow as pa
+        from pyarrow import csv
+
+        names = header_names(filepath, delimiter, encoding)
+        columns = [c for c in names if usecols is None or c in usecols]
+        column_types = {column: self._arrow_type(pa, kind) for column, kind in (dtype or {}).items()
+                        if column in columns and self._arrow_type(pa, kind) is not None}
+        read_options = csv.ReadOptions(column_names=names, skip_rows=1, encoding=encoding or 'utf8',
+                                       use_threads=True, block_size=self.block_size)
+        parse_options = csv.ParseOptions(delimiter=delimiter)
+
+        if len(column_types) < len(columns):
+            # Inferred dates would come back as date objects; pandas keeps them as strings
+            with self._open(pa, filepath) as source:
+                schema = csv.open_csv(source, read_options=read_options, parse_options=parse_options).schema
+            for field in schema:
+                if field.name in columns and field.name not in column_types and pa.types.is_temporal(field.type):
+                    column_types[field.name] = pa.string()
+
+        convert_options = csv.ConvertOptions(
+            include_columns=columns, column_types=column_types, null_values=NA_VALUES,
+            strings_can_be_null=True, quoted_strings_can_be_null=True
+        )
+        with self._open(pa, filepath) as source:
+            table = csv.read_csv(source, read_options=read_options, parse_options=parse_options,
+                                 convert_options=convert_options)
+
+        # Empty columns: pandas reads them as float NaN
+        empty = [field.name for field in table.schema if pa.types.is_null(field.type)]
+        # self_destruct frees each arrow column once converted; the table is unusable afterwards
+        df = table.to_pandas(self_destruct=True)
+        for column in empty:
+            df[column] = np.nan
+        return df
+
+    @staticmethod
+    def _open(pa, filepath):
+        """Binary stream of the file's data; gzip, bz2 and zstd are decompressed by arrow itself"""
+        _, compression = ingest.split_compression(filepath)
+        if compression in (None, 'gzip', 'bz2', 'zstd'):
+            return pa.input_stream(filepath, compression=compression)
+        return ingest.open_source(filepath)
+
+    @staticmethod
+    def _arrow_type(pa, kind):
+        return {'object': pa.string(), 'float64': pa.float64(), 'int64': pa.int64(), 'bool': pa.bool_()}.get(kind)
+
+
+def get_backend(name='auto'):
+    """Backend by name; 'auto' picks pyarrow when it is installed"""
+    if name == 'pyarrow' or (name == 'auto' and pyarrow_available()):
+        return ArrowBackend()
+    return PandasBackend()
+
+
+class RejectedHints(ValueError):
+    """The data contradicts a dtype hint (e.g. a sidecar recording int64 for '1.0')"""
+
+
+def read_csv(backend, filepath, delimiter, encoding, usecols=None, dtype=None):
+    """
+    Read with backend, falling back to pandas for input pyarrow rejects
+    (ragged rows and the like). When the data contradicts the dtype hints,
+    the file is read once more with the same backend and no hints, and the
+    frame is marked with df.attrs['rejected_hints'] so the caller can store
+    the corrected dtypes.
+    """
+    try:
+        return _read_csv(backend, filepath, delimiter, encoding, usecols, dtype)
+    except RejectedHints as e:
+        print(f"dtype hints rejected for {filepath}, reading without them: {str(e)}")
+    df = _read_csv(backend, filepath, delimiter, encoding, usecols, None)
+    df.attrs['rejected_hints'] = True
+    return df
+
+
+def _read_csv(backend, filepath, delimiter, encoding, usecols, dtype):
+    if backend.name == 'pyarrow':
+        import pyarrow as pa
+        try:
+            return backend.read_csv(filepath, delimiter, encoding, usecols, dtype)
+        except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+            message = str(e).splitlines()[0]
+            if dtype and 'CSV conversion error' in message:
+                raise RejectedHints(message) from e
+            print(f"pyarrow could not parse {filepath}, using pandas: {message}")
+    try:
+        return PandasBackend().read_csv(filepath, delimiter, encoding, usecols, dtype)
+    except (ValueError, OverflowError) as e:
+        if not dtype or isinstance(e, (pd.errors.ParserError, UnicodeError)):
+            raise
+        raise RejectedHints(str(e)) from e
+
+
+# Excel workbooks
+#
+# pd.read_excel converts every cell of the sheet into Python objects on each
+# call. read_excel streams the rows of one sheet with openpyxl in read-only
+# mode, converts only the cells in the column range of usecols, and hands the
+# rows to pandas' TextParser, the same step read_excel ends with, so names
+# and dtypes match pd.read_excel.
+
+def excel_sheet_names(filepath):
+    """Worksheet names of a workbook, in order"""
+    if filepath.lower().endswith('.xls'):
+        import xlrd
+        book = xlrd.open_workbook(filepath, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+
+    import openpyxl
+    book = openpyxl.load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    try:
+        return book.sheetnames
+    finally:
+        book.close()
+
+
+def _excel_value(value, error_codes):
+    """Cell value as pandas' openpyxl reader converts it"""
+    if value is None:
+        return ''
+    if type(value) is float:
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str) and value in error_codes:
+        return np.nan
+    return value
+
+
+def read_excel(filepath, sheet=None, usecols=None):
+    """One sheet (the first by default) of a workbook as a DataFrame, decoding only usecols"""
+    if filepath.lower().endswith('.xls'):
+        # xlrd has no streaming mode
+        return pd.read_excel(filepath, sheet_name=sheet if sheet is not None else 0, usecols=usecols)
+
+    import openpyxl
+    from openpyxl.cell.cell import ERROR_CODES
+    from pandas.io.parsers import TextParser
+
+    book = openpyxl.load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = book[sheet] if sheet is not None else book.worksheets[0]
+        # Read-only sheets trust the stored dimensions, which are often wrong
+        worksheet.reset_dimensions()
+
+        min_col = max_col = None
+        if usecols:
+            header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+            positions = [i for i, value in enumerate(header) if value in usecols]
+            # Columns named by pandas ('Unnamed: 3', 'valor.1') need the full header
+            if len({header[i] for i in positions}) == len(set(usecols)):
+                min_col, max_col = min(positions) + 1, max(positions) + 1
+
+        data = []
+        last_row_with_data = -1
+        for values in worksheet.iter_rows(min_col=min_col, max_col=max_col, values_only=True):
+            row = [_excel_value(value, ERROR_CODES) for value in values]
+            while row and row[-1] == '':
+                row.pop()
+            if row:
+                last_row_with_data = len(data)
+            data.append(row)
+    finally:
+        book.close()
+
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [''] * (width - len(row)) for row in data]
+    return TextParser(data, header=0, usecols=usecols).read()
@@ -0,0 +1,96 @@
+"""
+On-demand request profiling.
+
+A request carrying the profiling token runs under cProfile; the stats are
+saved as a pstats file (readable with pstats, snakeviz or gprof2dot) next to
+a small JSON summary with the slowest functions. Requests that do not ask
+for a profile are not affected.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+
+
+class ProfileStore:
+    """Directory of saved request profiles, keeping the most recent ones"""
+
+    def __init__(self, directory, keep=50):
+        self.directory = directory
+        self.keep = keep
+
+    def start(self):
+        """Return a running profiler"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def save(self, profiler, meta, top=25):
+        """Stop the profiler, write <id>.prof and <id>.json and return the id"""
+        profiler.disable()
+        profile_id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:8]
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, f'{profile_id}.prof'))
+
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        functions = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            functions.append({
+                'function': f'{name} ({os.path.basename(filename)}:{line})',
+                'calls': calls,
+                'tottime': round(tottime, 6),
+                'cumtime': round(cumtime, 6)
+            })
+        functions.sort(key=lambda f: f['cumtime'], reverse=True)
+
+        summary = dict(meta, id=profile_id, created=time.time(),
+                       total_time=round(stats.total_tt, 6), top_functions=functions[:top])
+        with open(os.path.join(self.directory, f'{profile_id}.json'), 'w') as fh:
+            json.dump(summary, fh)
+
+        self._prune()
+        return profile_id
+
+    def list(self, limit=20):
+        """Return the summaries of the most recent profiles, newest first"""
+        summaries = []
+        for name in sorted(self._ids(), reverse=True)[:limit]:
+            try:
+                with open(os.path.join(self.directory, f'{name}.json')) as fh:
+                    summary = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            summary.pop('top_functions', None)
+            summaries.append(summary)
+        return summaries
+
+    def path(self, profile_id):
+        """Return the pstats file for a profile id, or None if it does not exist"""
+        if profile_id not in self._ids():
+            return None
+        return os.path.join(self.directory, f'{profile_id}.prof')
+
+    def summary(self, profile_id):
+        if profile_id not in self._ids():
+            return None
+        with open(os.path.join(self.directory, f'{profile_id}.json')) as fh:
+            return json.load(fh)
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return set()
+        return {name[:-len('.json')] for name in names if name.endswith('.json')}
+
+    def _prune(self):
+        for profile_id in sorted(self._ids(), reverse=True)[self.keep:]:
+            for ext in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + ext))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,199 @@
+"""
+Persistent result store for computed artifacts.
+
+Stores prepared series, decompositions, fitted parameters and serialized
+figures in a SQLite database under a configurable directory, so results
+survive gunicorn worker recycling and are shared by every worker process.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+
+# Pickles start with b'\x80'; compressed blobs carry this prefix instead
+COMPRESSED_PREFIX = b'Z'
+
+
+def make_key(*parts):
+    """Build a stable cache key from JSON-serializable parts"""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(filepath):
+    """Fingerprint a file by path, size and modification time"""
+    stat = os.stat(filepath)
+    return make_key(os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns)
+
+
+class ResultStore:
+    """
+    Size-bounded key/value store backed by SQLite.
+
+    SQLite in WAL mode handles locking between worker processes; each
+    process (and thread) opens its own connection after fork. The total size
+    is kept in a one-row usage table, updated in the same transaction as each
+    write; when it exceeds max_bytes the least recently used entries are
+    evicted before that transaction commits.
+    Values whose pickle is larger than compress_min_bytes (prepared frames,
+    serialized figures) are stored zlib-compressed.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, compress_min_bytes=64 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.path = os.path.join(directory, 'results.sqlite3')
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        # Optional callback(hit) for metrics
+        self.on_lookup = None
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' key TEXT PRIMARY KEY,'
+            ' kind TEXT NOT NULL,'
+            ' value BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' accessed REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        conn.execute('CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)')
+        # Stores created before the usage table existed are counted once
+        conn.execute('INSERT OR IGNORE INTO usage (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM results')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        """Return the stored value for key, or default if missing"""
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._record(False)
+                return default
+            conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+            self._record(True)
+            blob = row[0]
+            if blob[:1] == COMPRESSED_PREFIX:
+                blob = zlib.decompress(blob[1:])
+            return pickle.loads(blob)
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, zlib.error) as e:
+            print(f"Result store read error: {str(e)}")
+            self._record(False)
+            return default
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.on_lookup is not None:
+            self.on_lookup(hit)
+
+    def set(self, key, value, kind='artifact'):
+        """Store value under key and evict old entries if over budget"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.compress_min_bytes is not None and len(blob) >= self.compress_min_bytes:
+            # Level 1: most of the size reduction at a fraction of the CPU cost
+            blob = COMPRESSED_PREFIX + zlib.compress(blob, 1)
+        if len(blob) > self.max_bytes:
+            return False
+
+        now = time.time()
+        try:
+            conn = self._connect()
+            with self._transaction(conn):
+                self._remove(conn, key)
+                conn.execute(
+                    'INSERT INTO results (key, kind, value, size, created, accessed) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, kind, blob, len(blob), now, now)
+                )
+                conn.execute('UPDATE usage SET bytes = bytes + ? WHERE id = 0', (len(blob),))
+                self._evict(conn)
+            return True
+        except sqlite3.Error as e:
+            print(f"Result store write error: {str(e)}")
+            return False
+
+    def delete(self, key):
+        """Remove a single entry"""
+        try:
+            conn = self._connect()
+            with self._transaction(conn):
+                self._remove(conn, key)
+        except sqlite3.Error as e:
+            print(f"Result store delete error: {str(e)}")
+
+    def clear(self):
+        """Remove every entry"""
+        conn = self._connect()
+        with self._transaction(conn):
+            conn.execute('DELETE FROM results')
+            conn.execute('UPDATE usage SET bytes = 0 WHERE id = 0')
+
+    @contextmanager
+    def _transaction(self, conn):
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front so the usage total cannot race"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _remove(conn, key):
+        """Delete key and its size from the usage total; call inside a transaction"""
+        row = conn.execute('SELECT size FROM results WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            conn.execute('DELETE FROM results WHERE key = ?', (key,))
+            conn.execute('UPDATE usage SET bytes = bytes - ? WHERE id = 0', (row[0],))
+
+    def _evict(self, conn, batch=64):
+        """Drop least recently used entries until the store fits in max_bytes; call inside a transaction"""
+        total = conn.execute('SELECT bytes FROM usage WHERE id = 0').fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute('SELECT key, size FROM results ORDER BY accessed ASC LIMIT ?', (batch,)).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                total -= size
+        conn.execute('UPDATE usage SET bytes = ? WHERE id = 0', (max(total, 0),))
+
+    def stats(self):
+        """Return entry count, total size and per-process hit/miss counters"""
+        conn = self._connect()
+        entries = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        total = conn.execute('SELECT bytes FROM usage WHERE id = 0').fetchone()[0]
+        return {
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,167 @@
+"""
+Shared-memory registry for parsed dataset arrays.
+
+Arrays are written once as .npy files under /dev/shm (or a configured
+directory) and every gunicorn worker attaches them with read-only memory
+maps, so a dataset is held in RAM once instead of once per worker.
+
+Layout: <directory>/<dataset>/<version>/<entry>/{manifest.json, <array>.npy}
+The version is the file fingerprint, so a re-uploaded dataset gets a new
+version and the previous ones are removed.
+
+Each process keeps a bounded LRU of attached maps. A cached map is checked
+against its manifest on every access, so once any worker removes an entry
+(a new version, release() or the size budget) every other worker drops its
+map on next use and the memory is actually returned.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+
+def default_directory():
+    """Prefer /dev/shm (tmpfs) and fall back to the system temp directory"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'timeseries_dashboard')
+
+
+class SharedArrayRegistry:
+    """Publish and attach zero-copy NumPy views shared between processes"""
+
+    def __init__(self, directory=None, max_bytes=2 * 1024 * 1024 * 1024, max_attached=64):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.max_attached = max_attached
+        # (dataset, version, entry) -> (arrays, meta, manifest inode), least recently used first
+        self._attached = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry_path(self, dataset, version, entry):
+        return os.path.join(self.directory, dataset, version, entry)
+
+    def attach(self, dataset, version, entry):
+        """Return (arrays, meta) as read-only memory maps, or (None, None) if not published"""
+        cache_key = (dataset, version, entry)
+        path = self._entry_path(dataset, version, entry)
+        manifest_path = os.path.join(path, 'manifest.json')
+        with self._lock:
+            cached = self._attached.get(cache_key)
+            if cached is not None:
+                # Removed or republished by another process: drop the stale map
+                try:
+                    current = os.stat(manifest_path).st_ino
+                except OSError:
+                    current = None
+                if current == cached[2]:
+                    self._attached.move_to_end(cache_key)
+                    return cached[0], cached[1]
+                del self._attached[cache_key]
+
+        try:
+            with open(manifest_path) as fh:
+                manifest = json.load(fh)
+                inode = os.fstat(fh.fileno()).st_ino
+            arrays = {
+                name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                for name in manifest['arrays']
+            }
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+        meta = manifest.get('meta', {})
+        with self._lock:
+            # Drop views of older versions held by this process
+            for key in [k for k in self._attached if k[0] == dataset and k[1] != version]:
+                del self._attached[key]
+            self._attached[cache_key] = (arrays, meta, inode)
+            while len(self._attached) > self.max_attached:
+                self._attached.popitem(last=False)
+        return arrays, meta
+
+    def publish(self, dataset, version, entry, arrays, meta=None):
+        """Write arrays once and return attached read-only views"""
+        dataset_dir = os.path.join(self.directory, dataset)
+        final_path = self._entry_path(dataset, version, entry)
+
+        if not os.path.exists(final_path):
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            tmp_path = os.path.join(dataset_dir, f'.tmp-{os.getpid()}-{uuid.uuid4().hex}')
+            os.makedirs(tmp_path)
+            try:
+                for name, array in arrays.items():
+                    np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(array))
+                with open(os.path.join(tmp_path, 'manifest.json'), 'w') as fh:
+                    json.dump({'arrays': list(arrays), 'meta': meta or {}, 'created': time.time()}, fh)
+                os.rename(tmp_path, final_path)
+            except OSError:
+                # Another worker published the same entry first
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self._remove_stale_versions(dataset, version)
+        self._enforce_budget()
+        return self.attach(dataset, version, entry)
+
+    def release(self, dataset):
+        """Remove every published version of a dataset (e.g. after re-upload)"""
+        with self._lock:
+            for key in [k for k in self._attached if k[0] == dataset]:
+                del self._attached[key]
+        shutil.rmtree(os.path.join(self.directory, dataset), ignore_errors=True)
+
+    def purge(self):
+        """Remove all shared arrays"""
+        with self._lock:
+            self._attached.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _remove_stale_versions(self, dataset, version):
+        # Unlinking is safe while other processes still map the files:
+        # their views stay valid until they are dropped.
+        dataset_dir = os.path.join(self.directory, dataset)
+        for name in os.listdir(dataset_dir):
+            if name != version and not name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(dataset_dir, name), ignore_errors=True)
+
+    def _enforce_budget(self):
+        """Remove least recently published datasets while over max_bytes"""
+        usage = []
+        total = 0
+        for dataset in os.listdir(self.directory):
+            dataset_dir = os.path.join(self.directory, dataset)
+            size = 0
+            try:
+                for root, _, files in os.walk(dataset_dir):
+                    size += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+                usage.append((os.path.getmtime(dataset_dir), dataset, size))
+            except OSError:
+                # Released concurrently by another worker
+                continue
+            total += size
+
+        for _, dataset, size in sorted(usage):
+            if total <= self.max_bytes:
+                break
+            self.release(dataset)
+            total -= size
+
+    def stats(self):
+        """Return the number of published datasets and their total size"""
+        total = 0
+        datasets = 0
+        if os.path.isdir(self.directory):
+            for dataset in os.listdir(self.directory):
+                datasets += 1
+                try:
+                    for root, _, files in os.walk(os.path.join(self.directory, dataset)):
+                        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+                except OSError:
+                    continue
+        return {'datasets': datasets, 'bytes': total, 'max_bytes': self.max_bytes}
@@ -0,0 +1,117 @@
+"""
+Single-flight coalescing of identical concurrent computations.
+
+The first caller for a key computes the value; concurrent callers with the
+same key wait and share it. Within a process this uses an in-memory event per
+key. Across gunicorn workers an exclusive fcntl lock on a per-key lock file
+elects the leader, and followers pick the result up from the shared result
+store once the lock is released. Followers give up waiting after timeout
+(keep it below the gunicorn worker timeout) and compute the value themselves.
+"""
+
+import fcntl
+import hashlib
+import os
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent computations of the same key within and across processes"""
+
+    def __init__(self, lock_dir, timeout=20):
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def run(self, key, lookup, compute):
+        """
+        Return lookup() if it has a value, otherwise compute() exactly once
+        among concurrent callers. compute is expected to publish its result
+        where lookup can find it (e.g. the result store).
+        """
+        value = lookup()
+        if value is not None:
+            return value
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                return compute()
+            self.coalesced += 1
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._run_locked(key, lookup, compute)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run_locked(self, key, lookup, compute):
+        """Hold the cross-process lock for key while computing"""
+        os.makedirs(self.lock_dir, exist_ok=True)
+        path = os.path.join(self.lock_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.lock")
+
+        fh = self._acquire(path)
+        if fh is None:
+            return compute()
+        try:
+            # Another worker may have finished while we waited
+            value = lookup()
+            if value is not None:
+                self.coalesced += 1
+                return value
+            return compute()
+        finally:
+            # Unlinked while still locked, so waiters holding the old file retry on a new one
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            fcntl.flock(fh, fcntl.LOCK_UN)
+            fh.close()
+
+    def _acquire(self, path):
+        """Wait up to timeout for the lock on path; returns the locked file, or None on timeout"""
+        deadline = time.time() + self.timeout
+        delay = 0.01
+        while True:
+            fh = open(path, 'a')
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                try:
+                    if os.stat(path).st_ino == os.fstat(fh.fileno()).st_ino:
+                        return fh
+                except FileNotFoundError:
+                    pass
+                # The previous holder removed this file; lock the current one instead
+                fcntl.flock(fh, fcntl.LOCK_UN)
+                fh.close()
+                continue
+            except BlockingIOError:
+                fh.close()
+            if time.time() >= deadline:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
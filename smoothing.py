@@ -0,0 +1,105 @@
+"""
+Incremental exponential smoothing state.
+
+A fitted Holt-Winters model is reduced to its smoothing parameters and its
+last level, trend and seasonal factors. New observations advance that
+state with the same recursions statsmodels uses, one step per point, so a
+few appended rows update a model without refitting it on the whole series.
+The one-step-ahead predictions made along the way extend the fitted values.
+
+States are plain dicts (they are pickled into the result store):
+    params    alpha, beta, gamma, trend ('add', 'mul' or None), seasonal
+              ('add', 'mul' or None), seasonal_periods
+    level, trend
+    season    the last seasonal_periods factors, oldest first: season[0]
+              applies to the next observation
+    fitted    one-step-ahead predictions, one per observation
+    nobs      observations seen; refit_nobs the count at the last full fit
+"""
+
+import numpy as np
+
+
+def from_results(results, trend=None, seasonal=None, seasonal_periods=None):
+    """State at the end of a statsmodels HoltWintersResults"""
+    params = results.params
+    m = seasonal_periods if seasonal else 0
+    fitted = np.asarray(results.fittedvalues, dtype='float64')
+    return {
+        'params': {
+            'alpha': float(params['smoothing_level']),
+            'beta': float(params['smoothing_trend']) if trend else None,
+            'gamma': float(params['smoothing_seasonal']) if seasonal else None,
+            'trend': trend,
+            'seasonal': seasonal,
+            'seasonal_periods': m or None
+        },
+        'level': float(np.asarray(results.level)[-1]),
+        'trend': float(np.asarray(results.trend)[-1]) if trend else None,
+        'season': np.asarray(results.season, dtype='float64')[-m:].copy() if m else None,
+        'fitted': fitted,
+        'nobs': len(fitted),
+        'refit_nobs': len(fitted)
+    }
+
+
+def _combine(level, trend, kind, steps=1):
+    if kind == 'add':
+        return level + steps * trend
+    if kind == 'mul':
+        return level * trend ** steps
+    return level
+
+
+def advance(state, values):
+    """Return a new state after observing values (in order)"""
+    p = state['params']
+    alpha, beta, gamma = p['alpha'], p['beta'], p['gamma']
+    level, trend = state['level'], state['trend']
+    season = list(state['season']) if p['seasonal'] else None
+    predictions = np.empty(len(values), dtype='float64')
+
+    for i, y in enumerate(np.asarray(values, dtype='float64')):
+        base = _combine(level, trend, p['trend'])
+        if p['seasonal'] == 'add':
+            s = season.pop(0)
+            predictions[i] = base + s
+            new_level = alpha * (y - s) + (1 - alpha) * base
+        elif p['seasonal'] == 'mul':
+            s = season.pop(0)
+            predictions[i] = base * s
+            new_level = alpha * (y / s) + (1 - alpha) * base
+        else:
+            predictions[i] = base
+            new_level = alpha * y + (1 - alpha) * base
+
+        if p['trend'] == 'add':
+            trend = beta * (new_level - level) + (1 - beta) * trend
+        elif p['trend'] == 'mul':
+            trend = beta * (new_level / level) + (1 - beta) * trend
+
+        if p['seasonal'] == 'add':
+            season.append(gamma * (y - base) + (1 - gamma) * s)
+        elif p['seasonal'] == 'mul':
+            season.append(gamma * (y / base) + (1 - gamma) * s)
+        level = new_level
+
+    return dict(
+        state,
+        level=level,
+        trend=trend,
+        season=np.array(season) if season is not None else None,
+        fitted=np.concatenate([state['fitted'], predictions]),
+        nobs=state['nobs'] + len(predictions)
+    )
+
+
+def forecast(state, steps):
+    """Point forecasts for the next steps observations"""
+    p = state['params']
+    horizon = np.arange(1, steps + 1)
+    base = _combine(state['level'], state['trend'], p['trend'], horizon)
+    if not p['seasonal']:
+        return np.asarray(base, dtype='float64') * np.ones(steps)
+    factors = state['season'][(horizon - 1) % p['seasonal_periods']]
+    return base + factors if p['seasonal'] == 'add' else base * factors
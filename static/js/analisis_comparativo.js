@@ -150,6 +150,12 @@ async function executeComparativeAnalysis() {
         return;
     }
     
+    // Stream results method by method when the browser supports Server-Sent Events
+    if (window.EventSource) {
+        streamComparativeAnalysis(dateColumn, valueColumn);
+        return;
+    }
+    
     showLoading(true);
     
     try {
@@ -165,7 +171,7 @@ async function executeComparativeAnalysis() {
             })
         });
         
-        const result = await response.json();
+        const result = await resolveJobResult(await response.json());
         
         if (result.success) {
             currentData.results = result;
@@ -181,6 +187,84 @@ async function executeComparativeAnalysis() {
     }
 }
 
+function streamComparativeAnalysis(dateColumn, valueColumn) {
+    const params = new URLSearchParams({
+        filename: currentData.filename,
+        date_column: dateColumn,
+        value_column: valueColumn
+    });
+    const source = new EventSource(`/comparative_analysis/stream?${params}`);
+    const results = { success: true };
+    let finished = false;
+    
+    showLoading(true);
+    
+    // Render each method as soon as it arrives (cheapest first)
+    source.addEventListener('exponential', event => {
+        results.exponential = JSON.parse(event.data);
+        displayExponentialResults(results.exponential);
+        showAnalysisStep();
+    });
+    
+    source.addEventListener('holt', event => {
+        results.holt = JSON.parse(event.data);
+        displayHoltResults(results.holt);
+    });
+    
+    source.addEventListener('winter', event => {
+        results.winter = JSON.parse(event.data);
+        displayWinterResults(results.winter);
+    });
+    
+    source.addEventListener('comparison', event => {
+        results.comparison_plot = JSON.parse(event.data);
+        currentData.results = results;
+        displayComparisonResults(results);
+    });
+    
+    // Too expensive to stream inline: the server queued it as a background job
+    source.addEventListener('queued', async event => {
+        finished = true;
+        source.close();
+        try {
+            const result = await resolveJobResult(JSON.parse(event.data));
+            if (result.success) {
+                currentData.results = result;
+                showAnalysisResults(result);
+                showAnalysisStep();
+            } else {
+                showAlert(result.error, 'danger');
+            }
+        } catch (error) {
+            showAlert('Error en el análisis: ' + error.message, 'danger');
+        } finally {
+            showLoading(false);
+        }
+    });
+    
+    source.addEventListener('done', () => {
+        finished = true;
+        source.close();
+        showLoading(false);
+    });
+    
+    source.addEventListener('analysis_error', event => {
+        finished = true;
+        source.close();
+        showLoading(false);
+        showAlert(JSON.parse(event.data).error, 'danger');
+    });
+    
+    source.onerror = () => {
+        if (finished) {
+            return;
+        }
+        source.close();
+        showLoading(false);
+        showAlert('Error en el análisis: se interrumpió la conexión con el servidor', 'danger');
+    };
+}
+
 function showAnalysisResults(results) {
     // Show exponential smoothing results
     displayExponentialResults(results.exponential);
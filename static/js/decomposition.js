@@ -173,7 +173,7 @@ async function analyzeTimeSeries() {
             })
         });
         
-        const result = await response.json();
+        const result = await resolveJobResult(await response.json());
         
         if (result.success) {
             currentData.modelType = result.model_type;
@@ -257,7 +257,7 @@ async function generateForecast() {
             })
         });
         
-        const result = await response.json();
+        const result = await resolveJobResult(await response.json());
         
         if (result.success) {
             showForecastResults(result);
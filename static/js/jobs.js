@@ -0,0 +1,25 @@
+// Background jobs - shared helper for analyses that the server runs as jobs
+
+async function resolveJobResult(result) {
+    // Expensive analyses come back as a queued job instead of a result
+    if (!result || !result.job_id || result.status !== 'queued') {
+        return result;
+    }
+    
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        
+        const response = await fetch(`/jobs/${result.job_id}`);
+        const job = await response.json();
+        
+        if (!response.ok) {
+            return job;
+        }
+        if (job.status === 'done' || job.status === 'failed') {
+            return job.result || { error: job.error };
+        }
+        if (job.status === 'cancelled') {
+            return { error: 'El análisis fue cancelado' };
+        }
+    }
+}
@@ -137,7 +137,7 @@ async function generateBasicPlot() {
             })
         });
         
-        const result = await response.json();
+        const result = await resolveJobResult(await response.json());
         
         if (result.success) {
             showBasicPlotResults(result);
@@ -213,7 +213,7 @@ async function generateLagPlots() {
             })
         });
         
-        const result = await response.json();
+        const result = await resolveJobResult(await response.json());
         
         if (result.success) {
             showLagPlotsResults(result);
@@ -0,0 +1,350 @@
+"""
+Online exponential smoothing of live series.
+
+StreamTable keeps the smoothing state of many series as a struct of arrays:
+one memory-mapped array per field (parameters, level, trend, ...) with a row
+per stream, and a (capacity, max_period) matrix of seasonal factors used as
+a ring buffer per row. The arrays live in shared memory, so every gunicorn
+worker serves the same streams without copying them.
+
+Stream ids carry their row: the first 8 hex digits are the slot and the
+rest are random, checked against the id stored in the row. Any worker finds
+a stream's row without a search, and an observation is an O(1) update of
+that row with the recursions of smoothing.advance. Rows of removed streams
+go on a free stack, so registering does not search for a row either. A
+micro-batch spanning many streams is applied in rounds of one observation
+per stream, each round a handful of vectorized NumPy operations over the
+rows involved. Writers hold an exclusive fcntl lock on the table, readers a
+shared one.
+"""
+
+import fcntl
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+import smoothing
+
+# 8 hex digits of slot, 24 random
+STREAM_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# Encoding of the component types in the trend_kind and seasonal_kind arrays
+KINDS = (None, 'add', 'mul')
+
+FIELDS = {
+    'ids': 'S32',
+    'used': 'bool',
+    'trend_kind': 'int8',
+    'seasonal_kind': 'int8',
+    'period': 'int16',
+    'phase': 'int16',  # column of season holding the factor for the next observation
+    'alpha': 'float64',
+    'beta': 'float64',
+    'gamma': 'float64',
+    'level': 'float64',
+    'trend': 'float64',
+    'nobs': 'int64',  # observations pushed since registration
+    'sse': 'float64',  # sum of squared one-step errors of those observations
+    'updated': 'float64'
+}
+
+
+def default_directory():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'timeseries_dashboard_streams')
+
+
+class StreamError(Exception):
+    """Invalid stream request; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class StreamTable:
+    """Smoothing states of live series in shared struct-of-arrays storage"""
+
+    def __init__(self, directory=None, capacity=65536, max_period=52, idle_seconds=24 * 3600):
+        self.directory = directory or default_directory()
+        self.capacity = capacity
+        self.max_period = max_period
+        # Streams idle this long are reclaimed when the table is full
+        self.idle_seconds = idle_seconds
+        self._arrays = None
+        self._open_lock = threading.Lock()
+
+    # Storage
+
+    @contextmanager
+    def _locked(self, exclusive=True, name='table.lock'):
+        # A lock file per call: flock does not exclude threads sharing a descriptor
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _shapes(self):
+        shapes = {name: (np.dtype(dtype), (self.capacity,)) for name, dtype in FIELDS.items()}
+        shapes['season'] = (np.dtype('float64'), (self.capacity, self.max_period))
+        # Stack of removed rows, and [rows on it, rows handed out so far]
+        shapes['free'] = (np.dtype('int32'), (self.capacity,))
+        shapes['allocation'] = (np.dtype('int64'), (2,))
+        return shapes
+
+    @property
+    def arrays(self):
+        """Field name -> writable memory map, created on first use"""
+        if self._arrays is None:
+            with self._open_lock, self._locked(name='open.lock'):
+                if self._arrays is None:
+                    self._arrays = self._open()
+        return self._arrays
+
+    def _open(self):
+        arrays = {}
+        for name, (dtype, shape) in self._shapes().items():
+            path = os.path.join(self.directory, f'{name}.npy')
+            try:
+                array = np.load(path, mmap_mode='r+')
+                if array.dtype != dtype or array.shape != shape:
+                    print(f"Stream table field {name} has shape {array.shape}, expected {shape}; recreating")
+                    raise ValueError(name)
+            except (OSError, ValueError):
+                # A table with another layout cannot be reused: start empty
+                for stale in os.listdir(self.directory):
+                    if stale.endswith('.npy'):
+                        os.remove(os.path.join(self.directory, stale))
+                return {name: np.lib.format.open_memmap(os.path.join(self.directory, f'{name}.npy'),
+                                                        mode='w+', dtype=dtype, shape=shape)
+                        for name, (dtype, shape) in self._shapes().items()}
+            arrays[name] = array
+        return arrays
+
+    def _slot(self, stream_id):
+        """Row of stream_id, or None"""
+        if not isinstance(stream_id, str) or not STREAM_ID.match(stream_id):
+            return None
+        slot = int(stream_id[:8], 16)
+        a = self.arrays
+        if slot >= self.capacity or not a['used'][slot] or a['ids'][slot] != stream_id.encode('ascii'):
+            return None
+        return slot
+
+    def _free_slot(self):
+        """Row for a new stream: a removed one, one never used, or the longest idle if the table is full"""
+        a = self.arrays
+        allocation = a['allocation']
+        if allocation[0]:
+            allocation[0] -= 1
+            return int(a['free'][allocation[0]])
+        if allocation[1] < self.capacity:
+            allocation[1] += 1
+            return int(allocation[1] - 1)
+        oldest = int(np.argmin(a['updated']))
+        if time.time() - a['updated'][oldest] >= self.idle_seconds:
+            return oldest
+        raise StreamError(f'Se alcanzó el máximo de {self.capacity} series en streaming', 503)
+
+    # States
+
+    def _read_state(self, slot):
+        """Row as a smoothing.py state (season oldest first)"""
+        a = self.arrays
+        period = int(a['period'][slot])
+        seasonal = KINDS[a['seasonal_kind'][slot]]
+        trend = KINDS[a['trend_kind'][slot]]
+        season = None
+        if seasonal:
+            season = np.roll(a['season'][slot, :period], -int(a['phase'][slot]))
+        return {
+            'params': {
+                'alpha': float(a['alpha'][slot]),
+                'beta': float(a['beta'][slot]) if trend else None,
+                'gamma': float(a['gamma'][slot]) if seasonal else None,
+                'trend': trend,
+                'seasonal': seasonal,
+                'seasonal_periods': period if seasonal else None
+            },
+            'level': float(a['level'][slot]),
+            'trend': float(a['trend'][slot]) if trend else None,
+            'season': season,
+            'fitted': np.empty(0),
+            'nobs': int(a['nobs'][slot]),
+            'sse': float(a['sse'][slot])
+        }
+
+    def _write_state(self, slot, state):
+        a = self.arrays
+        a['level'][slot] = state['level']
+        if state['params']['trend']:
+            a['trend'][slot] = state['trend']
+        if state['params']['seasonal']:
+            period = state['params']['seasonal_periods']
+            a['season'][slot, :period] = state['season']
+            a['phase'][slot] = 0
+        a['nobs'][slot] = state['nobs']
+        a['sse'][slot] = state['sse']
+        a['updated'][slot] = time.time()
+
+    # Operations
+
+    def register(self, state):
+        """Store a smoothing.py state (params, level, trend, season) as a new stream; returns its id"""
+        params = state.get('params') or {}
+        trend, seasonal = params.get('trend'), params.get('seasonal')
+        if trend not in KINDS or seasonal not in KINDS:
+            raise StreamError("Los componentes trend y seasonal deben ser 'add', 'mul' o null")
+        required = ['alpha'] + (['beta'] if trend else []) + (['gamma'] if seasonal else [])
+        for name in required:
+            value = params.get(name)
+            if not isinstance(value, (int, float)) or not 0 <= value <= 1:
+                raise StreamError(f'El parámetro {name} debe ser un número entre 0 y 1')
+        values = [state.get('level')] + ([state.get('trend')] if trend else [])
+        if not all(isinstance(v, (int, float)) and np.isfinite(v) for v in values):
+            raise StreamError('El estado debe incluir level (y trend si hay tendencia) numéricos')
+
+        period = 1
+        season = None
+        if seasonal:
+            period = params.get('seasonal_periods')
+            if not isinstance(period, int) or not 2 <= period <= self.max_period:
+                raise StreamError(f'seasonal_periods debe ser un entero entre 2 y {self.max_period}')
+            season = np.asarray(state['season'] if state.get('season') is not None else [], dtype='float64')
+            if season.shape != (period,) or not np.isfinite(season).all():
+                raise StreamError(f'season debe tener {period} factores estacionales')
+
+        with self._locked():
+            a = self.arrays
+            slot = self._free_slot()
+            stream_id = f'{slot:08x}{uuid.uuid4().hex[:24]}'
+            a['ids'][slot] = stream_id.encode('ascii')
+            a['trend_kind'][slot] = KINDS.index(trend)
+            a['seasonal_kind'][slot] = KINDS.index(seasonal)
+            a['period'][slot] = period
+            a['phase'][slot] = 0
+            a['alpha'][slot] = params['alpha']
+            a['beta'][slot] = params['beta'] if trend else 0.0
+            a['gamma'][slot] = params['gamma'] if seasonal else 0.0
+            a['level'][slot] = state['level']
+            a['trend'][slot] = state['trend'] if trend else 0.0
+            a['season'][slot] = 0.0
+            if seasonal:
+                a['season'][slot, :period] = season
+            a['nobs'][slot] = 0
+            a['sse'][slot] = 0.0
+            a['updated'][slot] = time.time()
+            a['used'][slot] = True
+        return stream_id
+
+    def get(self, stream_id):
+        """Current state of a stream, or None"""
+        with self._locked(exclusive=False):
+            slot = self._slot(stream_id)
+            return self._read_state(slot) if slot is not None else None
+
+    def remove(self, stream_id):
+        with self._locked():
+            slot = self._slot(stream_id)
+            if slot is None:
+                return False
+            a = self.arrays
+            a['used'][slot] = False
+            a['free'][a['allocation'][0]] = slot
+            a['allocation'][0] += 1
+            return True
+
+    def push(self, stream_id, values):
+        """Observe values (in order) on one stream; returns (one-step predictions, new state)"""
+        values = np.asarray(values, dtype='float64')
+        with self._locked():
+            slot = self._slot(stream_id)
+            if slot is None:
+                raise StreamError('Serie no encontrada', 404)
+            state = smoothing.advance(self._read_state(slot), values)
+            predictions = state['fitted']
+            state['sse'] += float(np.sum((values - predictions) ** 2))
+            self._write_state(slot, state)
+        return predictions, state
+
+    def push_many(self, stream_ids, values):
+        """
+        Observe (stream_ids[i], values[i]) pairs, in order per stream; returns
+        the one-step prediction of each observation. Each round applies one
+        observation of every stream involved with vectorized updates.
+        """
+        values = np.asarray(values, dtype='float64')
+        predictions = np.empty(len(values))
+        with self._locked():
+            slots = np.empty(len(stream_ids), dtype='int64')
+            for i, stream_id in enumerate(stream_ids):
+                slot = self._slot(stream_id)
+                if slot is None:
+                    raise StreamError(f'Serie no encontrada: {stream_id}', 404)
+                slots[i] = slot
+
+            # Round r takes the r-th observation of each stream
+            order = np.argsort(slots, kind='stable')
+            sorted_slots = slots[order]
+            starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+            rounds = np.empty(len(slots), dtype='int64')
+            rounds[order] = np.arange(len(slots)) - np.repeat(starts, np.diff(np.r_[starts, len(slots)]))
+            for r in range(int(rounds.max()) + 1 if len(rounds) else 0):
+                members = np.flatnonzero(rounds == r)
+                predictions[members] = self._advance(slots[members], values[members])
+        return predictions
+
+    def _advance(self, slots, y):
+        """One observation for each of slots (distinct rows), vectorized; returns the predictions"""
+        a = self.arrays
+        tk, sk = a['trend_kind'][slots], a['seasonal_kind'][slots]
+        alpha, beta, gamma = a['alpha'][slots], a['beta'][slots], a['gamma'][slots]
+        level, trend = a['level'][slots], a['trend'][slots]
+        phase, period = a['phase'][slots].astype('int64'), a['period'][slots].astype('int64')
+        s = a['season'][slots, phase]
+
+        with np.errstate(all='ignore'):
+            base = np.where(tk == 1, level + trend, np.where(tk == 2, level * trend, level))
+            prediction = np.where(sk == 1, base + s, np.where(sk == 2, base * s, base))
+            adjusted = np.where(sk == 1, y - s, np.where(sk == 2, y / s, y))
+            new_level = alpha * adjusted + (1 - alpha) * base
+            new_trend = np.where(tk == 1, beta * (new_level - level) + (1 - beta) * trend,
+                                 np.where(tk == 2, beta * (new_level / level) + (1 - beta) * trend, trend))
+            new_season = np.where(sk == 1, gamma * (y - base) + (1 - gamma) * s,
+                                  np.where(sk == 2, gamma * (y / base) + (1 - gamma) * s, s))
+
+        a['season'][slots, phase] = new_season
+        a['phase'][slots] = (phase + 1) % period
+        a['level'][slots] = new_level
+        a['trend'][slots] = new_trend
+        a['nobs'][slots] += 1
+        a['sse'][slots] += (y - prediction) ** 2
+        a['updated'][slots] = time.time()
+        return prediction
+
+    @staticmethod
+    def describe(stream_id, state, horizon=1):
+        """JSON-safe view of a state with its next forecasts"""
+        return {
+            'stream_id': stream_id,
+            'params': state['params'],
+            'level': state['level'],
+            'trend': state['trend'],
+            'season': state['season'].tolist() if state['season'] is not None else None,
+            'nobs': state['nobs'],
+            'rmse': float(np.sqrt(state['sse'] / state['nobs'])) if state['nobs'] else None,
+            'forecast': smoothing.forecast(state, horizon).tolist()
+        }
+
+    def stats(self):
+        allocation = self.arrays['allocation']
+        return {'streams': int(allocation[1] - allocation[0]), 'capacity': self.capacity}
@@ -0,0 +1,30 @@
+import io
+import os
+import tempfile
+
+import pytest
+
+# app creates its stores from the environment when imported
+STATE_DIR = tempfile.mkdtemp(prefix='forecast-tests-')
+os.environ.update(RESULT_STORE_DIR=os.path.join(STATE_DIR, 'cache'), SHARED_ARRAY_DIR=os.path.join(STATE_DIR, 'shm'),
+                  STREAM_DIR=os.path.join(STATE_DIR, 'streams'), WARMUP_ENABLED='false')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app
+
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(uploads))
+    return app.app.test_client()
+
+
+@pytest.fixture
+def upload(client):
+    def upload(filename, data, **form):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return client.post('/upload_data', data=dict(form, file=(io.BytesIO(data), filename)),
+                           content_type='multipart/form-data')
+    return upload
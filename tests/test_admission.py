@@ -0,0 +1,68 @@
+import pandas as pd
+
+import admission
+
+BUDGET, MAX_COST = 10, 900
+
+
+def test_small_requests_are_accepted():
+    decision, cost, limits = admission.decide('/analyze_series', 10_000, {}, BUDGET, MAX_COST)
+    assert decision == admission.ACCEPT and limits == {}
+    assert cost == admission.estimate_cost('/analyze_series', 10_000, {})
+
+
+def test_plots_are_downgraded_to_fewer_points():
+    rows = 3_000_000
+    decision, cost, limits = admission.decide('/plot_series', rows, {}, BUDGET, MAX_COST)
+    assert decision == admission.DOWNGRADE
+    assert admission.MIN_PLOT_POINTS <= limits['max_points'] < rows
+    assert cost <= BUDGET
+
+
+def test_lag_plots_are_downgraded_to_fewer_lags():
+    rows = 300_000
+    decision, cost, limits = admission.decide('/plot_lag_series', rows, {'max_lags': 40}, BUDGET, MAX_COST)
+    assert decision == admission.DOWNGRADE
+    assert admission.MIN_LAGS <= limits['max_lags'] < 40
+    assert cost <= BUDGET
+
+
+def test_expensive_requests_are_queued_or_rejected():
+    assert admission.decide('/comparative_analysis', 1_000_000, {}, BUDGET, MAX_COST)[0] == admission.QUEUE
+    assert admission.decide('/comparative_analysis', 10_000_000, {}, BUDGET, MAX_COST)[0] == admission.REJECT
+    assert admission.decide('/comparative_analysis', 1_000_000, {}, BUDGET, MAX_COST,
+                            allow_queue=False)[0] == admission.REJECT
+
+
+def test_analyze_all_adds_the_cost_of_each_artifact():
+    rows = 100_000
+    load = rows * admission.LOAD_COST_PER_ROW
+    forecast = admission.estimate_cost('/holt_winters_forecast', rows, {})
+    decomposition = admission.estimate_cost('/analyze_series', rows, {})
+
+    cost = admission.estimate_cost('/analyze_all', rows, {'artifacts': ['table', 'forecast', 'decomposition']})
+
+    assert cost == forecast + decomposition - load
+
+
+def test_estimate_rows_from_a_sample(tmp_path):
+    path = tmp_path / 'datos.csv'
+    path.write_text('fecha,valor\n' + ''.join(f'2020-01-{i % 28 + 1:02d},{i:06d}\n' for i in range(50_000)))
+    estimate = admission.estimate_rows(str(path), sample_bytes=4096)
+    assert 45_000 < estimate < 55_000
+
+
+def test_downsample_keeps_at_most_max_points():
+    ts = pd.Series(range(1000))
+    assert len(admission.downsample(ts, 300)) <= 300
+    assert admission.downsample(ts, None) is ts
+
+
+def test_unparseable_parameters_are_costed_with_the_defaults():
+    rows = 100_000
+    for endpoint, name in (('/plot_lag_series', 'max_lags'), ('/holt_winters_forecast', 'periods'),
+                           ('/comparative_analysis', 'series_count')):
+        for value in ('muchos', None, [3], float('inf')):
+            assert admission.estimate_cost(endpoint, rows, {name: value}) == admission.estimate_cost(endpoint, rows, {})
+    assert admission.estimate_cost('/analyze_all', rows, {'artifacts': 'forecast'}) == \
+        admission.estimate_cost('/analyze_all', rows, {})
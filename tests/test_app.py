@@ -0,0 +1,245 @@
+import io
+
+import pandas as pd
+import pytest
+
+import app
+import jobs
+
+
+def monthly_csv(rows=36, sep=',', decimal='.'):
+    dates = pd.date_range('2020-01-01', periods=rows, freq='MS').strftime('%Y-%m-%d')
+    values = [f'{100 + i + 0.25:.2f}'.replace('.', decimal) for i in range(rows)]
+    return f'fecha{sep}valor\n' + ''.join(f'{d}{sep}{v}\n' for d, v in zip(dates, values))
+
+
+def workbook(**sheets):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for name, rows in sheets.items():
+            dates = pd.date_range('2020-01-01', periods=rows, freq='MS')
+            pd.DataFrame({'fecha': dates, 'valor': range(rows)}).to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def run_job(job_id):
+    """What the job runner does with a queued job, in this process"""
+    while app.job_queue.claim()['id'] != job_id:
+        pass
+    jobs._execute_job(job_id)
+
+
+def sse_events(response):
+    return [line.split(': ', 1)[1] for line in response.get_data(as_text=True).splitlines() if line.startswith('event: ')]
+
+
+def test_append_data_writes_the_file_number_format(client, upload, tmp_path):
+    assert upload('coma.csv', monthly_csv(sep=';', decimal=',')).status_code == 200
+
+    rows = [{'fecha': '2023-01-01', 'valor': 171.25}, {'fecha': '2023-02-01', 'valor': '172,5'}]
+    response = client.post('/append_data', json={'filename': 'coma.csv', 'rows': rows})
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['rows'] == 38
+    assert tmp_path.joinpath('uploads', 'coma.csv').read_text().endswith('2023-01-01;171,25\n2023-02-01;172,5\n')
+    table = client.post('/get_data_table', json={'filename': 'coma.csv', 'offset': 36, 'limit': 2}).get_json()
+    assert [row['valor'] for row in table['data']] == [171.25, 172.5]
+
+
+def test_append_data_rejects_values_that_are_not_numbers(client, upload, tmp_path):
+    assert upload('coma.csv', monthly_csv(sep=';', decimal=',')).status_code == 200
+    before = tmp_path.joinpath('uploads', 'coma.csv').read_bytes()
+
+    for value in ('171.25', 'n/d', float('inf')):
+        response = client.post('/append_data', json={'filename': 'coma.csv', 'rows': [{'fecha': '2023-01-01', 'valor': value}]})
+        assert response.status_code == 400
+        assert 'valor' in response.get_json()['error']
+    assert tmp_path.joinpath('uploads', 'coma.csv').read_bytes() == before
+
+
+def test_streams_validate_the_horizon_before_pushing(client):
+    state = {'params': {'alpha': 0.5}, 'level': 10.0, 'trend': None, 'season': None, 'horizon': 3}
+    registered = client.post('/streams', json=state).get_json()
+    stream_id = registered['stream_id']
+    assert len(registered['forecast']) == 3
+
+    response = client.post(f'/streams/{stream_id}/observations', json={'values': [12.0], 'horizon': 'abc'})
+    assert response.status_code == 400
+    assert client.get(f'/streams/{stream_id}?horizon=abc').status_code == 400
+    assert client.get(f'/streams/{stream_id}/events?horizon=abc').status_code == 400
+    assert client.get(f'/streams/{stream_id}').get_json()['nobs'] == 0
+
+    pushed = client.post(f'/streams/{stream_id}/observations', json={'values': [12.0, 14.0]}).get_json()
+    assert pushed['nobs'] == 2 and pushed['predictions'] == [10.0, 11.0]
+    batch = client.post('/streams/observations', json={'observations': [{'stream_id': stream_id, 'value': 13.0}],
+                                                       'horizon': 2}).get_json()
+    assert batch['predictions'] == [12.5] and len(batch['forecasts'][stream_id]) == 2
+
+    assert client.delete(f'/streams/{stream_id}').status_code == 200
+    assert client.get(f'/streams/{stream_id}').status_code == 404
+    assert client.get(f'/streams/{stream_id}/events').status_code == 404
+
+
+def test_upload_rejects_rows_with_more_fields_than_the_header(client, upload, tmp_path):
+    response = upload('ragged.csv', 'fecha,valor\n2023-01-01,1,2,3\n2023-02-01,2\n')
+
+    assert response.status_code == 400
+    assert 'más campos que el encabezado (línea 2)' in response.get_json()['error']
+    assert not tmp_path.joinpath('uploads', 'ragged.csv').exists()
+
+
+def test_upload_discards_a_workbook_without_the_requested_sheet(upload, tmp_path):
+    response = upload('libro.xlsx', workbook(ventas=24, costos=12), sheet='inventario')
+
+    assert response.status_code == 400
+    assert 'ventas, costos' in response.get_json()['error']
+    assert not tmp_path.joinpath('uploads', 'libro.xlsx').exists()
+
+
+def test_select_sheet_switches_the_analyzed_sheet(client, upload):
+    uploaded = upload('libro.xlsx', workbook(ventas=24, costos=12)).get_json()
+    assert uploaded['sheets'] == ['ventas', 'costos'] and uploaded['rows'] == 24
+
+    response = client.post('/select_sheet', json={'filename': 'libro.xlsx', 'sheet': 'costos'})
+
+    assert response.status_code == 200 and response.get_json()['rows'] == 12
+    assert client.get('/get_data_info/libro.xlsx').get_json()['rows'] == 12
+    assert client.post('/select_sheet', json={'filename': 'libro.xlsx', 'sheet': 'otra'}).status_code == 400
+
+
+def test_get_data_table_pages_with_a_cursor(client, upload):
+    assert upload('mensual.csv', monthly_csv(rows=36)).status_code == 200
+
+    query = {'filename': 'mensual.csv', 'limit': 20, 'sort_by': 'valor', 'sort_order': 'desc'}
+    first = client.post('/get_data_table', json=query).get_json()
+    second = client.post('/get_data_table', json=dict(query, cursor=first['next_cursor'])).get_json()
+
+    values = [row['valor'] for row in first['data'] + second['data']]
+    assert len(first['data']) == 20 and len(values) == 36
+    assert values == sorted(values, reverse=True)
+
+
+def test_get_data_table_rejects_non_numeric_paging(client, upload):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+
+    for params in ({'limit': 'diez'}, {'offset': 'x'}, {'min_value': 'bajo'}, {'date_from': 'ayer'}):
+        response = client.post('/get_data_table', json=dict(params, filename='mensual.csv'))
+        assert response.status_code == 400, params
+
+
+def test_gated_routes_report_their_own_parameter_errors(client, upload):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+    series = {'filename': 'mensual.csv', 'date_column': 'fecha', 'value_column': 'valor'}
+
+    for path, params in (('/plot_lag_series', {'max_lags': 'muchos'}), ('/holt_winters_forecast', {'periods': 'x'})):
+        response = client.post(path, json=dict(series, **params))
+        assert response.status_code == 400 and 'número entero' in response.get_json()['error'], path
+
+
+def test_jobs_run_an_analysis_in_the_background(client, upload):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+    params = {'filename': 'mensual.csv', 'date_column': 'fecha', 'value_column': 'valor'}
+    assert client.post('/jobs', json={'endpoint': '/upload_data', 'params': params}).status_code == 400
+
+    submitted = client.post('/jobs', json={'endpoint': '/analyze_series', 'params': params})
+    job_id = submitted.get_json()['job_id']
+    assert submitted.status_code == 202
+    assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'queued'
+    assert client.get(f'/jobs/{job_id}/result').status_code == 409
+
+    run_job(job_id)
+
+    assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'done'
+    result = client.get(f'/jobs/{job_id}/result')
+    assert result.status_code == 200 and result.get_json()['model_type'] in ('additive', 'multiplicative')
+    assert 'event: done' in client.get(f'/jobs/{job_id}/events').get_data(as_text=True)
+    assert client.post(f'/jobs/{job_id}/cancel').status_code == 409
+
+
+def test_comparative_analysis_stream_sends_each_method_then_done(client, upload):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+    query = {'filename': 'mensual.csv', 'date_column': 'fecha', 'value_column': 'valor'}
+
+    response = client.get('/comparative_analysis/stream', query_string=query)
+
+    assert response.mimetype == 'text/event-stream'
+    events = sse_events(response)
+    assert events[-1] == 'done' and 'analysis_error' not in events
+    assert set(events[:-1]) <= set(app.COMPARATIVE_RESULT_KEYS) and len(events) > 1
+    assert client.get('/comparative_analysis/stream', query_string={'filename': 'mensual.csv'}).status_code == 400
+
+
+def test_metrics_count_timed_requests(client, upload):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+    response = client.post('/get_data_table', json={'filename': 'mensual.csv'})
+    assert 'total;dur=' in response.headers['Server-Timing']
+
+    metrics = client.get('/metrics')
+
+    assert metrics.mimetype == 'text/plain'
+    text = metrics.get_data(as_text=True)
+    assert '# TYPE request_duration_seconds histogram' in text
+    assert 'request_duration_seconds_count{endpoint="/get_data_table",status="200"}' in text
+
+
+def test_profiles_are_saved_and_served_only_with_the_token(client, upload, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'PROFILE_TOKEN', 'secreto')
+    token = {'X-Profile-Token': 'secreto'}
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+
+    response = client.post('/get_data_table', json={'filename': 'mensual.csv'}, headers=dict(token, **{'X-Profile': '1'}))
+    profile_id = response.headers['X-Profile-Id']
+
+    listed = client.get('/profiles', headers=token).get_json()['profiles']
+    assert profile_id in [profile['id'] for profile in listed]
+    assert client.get(f'/profiles/{profile_id}', headers=token).get_json()['profile']['path'] == '/get_data_table'
+    assert client.get(f'/profiles/{profile_id}?format=pstats', headers=token).status_code == 200
+    assert client.get('/profiles').status_code == 404
+    assert client.get(f'/profiles/{profile_id}', headers={'X-Profile-Token': 'otro'}).status_code == 404
+
+
+def test_analyze_all_decomposes_the_series_once(client, upload, monkeypatch):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+    calls = []
+    decompose_series = app.decompose_series
+    monkeypatch.setattr(app, 'decompose_series', lambda ts: calls.append(len(ts)) or decompose_series(ts))
+    query = {'filename': 'mensual.csv', 'date_column': 'fecha', 'value_column': 'valor',
+             'artifacts': ['table', 'decomposition', 'forecast']}
+
+    result = client.post('/analyze_all', json=query).get_json()
+
+    assert result['success'] and calls == [36]
+    assert result['forecast']['model_type'] == result['decomposition']['model_type']
+    assert 'error' not in result['table']
+    streamed = client.post('/analyze_all', json=dict(query, stream='true'))
+    assert sse_events(streamed) == ['table', 'decomposition', 'forecast', 'done']
+    assert client.post('/analyze_all', json=dict(query, artifacts=['pronostico'])).status_code == 400
+
+
+def test_precompute_after_upload_fills_the_result_store(client, upload):
+    uploaded = upload('mensual.csv', monthly_csv(), precompute='true').get_json()
+    job_id = uploaded['precompute_job_id']
+    run_job(job_id)
+
+    result = client.get(f'/jobs/{job_id}/result').get_json()
+    assert result['artifacts'] == ['metadata', 'prepared_series', 'acf', 'period', 'decomposition']
+    assert (result['date_column'], result['value_column'], result['rows']) == ('fecha', 'valor', 36)
+    columns = {'date_column': 'fecha', 'value_column': 'valor'}
+    assert app.result_store.get(app.artifact_key('decomposition', 'mensual.csv', columns)) is not None
+    assert client.post('/precompute', json={'filename': 'otro.csv'}).status_code == 400
+
+
+def test_forecast_is_served_from_the_saved_model(client, upload):
+    assert upload('mensual.csv', monthly_csv()).status_code == 200
+    fitted = client.post('/holt_winters_forecast', json={'filename': 'mensual.csv', 'date_column': 'fecha',
+                                                         'value_column': 'valor', 'periods': 6}).get_json()
+    model_id = fitted['model_id']
+
+    served = client.get(f'/forecast/{model_id}?horizon=6').get_json()
+
+    assert served['forecast_values'] == pytest.approx(fitted['forecast_values'])
+    assert served['forecast_dates'][0].startswith('2023-01-01')
+    assert len(client.get(f'/forecast/{model_id}?horizon=24').get_json()['forecast_values']) == 24
+    assert client.get(f'/forecast/{model_id}?horizon=abc').status_code == 400
+    assert client.get(f'/forecast/{model_id}?horizon=0').status_code == 400
+    assert client.get('/forecast/' + '0' * 32).status_code == 404
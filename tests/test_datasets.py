@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+
+
+def frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'fecha': pd.date_range('2021-01-01', periods=rows, freq='D').strftime('%Y-%m-%d'),
+        'valor': rng.normal(50, 5, rows),
+        'unidades': rng.integers(0, 9, rows)
+    })
+
+
+def test_sidecar_round_trip_and_staleness(tmp_path):
+    path = tmp_path / 'datos.csv'
+    path.write_text('fecha,valor\n2021-01,1\n')
+    metadata = datasets.describe_frame(pd.read_csv(path))
+
+    datasets.write_sidecar(str(path), metadata)
+    stored = datasets.read_sidecar(str(path))
+    assert stored['rows'] == 1 and stored['columns'] == ['fecha', 'valor']
+
+    path.write_text('fecha,valor\n2021-01,1\n2021-02,2\n')
+    os.utime(path, ns=(0, 0))
+    assert datasets.read_sidecar(str(path)) is None
+
+    datasets.remove_sidecar(str(path))
+    assert not os.path.exists(datasets.sidecar_path(str(path)))
+
+
+def test_describe_frame_cleans_non_finite_values():
+    df = pd.DataFrame({'valor': [1.0, np.nan, np.inf]})
+    with np.errstate(invalid='ignore'):
+        description = datasets.describe_frame(df)
+    assert description['null_counts'] == {'valor': 1}
+    assert description['stats']['valor']['max'] is None
+    assert description['head'][1] == {'valor': None}
+
+
+def test_merge_descriptions_matches_describing_the_whole_file():
+    full = frame(500)
+    old, new = full.iloc[:400], full.iloc[400:].reset_index(drop=True)
+
+    merged = datasets.merge_descriptions(datasets.describe_frame(old), datasets.describe_frame(new))
+    expected = datasets.describe_frame(full)
+
+    for key in ('rows', 'columns', 'dtypes', 'null_counts', 'head'):
+        assert merged[key] == expected[key], key
+    for column, stats in expected['stats'].items():
+        assert merged['stats'][column] == pytest.approx(stats), column
+
+
+def test_merge_descriptions_widens_dtypes():
+    old = datasets.describe_frame(pd.DataFrame({'a': [1, 2], 'b': [1, 2]}))
+    new = datasets.describe_frame(pd.DataFrame({'a': [0.5], 'b': ['x']}))
+    merged = datasets.merge_descriptions(old, new)
+    assert merged['dtypes'] == {'a': 'float64', 'b': 'object'}
+    assert 'b' not in merged['stats']
+    assert merged['stats']['a']['count'] == 3
+
+
+def test_query_rows_sorts_filters_and_pages():
+    df = pd.DataFrame({'valor': [3.0, np.nan, 1.0, 5.0, 2.0], 'nombre': list('abcde')})
+    table, meta = datasets.build_table_arrays(df)
+    index = datasets.build_sort_index(table['c0'], table['n0'])
+
+    page, total = datasets.query_rows(table, index, None, [], False, 0, 10)
+    assert total == 5 and page.tolist() == [2, 4, 0, 3, 1]
+
+    # Nulls stay last when descending
+    page, _ = datasets.query_rows(table, index, None, [], True, 0, 10)
+    assert page.tolist() == [3, 0, 4, 2, 1]
+
+    page, total = datasets.query_rows(table, index, (2.0, 4.0), [], False, 0, 10)
+    assert total == 2 and page.tolist() == [4, 0]
+
+    masks = [table['c1'] != 'a']
+    page, total = datasets.query_rows(table, index, None, masks, False, 1, 2)
+    assert total == 4 and page.tolist() == [4, 3]
+
+    records = datasets.rows_to_records(table, meta, np.array([1, 3]))
+    assert records == [{'valor': None, 'nombre': 'b'}, {'valor': 5.0, 'nombre': 'd'}]
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from benchmarks import import_time
+
+# Generous enough for a cold CI runner; pandas and Flask alone take most of it
+MAX_IMPORT_SECONDS = float(os.environ.get('IMPORT_TIME_MAX_SECONDS', '3.0'))
+
+HEAVY_MODULES = ('statsmodels', 'plotly', 'matplotlib', 'seaborn', 'scipy')
+
+
+def app_env(tmp_path):
+    return dict(os.environ, RESULT_STORE_DIR=str(tmp_path / 'cache'), SHARED_ARRAY_DIR=str(tmp_path / 'shm'),
+                STREAM_DIR=str(tmp_path / 'streams'))
+
+
+def test_heavy_libraries_are_imported_lazily(tmp_path):
+    code = f'import sys, app; print("loaded:" + ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    proc = subprocess.run([sys.executable, '-c', code], cwd=import_time.ROOT, env=app_env(tmp_path),
+                          capture_output=True, text=True, check=True)
+    loaded = proc.stdout.rsplit('loaded:', 1)[1].strip()
+    assert loaded == '', f'imported at startup: {loaded}'
+
+
+def test_app_import_time(tmp_path, monkeypatch):
+    for name, value in app_env(tmp_path).items():
+        monkeypatch.setenv(name, value)
+    rows = import_time.measure('app')
+    total = next(cumulative for name, _, cumulative in rows if name == 'app') / 1e6
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)[1:6]
+    assert total <= MAX_IMPORT_SECONDS, f'import app took {total:.2f} s; slowest: {slowest}'
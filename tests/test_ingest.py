@@ -0,0 +1,99 @@
+import gzip
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+import ingest
+
+
+def make_csv(rows=2000, delimiter=','):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'fecha': pd.date_range('2020-01-01', periods=rows, freq='D').strftime('%Y-%m-%d'),
+        'valor': rng.normal(100, 15, rows).round(3),
+        'unidades': rng.integers(0, 50, rows),
+        'region': rng.choice(['norte', 'sur'], rows)
+    })
+    df.loc[5, 'valor'] = np.nan
+    return df.to_csv(index=False, sep=delimiter).encode('utf-8')
+
+
+def ingest_bytes(path, data, chunk=4096, **kwargs):
+    writer = ingest.StreamingIngest(str(path), block_bytes=16 * 1024, **kwargs)
+    for start in range(0, len(data), chunk):
+        writer.write(data[start:start + chunk])
+    return writer.finish()
+
+
+def test_summary_matches_a_full_read(tmp_path):
+    data = make_csv()
+    path = tmp_path / 'datos.csv'
+
+    summary = ingest_bytes(path, data)
+    expected = datasets.describe_frame(pd.read_csv(path))
+
+    assert path.read_bytes() == data
+    for key in ('rows', 'columns', 'dtypes', 'null_counts', 'head'):
+        assert summary[key] == expected[key], key
+    for column, stats in expected['stats'].items():
+        assert summary['stats'][column] == pytest.approx(stats), column
+    assert summary['dialect'] == {'delimiter': ',', 'encoding': 'utf-8'}
+
+
+def test_detects_columns_and_date_range(tmp_path):
+    summary = ingest_bytes(
+        tmp_path / 'datos.csv', make_csv(rows=300),
+        detect_columns=lambda head: ('fecha', 'valor'),
+        parse_dates=lambda values: pd.to_datetime(values, errors='coerce')
+    )
+    assert (summary['date_column'], summary['value_column']) == ('fecha', 'valor')
+    assert summary['date_range'] == {'start': '2020-01-01T00:00:00', 'end': '2020-10-26T00:00:00'}
+
+
+def test_semicolon_file_with_comma_decimals(tmp_path):
+    data = 'fecha;valor\n2023-01;1.234,5\n2023-02;2.000,25\n2023-03;987,0\n'.encode('utf-8')
+    summary = ingest_bytes(tmp_path / 'datos.csv', data)
+    assert summary['dialect']['delimiter'] == ';'
+    assert summary['number_format'] == {'decimal': ',', 'thousands': '.', 'columns': ['valor']}
+    assert summary['dtypes']['valor'] == 'float64'
+    assert summary['stats']['valor']['max'] == 2000.25
+
+
+def test_gzip_upload_is_stored_compressed(tmp_path):
+    data = make_csv(rows=500)
+    path = tmp_path / 'datos.csv.gz'
+    summary = ingest_bytes(path, gzip.compress(data), compression='gzip')
+    assert summary['rows'] == 500
+    assert gzip.decompress(path.read_bytes()) == data
+
+
+@pytest.mark.parametrize('data, line', [
+    (b'fecha,valor\n2023-01,1\n2023-02,2,3\n', 3),
+    (b'fecha,valor\n2023-01,1,2,3\n2023-02,2\n', 2),
+    (b'fecha;valor\n2023-01;1\n2023-02;2\n2023-03;3;4\n' + b'2023-04;4\n' * 10, 4),
+])
+def test_rejects_rows_with_extra_fields(tmp_path, data, line):
+    with pytest.raises(ingest.IngestError, match=f'más campos que el encabezado \\(línea {line}\\)'):
+        ingest_bytes(tmp_path / 'datos.csv', data)
+
+
+def test_rejects_uploads_over_the_size_limit(tmp_path):
+    with pytest.raises(ingest.IngestError) as error:
+        ingest_bytes(tmp_path / 'datos.csv', make_csv(), max_bytes=10_000)
+    assert error.value.status == 413
+
+
+def test_binary_data_is_rejected(tmp_path):
+    with pytest.raises(ingest.IngestError):
+        ingest_bytes(tmp_path / 'datos.csv', b'\x00\x01\x02' * 1000)
+
+
+def test_float_tokens_are_not_recorded_as_integers(tmp_path):
+    data = b'fecha,valor,escala,unidades\n' + b''.join(
+        f'2023-01-{i + 1:02d},{i}.0,{i}e1,{i}\n'.encode() for i in range(20))
+    path = tmp_path / 'datos.csv'
+    summary = ingest_bytes(path, data)
+    assert summary['dtypes'] == pd.read_csv(path).dtypes.astype(str).to_dict()
+    assert summary['dtypes'] == {'fecha': 'object', 'valor': 'float64', 'escala': 'float64', 'unidades': 'int64'}
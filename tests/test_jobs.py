@@ -0,0 +1,28 @@
+import subprocess
+import sys
+import time
+
+import jobs
+
+
+def test_supervisor_restarts_a_runner_that_exits(monkeypatch):
+    started = []
+
+    def start_runner():
+        # The first runner crashes at once; its replacement keeps running
+        code = 'import sys; sys.exit(3)' if not started else 'import time; time.sleep(60)'
+        started.append(subprocess.Popen([sys.executable, '-c', code]))
+        return started[-1]
+
+    monkeypatch.setattr(jobs, 'start_runner', start_runner)
+    messages = []
+    supervisor = jobs.RunnerSupervisor(interval=0.05, log=messages.append)
+    try:
+        deadline = time.time() + 10
+        while supervisor.restarts < 1 and time.time() < deadline:
+            time.sleep(0.05)
+        assert supervisor.restarts == 1 and supervisor.runner is started[1]
+        assert 'exited with code 3' in messages[0]
+    finally:
+        supervisor.stop()
+    assert started[1].poll() is not None
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+import numeric
+
+
+def test_detects_comma_decimal_with_dot_thousands():
+    df = pd.DataFrame({'fecha': ['2023-01', '2023-02', '2023-03'],
+                       'valor': ['1.234,50', '987,25', '12.000,00']})
+
+    number_format = numeric.detect_format(df)
+
+    assert number_format == {'decimal': ',', 'thousands': '.', 'columns': ['valor']}
+    numeric.apply_format(df, number_format)
+    assert df['valor'].dtype == np.float64
+    assert df['valor'].tolist() == [1234.5, 987.25, 12000.0]
+    assert df.attrs['number_format'] == number_format
+
+
+def test_detects_dot_decimal_with_comma_thousands():
+    df = pd.DataFrame({'valor': ['1,234.50', '987.25', '12,000']})
+    number_format = numeric.detect_format(df)
+    assert number_format['decimal'] == '.'
+    assert numeric.normalize(df['valor'], number_format).tolist() == [1234.5, 987.25, 12000.0]
+
+
+def test_currency_spaces_and_accounting_negatives():
+    values = pd.Series(['$ 1.234,5', '(2.000,00)', '€3,25', 'USD 10'])
+    number_format = {'decimal': ',', 'thousands': '.', 'columns': ['v']}
+    assert numeric.normalize(values, number_format).tolist() == [1234.5, -2000.0, 3.25, 10.0]
+
+
+def test_ambiguous_values_follow_prefer_comma():
+    df = pd.DataFrame({'valor': ['$1.234', '$2.500', '$3.750']})
+    assert numeric.detect_format(df)['decimal'] == '.'
+    comma = numeric.detect_format(df, prefer_comma=True)
+    assert comma['decimal'] == ','
+    assert numeric.normalize(df['valor'], comma).tolist() == [1234.0, 2500.0, 3750.0]
+
+
+def test_ignores_numeric_and_text_columns():
+    df = pd.DataFrame({'n': [1.5, 2.5], 'nombre': ['norte', 'sur'], 'fecha': ['2023-01-01', '2023-02-01']})
+    assert numeric.detect_format(df) is None
+
+
+def test_unparseable_values_become_nan():
+    number_format = {'decimal': ',', 'thousands': '.', 'columns': ['v']}
+    result = numeric.normalize(pd.Series(['1,5', 'n/d', None]), number_format)
+    assert result.iloc[0] == 1.5 and result.iloc[1:].isna().all()
+
+
+def test_parse_values_takes_numbers_and_text_in_the_format():
+    comma = {'decimal': ',', 'thousands': '.', 'columns': ['valor']}
+    parsed = numeric.parse_values([171.25, '172,5', '1.234,5', '171.25', 'n/d', None, float('inf'), True], comma)
+    assert parsed[:3].tolist() == [171.25, 172.5, 1234.5]
+    assert parsed[3:].isna().all()
+    assert numeric.parse_values(['171.25', 3], None).tolist() == [171.25, 3.0]
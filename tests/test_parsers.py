@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+import parsers
+
+requires_arrow = pytest.mark.skipif(not parsers.pyarrow_available(), reason='pyarrow is not installed')
+
+
+@pytest.fixture
+def pandas_disabled(monkeypatch):
+    """Fail the test if the pandas fallback is used"""
+    def fail(*args, **kwargs):
+        raise AssertionError('read fell back to pandas')
+    monkeypatch.setattr(parsers.PandasBackend, 'read_csv', fail)
+
+
+@pytest.fixture
+def float_csv(tmp_path):
+    path = tmp_path / 'datos.csv'
+    path.write_text('fecha,valor\n' + ''.join(f'2023-01-{i + 1:02d},{i}.0\n' for i in range(20)))
+    return str(path)
+
+
+@requires_arrow
+def test_float_column_loads_through_arrow(float_csv, pandas_disabled):
+    df = parsers.read_csv(parsers.ArrowBackend(), float_csv, ',', 'utf-8', dtype={'fecha': 'object', 'valor': 'float64'})
+    assert df['valor'].dtype == 'float64'
+    assert df['fecha'].dtype == object
+    assert 'rejected_hints' not in df.attrs
+
+
+@requires_arrow
+def test_wrong_hints_are_retried_with_arrow_and_flagged(float_csv, pandas_disabled):
+    df = parsers.read_csv(parsers.ArrowBackend(), float_csv, ',', 'utf-8', dtype={'valor': 'int64'})
+    assert df['valor'].dtype == 'float64'
+    assert df['valor'].tolist() == [float(i) for i in range(20)]
+    assert df.attrs['rejected_hints'] is True
+
+
+def test_wrong_hints_are_retried_with_pandas(tmp_path):
+    path = tmp_path / 'datos.csv'
+    path.write_text('a,b\nx,1\ny,2\n')
+    df = parsers.read_csv(parsers.PandasBackend(), str(path), ',', 'utf-8', dtype={'a': 'float64'})
+    assert df['a'].tolist() == ['x', 'y']
+    assert df.attrs['rejected_hints'] is True
+
+
+@requires_arrow
+def test_ragged_rows_fall_back_to_pandas(tmp_path):
+    path = tmp_path / 'datos.csv'
+    path.write_text('a,b\n1,2\n3\n')
+    df = parsers.read_csv(parsers.ArrowBackend(), str(path), ',', 'utf-8', dtype={'a': 'int64'})
+    assert df['a'].tolist() == [1, 3]
+    assert 'rejected_hints' not in df.attrs
+    assert pd.isna(df['b'].iloc[1])
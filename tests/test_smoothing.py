@@ -0,0 +1,81 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+import smoothing
+
+SPECS = [
+    (None, None, None),
+    ('add', None, None),
+    ('add', 'add', 12),
+    ('add', 'mul', 12),
+]
+
+
+def monthly_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    values = 100 + 0.5 * t + 10 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 1, n)
+    return pd.Series(values, index=pd.date_range('2000-01-01', periods=n, freq='MS'))
+
+
+def fit(y, trend, seasonal, seasonal_periods):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ExponentialSmoothing(y, trend=trend, seasonal=seasonal, seasonal_periods=seasonal_periods).fit()
+
+
+@pytest.mark.parametrize('trend,seasonal,seasonal_periods', SPECS)
+def test_state_forecast_matches_statsmodels(trend, seasonal, seasonal_periods):
+    results = fit(monthly_series(72), trend, seasonal, seasonal_periods)
+    state = smoothing.from_results(results, trend, seasonal, seasonal_periods)
+
+    assert state['nobs'] == 72
+    np.testing.assert_allclose(smoothing.forecast(state, 18), results.forecast(18).values, rtol=1e-10)
+
+
+@pytest.mark.parametrize('trend,seasonal,seasonal_periods', SPECS)
+def test_advance_matches_statsmodels_recursions(trend, seasonal, seasonal_periods):
+    y = monthly_series(84)
+    head = fit(y[:72], trend, seasonal, seasonal_periods)
+    state = smoothing.advance(smoothing.from_results(head, trend, seasonal, seasonal_periods), y[72:].values)
+
+    # The same parameters and initial states run over the whole series
+    params = head.params
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        full = ExponentialSmoothing(
+            y, trend=trend, seasonal=seasonal, seasonal_periods=seasonal_periods,
+            initialization_method='known', initial_level=params['initial_level'],
+            initial_trend=params['initial_trend'] if trend else None,
+            initial_seasonal=params['initial_seasons'] if seasonal else None
+        ).fit(smoothing_level=params['smoothing_level'],
+              smoothing_trend=params['smoothing_trend'] if trend else None,
+              smoothing_seasonal=params['smoothing_seasonal'] if seasonal else None,
+              optimized=False)
+
+    assert state['nobs'] == 84 and state['refit_nobs'] == 72
+    np.testing.assert_allclose(state['fitted'], full.fittedvalues.values, rtol=1e-9)
+    np.testing.assert_allclose(smoothing.forecast(state, 12), full.forecast(12).values, rtol=1e-9)
+
+
+def test_advance_returns_a_new_state():
+    results = fit(monthly_series(48), 'add', 'add', 12)
+    state = smoothing.from_results(results, 'add', 'add', 12)
+    level, season = state['level'], state['season'].copy()
+
+    advanced = smoothing.advance(state, [150.0, 151.0])
+
+    assert advanced['nobs'] == 50
+    assert state['level'] == level and state['nobs'] == 48
+    np.testing.assert_array_equal(state['season'], season)
+
+
+def test_flat_forecast_without_trend():
+    state = {'params': {'alpha': 0.5, 'beta': None, 'gamma': None, 'trend': None,
+                        'seasonal': None, 'seasonal_periods': None},
+             'level': 7.0, 'trend': None, 'season': None}
+    np.testing.assert_array_equal(smoothing.forecast(state, 3), [7.0, 7.0, 7.0])
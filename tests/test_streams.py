@@ -0,0 +1,32 @@
+import pytest
+
+import streams
+
+STATE = {'params': {'alpha': 0.5}, 'level': 10.0, 'trend': None, 'season': None}
+
+
+def test_rows_of_removed_streams_are_reused(tmp_path):
+    table = streams.StreamTable(str(tmp_path), capacity=3)
+    first, second, third = (table.register(STATE) for _ in range(3))
+    assert table.stats()['streams'] == 3
+
+    assert table.remove(second)
+    replacement = table.register(STATE)
+
+    assert replacement[:8] == second[:8] and replacement != second
+    assert table.get(second) is None and table.get(replacement) is not None
+    assert table.stats()['streams'] == 3
+    with pytest.raises(streams.StreamError):
+        table.register(STATE)
+
+
+def test_other_tables_find_streams_by_id(tmp_path):
+    writer = streams.StreamTable(str(tmp_path), capacity=4)
+    reader = streams.StreamTable(str(tmp_path), capacity=4)
+    stream_id = writer.register(STATE)
+
+    predictions, state = reader.push(stream_id, [12.0])
+
+    assert predictions.tolist() == [10.0] and state['level'] == 11.0
+    assert writer.get(stream_id)['nobs'] == 1
+    assert reader.get('0' * 32) is None and reader.get('not-an-id') is None